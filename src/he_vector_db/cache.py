@@ -0,0 +1,189 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def query_key(vec: Sequence[float], *parts: Any, quantum: float = 1e-4) -> bytes:
+    """
+    Hash of a query vector after L2 normalisation and quantisation to `quantum`,
+    so tiny float noise (re-embedding the same prompt) maps to the same key.
+    Extra `parts` (n_results, filters, ...) are folded into the key.
+    """
+    arr = np.asarray(vec, dtype=np.float64)
+    norm = np.linalg.norm(arr)
+    if norm > 0:
+        arr = arr / norm
+    q = np.round(arr / quantum).astype(np.int32)
+    h = hashlib.blake2b(q.tobytes(), digest_size=16)
+    for p in parts:
+        h.update(b"\x00" + repr(p).encode("utf-8"))
+    return h.digest()
+
+
+class QueryResultCache:
+    """
+    Bounded LRU cache of query results, tagged with the store version they were
+    computed at. A lookup made at a different version is a miss (and drops the
+    entry), so results are never served across a write.
+
+    Bounds: `max_entries` entries and/or `max_bytes` of (estimated) result size.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[Hashable, Tuple[int, List[Any], int]]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.saved_seconds = 0.0
+        self._miss_cost = 0.0  # EWMA of per-query scan time
+
+    @staticmethod
+    def _sizeof(value: List[Any]) -> int:
+        size = 64
+        for row in value:
+            for item in row:
+                size += len(item) if isinstance(item, (bytes, str)) else 8
+        return size
+
+    def get(self, key: Hashable, version: int) -> Optional[List[Any]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] != version:
+                self._drop(key)
+                self.invalidations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            self.saved_seconds += self._miss_cost
+            return entry[1]
+
+    def put(self, key: Hashable, version: int, value: List[Any]):
+        size = self._sizeof(value)
+        with self._lock:
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (version, value, size)
+            self.bytes += size
+            while self._data and (
+                len(self._data) > self.max_entries
+                or (self.max_bytes is not None and self.bytes > self.max_bytes)
+            ):
+                old = next(iter(self._data))
+                self._drop(old)
+                self.evictions += 1
+
+    def record_miss_cost(self, seconds_per_query: float):
+        """Feed the observed per-query scan time; used to estimate time saved by hits."""
+        with self._lock:
+            if self._miss_cost == 0.0:
+                self._miss_cost = seconds_per_query
+            else:
+                self._miss_cost = 0.8 * self._miss_cost + 0.2 * seconds_per_query
+
+    def _drop(self, key: Hashable):
+        _, _, size = self._data.pop(key)
+        self.bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "saved_seconds": self.saved_seconds,
+            }
+
+
+class EncryptedQueryCache:
+    """
+    Bounded LRU cache of encrypted query vectors, keyed by an exact hash of the
+    normalised vector and the fingerprint of the CKKS context it was encrypted
+    under (see `query_batch.encrypt_batch`). One cache can be shared by every
+    store opened with the same key material, e.g. one per sample size in eval.
+
+    Entries are live CKKSVector objects; scans only read them, so a cached
+    ciphertext may be used by several threads at once.
+    Bounds: `max_entries` entries and/or `max_bytes` of serialized ciphertext size.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, nbytes: int):
+        with self._lock:
+            if self.max_bytes is not None and nbytes > self.max_bytes:
+                return
+            if key in self._data:
+                self.bytes -= self._data.pop(key)[1]
+            self._data[key] = (value, nbytes)
+            self.bytes += nbytes
+            while self._data and (
+                len(self._data) > self.max_entries
+                or (self.max_bytes is not None and self.bytes > self.max_bytes)
+            ):
+                _, (_, size) = self._data.popitem(last=False)
+                self.bytes -= size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,272 @@
+import os
+import stat
+import time
+import socket
+import logging
+import threading
+import socketserver
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .store import HEVectorStore
+from .metrics import StoreProfiler
+from .distributed import _WorkerHandler, send_message, recv_message
+
+logger = logging.getLogger(__name__)
+
+
+class DaemonError(RuntimeError):
+    """The search daemon was unreachable or answered with an error."""
+
+
+class SearchDaemon:
+    """
+    Serves query batches against stores that stay open for the life of the
+    process, so a client pays warm-query latency instead of context parsing
+    and (with `resident=True` stores) ciphertext deserialization.
+
+    `stores` maps names to open stores; one store may be registered under
+    several names (e.g. every sample size of a shared store). `subsets` maps
+    a name to the subset it serves: requests for that name that don't name a
+    subset themselves are restricted to it (query, ids, count, health docs).
+
+    ops:
+      health : {"stores": {name: {"docs", "resident"}}, "uptime", "queries"}
+      query  : blob 0 = float64 (n, dim) query matrix; reply "scores" per query,
+               blobs = encrypted (id, text) per hit (text b"" when absent)
+      ids    : encrypted ids of a store (optionally of one subset) as blobs
+      count  : {"count"} — number of documents (optionally of one subset)
+      stats  : profiler snapshot and cache / autotune / memory stats; "reset" clears the profiler
+      reload : bring resident copies up to date now instead of at the next query
+    """
+
+    def __init__(self, stores: Dict[str, HEVectorStore], subsets: Optional[Dict[str, Optional[str]]] = None):
+        if not stores:
+            raise ValueError("at least one store is required")
+        self.stores = dict(stores)
+        self.subsets = dict(subsets or {})
+        unknown = set(self.subsets) - set(self.stores)
+        if unknown:
+            raise ValueError(f"subsets given for unknown stores: {', '.join(sorted(unknown))}")
+        self.started = time.time()
+        self.queries = 0
+        self._lock = threading.Lock()
+
+    def _store(self, header: Dict[str, Any]) -> HEVectorStore:
+        name = header.get("store")
+        if name not in self.stores:
+            raise KeyError(f"unknown store {name!r} (serving: {', '.join(sorted(self.stores))})")
+        return self.stores[name]
+
+    def _subset(self, header: Dict[str, Any]) -> Optional[str]:
+        return header.get("subset") or self.subsets.get(header.get("store"))
+
+    def warm(self):
+        """Load every resident store's ciphertexts up front."""
+        for store in {id(s): s for s in self.stores.values()}.values():
+            if store.resident:
+                t0 = time.perf_counter()
+                docs = len(store.load_resident())
+                logger.info("[daemon] %s: %d resident docs in %.1fs", store.db_path, docs, time.perf_counter() - t0)
+
+    def handle(self, header: Dict[str, Any], blobs: List[bytes]) -> Tuple[Dict[str, Any], List[bytes]]:
+        op = header.get("op")
+        if op == "health":
+            stores = {name: {"docs": s.count(subset=self.subsets.get(name)), "resident": s.resident}
+                      for name, s in self.stores.items()}
+            return {"ok": True, "stores": stores, "uptime": time.time() - self.started,
+                    "queries": self.queries, "pid": os.getpid()}, []
+        if op == "query":
+            return self._query(self._store(header), header, blobs)
+        if op == "ids":
+            return {"ok": True}, list(self._store(header).get_all_ids(subset=self._subset(header)))
+        if op == "count":
+            return {"ok": True, "count": self._store(header).count(subset=self._subset(header))}, []
+        if op == "stats":
+            store = self._store(header)
+            reply = {
+                "ok": True,
+                "profile": store.profiler.snapshot(),
+                "result_cache": store.cache_stats(),
+                "query_cache": store.query_cache_stats(),
+                "autotune": store.autotune_stats(),
+                "memory": store.memory_stats(),
+            }
+            if header.get("reset"):
+                store.profiler.reset()
+            return reply, []
+        if op == "reload":
+            self.warm()
+            return {"ok": True}, []
+        return {"ok": False, "error": f"unknown op {op!r}"}, []
+
+    def _query(self, store: HEVectorStore, header: Dict[str, Any], blobs: List[bytes]):
+        matrix = np.frombuffer(blobs[0], dtype=np.float64).reshape(-1, int(header["dim"]))
+        t0 = time.perf_counter()
+        hits = store.query(
+            matrix,
+            n_results=int(header.get("n_results", 5)),
+            max_workers=header.get("max_workers"),
+            where=header.get("where"),
+            subset=self._subset(header),
+        )
+        seconds = time.perf_counter() - t0
+        with self._lock:
+            self.queries += len(matrix)
+        out: List[bytes] = []
+        for row in hits:
+            for enc_id, enc_txt, _ in row:
+                out += [enc_id, enc_txt or b""]
+        return {"ok": True, "scores": [[h[2] for h in row] for row in hits], "seconds": seconds}, out
+
+
+class DaemonServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, daemon: SearchDaemon, socket_path: str):
+        self.worker = daemon  # _WorkerHandler dispatches to server.worker.handle
+        self.socket_path = socket_path
+        # 비밀키로 복호화한 점수를 돌려주므로 소유자만 접근: bind 가 소켓 파일을 만드는 순간부터
+        # 0600 이 되도록 umask 로 생성 (bind 후 chmod 하면 그 사이에 다른 사용자가 connect 할 수 있다)
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, _WorkerHandler)
+        finally:
+            os.umask(old_umask)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def _remove_stale_socket(socket_path: str):
+    if not os.path.exists(socket_path):
+        return
+    if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+        raise FileExistsError(f"{socket_path} exists and is not a socket")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        os.unlink(socket_path)  # 이전 데몬이 비정상 종료하며 남긴 소켓
+        return
+    finally:
+        probe.close()
+    raise DaemonError(f"a daemon is already listening on {socket_path}")
+
+
+def serve_daemon(stores: Dict[str, HEVectorStore], socket_path: str, ready=None,
+                 subsets: Optional[Dict[str, Optional[str]]] = None):
+    """Warm resident stores and serve until a 'shutdown' message; `ready` (an Event) is set once listening."""
+    daemon = SearchDaemon(stores, subsets)
+    daemon.warm()
+    _remove_stale_socket(socket_path)
+    with DaemonServer(daemon, socket_path) as server:
+        logger.info("[daemon] serving %s on %s", ", ".join(sorted(stores)), socket_path)
+        if ready is not None:
+            ready.set()
+        server.serve_forever()
+
+
+class RemoteStore:
+    """
+    Client-side stand-in for one store served by a SearchDaemon, with the
+    query / get_all_ids / count calls of HEVectorStore. Hits are the same
+    (enc_id, enc_text, score) tuples. `profiler` records client-side round trips.
+    """
+
+    def __init__(self, client: "DaemonClient", name: str):
+        self.client = client
+        self.name = name
+        self.profiler = StoreProfiler()
+
+    def query(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        n_results: int = 5,
+        max_workers: Optional[int] = None,
+        where: Optional[Dict[str, Any]] = None,
+        subset: Optional[str] = None
+    ) -> List[List[Tuple[bytes, Optional[bytes], float]]]:
+        if len(embeddings) == 0:
+            return []
+        matrix = np.ascontiguousarray(embeddings, dtype=np.float64)
+        header = {"op": "query", "store": self.name, "dim": matrix.shape[1], "n_results": n_results,
+                  "max_workers": max_workers, "where": where, "subset": subset}
+        with self.profiler.timer("daemon_call", len(matrix)):
+            reply, out = self.client.call(header, [matrix.tobytes()])
+        self.profiler.record("daemon_query", reply["seconds"], len(matrix))
+        hits, pos = [], 0
+        for scores in reply["scores"]:
+            row = []
+            for score in scores:
+                row.append((out[pos], out[pos + 1] or None, score))
+                pos += 2
+            hits.append(row)
+        return hits
+
+    def get_all_ids(self, subset: Optional[str] = None) -> List[bytes]:
+        return self.client.call({"op": "ids", "store": self.name, "subset": subset})[1]
+
+    def count(self, subset: Optional[str] = None) -> int:
+        return self.client.call({"op": "count", "store": self.name, "subset": subset})[0]["count"]
+
+    def stats(self, reset: bool = False) -> dict:
+        """Daemon-side profile ("profile") and cache / autotune / memory stats of this store."""
+        reply, _ = self.client.call({"op": "stats", "store": self.name, "reset": reset})
+        reply.pop("ok", None)
+        return reply
+
+
+class DaemonClient:
+    """One connection to a SearchDaemon's Unix socket (calls are serialized)."""
+
+    def __init__(self, socket_path: str, timeout: float = 600.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.sock: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+
+    def call(self, header: Dict[str, Any], blobs: Sequence[bytes] = ()) -> Tuple[Dict[str, Any], List[bytes]]:
+        with self._lock:
+            try:
+                if self.sock is None:
+                    self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                    self.sock.settimeout(self.timeout)
+                    self.sock.connect(self.socket_path)
+                send_message(self.sock, header, blobs)
+                reply, out, _ = recv_message(self.sock)
+            except (OSError, ConnectionError, ValueError) as e:
+                self.close()
+                raise DaemonError(f"daemon {self.socket_path}: {e}") from e
+        if not reply.get("ok"):
+            raise DaemonError(f"daemon {self.socket_path}: {reply.get('error')}")
+        return reply, out
+
+    def health(self) -> Dict[str, Any]:
+        return self.call({"op": "health"})[0]
+
+    def store(self, name: str) -> RemoteStore:
+        return RemoteStore(self, name)
+
+    def reload(self):
+        self.call({"op": "reload"})
+
+    def shutdown(self):
+        self.call({"op": "shutdown"})
+        self.close()
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            finally:
+                self.sock = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,548 @@
+import os
+import json
+import time
+import heapq
+import socket
+import struct
+import logging
+import sqlite3
+import threading
+import socketserver
+import multiprocessing as mp
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import tenseal as ts
+
+from .metrics import StoreProfiler, NullProfiler
+from .plain_corpus import slot_count
+from .query_batch import EncryptedQueryBatch, context_fingerprint, encrypt_batch
+
+logger = logging.getLogger(__name__)
+
+Address = Union[str, Tuple[str, int]]
+
+# ── Wire format ───────────────────────────────
+# frame = !I header length | JSON header | blobs (sizes listed in header["blobs"])
+_LEN = struct.Struct("!I")
+MAX_HEADER_BYTES = 16 * 1024 * 1024
+
+
+class WorkerError(RuntimeError):
+    """A worker was unreachable or answered with an error."""
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        k = sock.recv_into(view[got:], n - got)
+        if k == 0:
+            raise ConnectionError("connection closed")
+        got += k
+    return bytes(buf)
+
+
+def send_message(sock: socket.socket, header: Dict[str, Any], blobs: Sequence[bytes] = ()) -> int:
+    """Send one frame; returns the number of bytes written."""
+    raw = json.dumps(dict(header, blobs=[len(b) for b in blobs])).encode("utf-8")
+    sock.sendall(_LEN.pack(len(raw)) + raw)
+    for b in blobs:
+        sock.sendall(b)
+    return _LEN.size + len(raw) + sum(len(b) for b in blobs)
+
+
+def recv_message(sock: socket.socket) -> Tuple[Dict[str, Any], List[bytes], int]:
+    """Receive one frame → (header, blobs, bytes read)."""
+    (size,) = _LEN.unpack(_recv_exact(sock, _LEN.size))
+    if size > MAX_HEADER_BYTES:
+        raise ConnectionError(f"header too large: {size} bytes")
+    header = json.loads(_recv_exact(sock, size))
+    blobs = [_recv_exact(sock, n) for n in header.pop("blobs", [])]
+    return header, blobs, _LEN.size + size + sum(len(b) for b in blobs)
+
+
+def parse_address(addr: Address) -> Tuple[str, int]:
+    """'host:port' or (host, port) → (host, port)."""
+    if isinstance(addr, str):
+        host, _, port = addr.rpartition(":")
+        return host or "127.0.0.1", int(port)
+    return addr[0], int(addr[1])
+
+
+# ── Partitioning / keys ───────────────────────
+
+def partition_store(db_path: str, out_dir: str, n_parts: int, batch_size: int = 1000) -> List[str]:
+    """
+    Split the `vectors` table of an HEVectorStore DB round-robin into
+    `n_parts` worker DBs (part_000.db, ...). Ciphertexts are copied as-is.
+    """
+    if n_parts < 1:
+        raise ValueError(f"n_parts must be >= 1, got {n_parts}")
+    if not db_path.endswith(".db"):
+        db_path = os.path.join(db_path, "he_vector_store.db")
+    os.makedirs(out_dir, exist_ok=True)
+
+    paths = [os.path.join(out_dir, f"part_{i:03d}.db") for i in range(n_parts)]
+    outs = []
+    for path in paths:
+        for ext in ("", "-wal", "-shm"):
+            if os.path.exists(path + ext):
+                os.remove(path + ext)
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE vectors (id BLOB PRIMARY KEY, ciphertext BLOB NOT NULL, text_enc BLOB)")
+        outs.append(conn)
+
+    src = sqlite3.connect(db_path)
+    cur = src.execute("SELECT id, ciphertext, text_enc FROM vectors ORDER BY rowid")
+    n = 0
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            break
+        for i, conn in enumerate(outs):
+            part = rows[(i - n) % n_parts::n_parts]
+            conn.executemany("INSERT INTO vectors (id, ciphertext, text_enc) VALUES (?, ?, ?)", part)
+        n += len(rows)
+    src.close()
+    for conn in outs:
+        conn.commit()
+        conn.close()
+    logger.info("[partition] %d rows → %d parts in %s", n, n_parts, out_dir)
+    return paths
+
+
+def write_public_context(secret_context_path: str, out_path: str) -> str:
+    """Write the public evaluation context (relin/galois keys, no secret key) for workers."""
+    with open(secret_context_path, "rb") as f:
+        ctx = ts.context_from(f.read())
+    ctx.make_context_public()
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with open(out_path, "wb") as f:
+        f.write(ctx.serialize())
+    return out_path
+
+
+# ── Worker ────────────────────────────────────
+
+class QueryWorker:
+    """
+    Owns one partition (a `vectors` table) and scores broadcast encrypted queries.
+
+    ops:
+      health : {"docs", "public", "uptime", "queries"}
+      query  : mode "scores" → per query, encrypted score blocks (one ciphertext
+               per `slot_count` documents, packed with CKKSVector.pack_vectors);
+               mode "topk"   → partial top-k (needs a secret-key context)
+      fetch  : encrypted (id, text) of the given partition indices
+    Every query reply carries the worker-side timing of each stage.
+    """
+
+    def __init__(self, db_path: str, context_path: str, partition: Optional[str] = None):
+        with open(context_path, "rb") as f:
+            self.context = ts.context_from(f.read())
+        self.public = not self.context.is_private()
+        self.block = slot_count(self.context)
+        self.partition = partition or os.path.basename(db_path)
+
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute("SELECT id, ciphertext, text_enc FROM vectors ORDER BY rowid").fetchall()
+        conn.close()
+        self.ids = [r[0] for r in rows]
+        self.blobs = [r[1] for r in rows]
+        self.texts = [r[2] for r in rows]
+        self.started = time.time()
+        self.queries = 0
+        self._lock = threading.Lock()  # TenSEAL holds the GIL → one query at a time
+
+    def handle(self, header: Dict[str, Any], blobs: List[bytes]) -> Tuple[Dict[str, Any], List[bytes]]:
+        op = header.get("op")
+        if op == "health":
+            return {"ok": True, "partition": self.partition, "docs": len(self.ids), "public": self.public,
+                    "uptime": time.time() - self.started, "queries": self.queries}, []
+        if op == "query":
+            with self._lock:
+                return self._query(blobs, header.get("mode", "scores"), int(header.get("n_results", 5)))
+        if op == "fetch":
+            out = []
+            for i in header["indices"]:
+                out += [self.ids[i], self.texts[i] or b""]
+            return {"ok": True}, out
+        return {"ok": False, "error": f"unknown op {op!r}"}, []
+
+    def _query(self, blobs: List[bytes], mode: str, n_results: int):
+        if mode not in ("scores", "topk"):
+            return {"ok": False, "error": f"unknown mode {mode!r}"}, []
+        if mode == "topk" and self.public:
+            return {"ok": False, "error": "topk mode needs a secret-key context; use mode='scores'"}, []
+        timing = {"load": 0.0, "dot": 0.0, "pack": 0.0, "decrypt": 0.0, "serialize": 0.0}
+        perf = time.perf_counter
+        t_start = perf()
+
+        t0 = perf()
+        enc_queries = [ts.ckks_vector_from(self.context, b) for b in blobs]
+        timing["load"] += perf() - t0
+
+        # one pass over the partition in `block`-sized chunks; each chunk's dot
+        # ciphertexts are packed / decrypted right away, so at most one chunk of
+        # per-document results (not the whole partition's) is alive at a time
+        packed_blobs: List[List[bytes]] = [[] for _ in enc_queries]
+        counts: List[List[int]] = [[] for _ in enc_queries]
+        scores: List[List[float]] = [[] for _ in enc_queries]
+        for start in range(0, len(self.blobs), self.block):
+            dots: List[List[Any]] = [[] for _ in enc_queries]
+            for blob in self.blobs[start:start + self.block]:
+                t0 = perf()
+                vec = ts.ckks_vector_from(self.context, blob)
+                t1 = perf()
+                for qi, enc_q in enumerate(enc_queries):
+                    dots[qi].append(enc_q.dot(vec))
+                timing["load"] += t1 - t0
+                timing["dot"] += perf() - t1
+            for qi, part in enumerate(dots):
+                if mode == "scores":
+                    t0 = perf()
+                    packed = ts.CKKSVector.pack_vectors(part)
+                    t1 = perf()
+                    packed_blobs[qi].append(packed.serialize())
+                    timing["pack"] += t1 - t0
+                    timing["serialize"] += perf() - t1
+                    counts[qi].append(len(part))
+                else:
+                    t0 = perf()
+                    scores[qi].extend(d.decrypt()[0] for d in part)
+                    timing["decrypt"] += perf() - t0
+            del dots
+
+        header: Dict[str, Any] = {"ok": True, "docs": len(self.blobs)}
+        out: List[bytes] = []
+        if mode == "scores":
+            for q_blobs in packed_blobs:
+                out += q_blobs
+            header["blocks"] = counts
+        else:
+            hits = []
+            for q_scores in scores:
+                top = heapq.nlargest(n_results, range(len(q_scores)), key=q_scores.__getitem__)
+                hits.append([[i, q_scores[i]] for i in top])
+                for i in top:
+                    out += [self.ids[i], self.texts[i] or b""]
+            header["hits"] = hits
+
+        timing["total"] = perf() - t_start
+        header["timing"] = timing
+        self.queries += len(enc_queries)
+        return header, out
+
+
+class _WorkerHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        sock = self.request
+        worker: QueryWorker = self.server.worker
+        while True:
+            try:
+                header, blobs, _ = recv_message(sock)
+            except (ConnectionError, OSError):
+                return
+            if header.get("op") == "shutdown":
+                send_message(sock, {"ok": True})
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+            try:
+                reply, out = worker.handle(header, blobs)
+            except Exception as e:  # 워커는 죽지 않고 에러를 돌려준다
+                logger.exception("[worker] %s failed", header.get("op"))
+                reply, out = {"ok": False, "error": f"{type(e).__name__}: {e}"}, []
+            send_message(sock, reply, out)
+
+
+class WorkerServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, worker: QueryWorker, host: str = "127.0.0.1", port: int = 0):
+        self.worker = worker
+        super().__init__((host, port), _WorkerHandler)
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.server_address[:2]
+
+
+def serve_worker(db_path: str, context_path: str, host: str = "127.0.0.1", port: int = 0, ready=None):
+    """Load the partition and serve until a 'shutdown' message; `ready` (a queue) receives the bound port."""
+    server = WorkerServer(QueryWorker(db_path, context_path), host, port)
+    logger.info("[worker] %s serving %d docs on %s:%d", db_path, len(server.worker.ids), *server.address)
+    if ready is not None:
+        ready.put(server.address[1])
+    with server:
+        server.serve_forever()
+
+
+# ── Coordinator ───────────────────────────────
+
+class _Connection:
+    def __init__(self, address: Tuple[str, int], timeout: float):
+        self.address = address
+        self.timeout = timeout
+        self.sock: Optional[socket.socket] = None
+        self.lock = threading.Lock()
+
+    def call(self, header: Dict[str, Any], blobs: Sequence[bytes] = ()) -> Tuple[Dict[str, Any], List[bytes], dict]:
+        with self.lock:
+            try:
+                if self.sock is None:
+                    self.sock = socket.create_connection(self.address, timeout=self.timeout)
+                    self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                t0 = time.perf_counter()
+                sent = send_message(self.sock, header, blobs)
+                reply, out, received = recv_message(self.sock)
+                rtt = time.perf_counter() - t0
+            except (OSError, ConnectionError, ValueError) as e:
+                self.close()
+                raise WorkerError(f"worker {self.address[0]}:{self.address[1]}: {e}") from e
+        if not reply.get("ok"):
+            raise WorkerError(f"worker {self.address[0]}:{self.address[1]}: {reply.get('error')}")
+        return reply, out, {"rtt": rtt, "bytes_sent": sent, "bytes_received": received}
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            finally:
+                self.sock = None
+
+
+class QueryCoordinator:
+    """
+    Broadcasts encrypted query batches to every worker, gathers encrypted score
+    blocks (or partial top-k) and merges them into the global top-k.
+
+    `query` returns the same (enc_id, enc_text, score) tuples as HEVectorStore.query.
+    `last_timings` holds, per worker, round-trip time, bytes on the wire and the
+    worker-side stage timings of the most recent query.
+    """
+
+    def __init__(self,
+                 workers: Sequence[Address],
+                 context_path: str,
+                 timeout: float = 600.0,
+                 profiler: Optional[StoreProfiler] = None):
+        if not workers:
+            raise ValueError("at least one worker address is required")
+        with open(context_path, "rb") as f:
+            ctx_bytes = f.read()
+        self.context = ts.context_from(ctx_bytes)
+        self.context_id = context_fingerprint(ctx_bytes)
+        if not self.context.is_private():
+            raise ValueError("coordinator needs the secret-key context to decrypt scores")
+        self.profiler = profiler or NullProfiler()
+        self.workers = [_Connection(parse_address(a), timeout) for a in workers]
+        self.last_timings: List[Dict[str, Any]] = []
+        self._pool = ThreadPoolExecutor(max_workers=len(self.workers))
+
+    def _broadcast(self, header: Dict[str, Any], blobs: Sequence[bytes] = (), raise_errors: bool = True):
+        futures = [self._pool.submit(w.call, header, blobs) for w in self.workers]
+        results = []
+        for fut in futures:
+            try:
+                results.append(fut.result())
+            except WorkerError as e:
+                if raise_errors:
+                    raise
+                results.append(e)
+        return results
+
+    def health(self) -> List[Dict[str, Any]]:
+        """Ping every worker; unreachable workers are reported with ok=False instead of raising."""
+        report = []
+        for w, res in zip(self.workers, self._broadcast({"op": "health"}, raise_errors=False)):
+            entry = {"worker": "%s:%d" % w.address}
+            if isinstance(res, WorkerError):
+                entry.update(ok=False, error=str(res))
+            else:
+                reply, _, wire = res
+                entry.update(reply, latency=wire["rtt"])
+            report.append(entry)
+        return report
+
+    def query(
+        self,
+        embeddings: Union[Sequence[Sequence[float]], EncryptedQueryBatch],
+        n_results: int = 5,
+        mode: str = "scores"
+    ) -> List[List[Tuple[bytes, bytes, float]]]:
+        """`embeddings` may be an EncryptedQueryBatch (e.g. from HEVectorStore.encrypt_queries) to skip encryption."""
+        if len(embeddings) == 0:
+            return []
+        prof = self.profiler
+
+        if not isinstance(embeddings, EncryptedQueryBatch):
+            embeddings = encrypt_batch(self.context, self.context_id, embeddings, profiler=prof)
+        embeddings.check_context(self.context_id, "the coordinator")
+        with prof.timer("serialize_query", len(embeddings)):
+            blobs = embeddings.serialized()
+
+        with prof.timer("broadcast", len(self.workers)):
+            replies = self._broadcast({"op": "query", "mode": mode, "n_results": n_results}, blobs)
+        self.last_timings = [
+            dict(wire, worker="%s:%d" % w.address, docs=reply["docs"], **reply["timing"])
+            for w, (reply, _, wire) in zip(self.workers, replies)
+        ]
+
+        if mode == "topk":
+            results = self._merge_topk(replies, len(embeddings), n_results)
+        else:
+            results = self._merge_scores(replies, len(embeddings), n_results)
+        prof.incr("queries", len(embeddings))
+        prof.incr("docs_scanned", sum(reply["docs"] for reply, _, _ in replies))
+        return results
+
+    def _merge_topk(self, replies, n_queries: int, n_results: int):
+        with self.profiler.timer("topk_merge", n_queries):
+            merged = [[] for _ in range(n_queries)]
+            for reply, out, _ in replies:
+                pos = 0
+                for qi, hits in enumerate(reply["hits"]):
+                    for _, score in hits:
+                        merged[qi].append((out[pos], out[pos + 1], float(score)))
+                        pos += 2
+            return [sorted(hits, key=lambda x: -x[2])[:n_results] for hits in merged]
+
+    def _merge_scores(self, replies, n_queries: int, n_results: int):
+        prof = self.profiler
+        # 1) decrypt score blocks → (score, worker, index) candidates per query
+        t_dec = 0.0
+        candidates = [[] for _ in range(n_queries)]
+        for wi, (reply, out, _) in enumerate(replies):
+            pos = 0
+            for qi, counts in enumerate(reply["blocks"]):
+                offset = 0
+                scores = []
+                for count in counts:
+                    t0 = time.perf_counter()
+                    scores.append(np.asarray(ts.ckks_vector_from(self.context, out[pos]).decrypt()[:count]))
+                    t_dec += time.perf_counter() - t0
+                    pos += 1
+                    offset += count
+                if not scores:
+                    continue
+                scores = np.concatenate(scores)
+                k = min(n_results, len(scores))
+                top = np.argpartition(-scores, k - 1)[:k]
+                candidates[qi].extend((float(scores[i]), wi, int(i)) for i in top)
+        prof.record("decrypt", t_dec, sum(len(out) for _, out, _ in replies))
+
+        # 2) global top-k, then fetch encrypted id/text from the owning workers
+        with prof.timer("topk_merge", n_queries):
+            winners = [sorted(c, key=lambda x: -x[0])[:n_results] for c in candidates]
+            wanted: Dict[int, List[int]] = {}
+            for hits in winners:
+                for _, wi, idx in hits:
+                    wanted.setdefault(wi, []).append(idx)
+
+        rows: Dict[Tuple[int, int], Tuple[bytes, bytes]] = {}
+        with prof.timer("fetch_rows", len(wanted)):
+            futures = {wi: self._pool.submit(self.workers[wi].call, {"op": "fetch", "indices": idxs})
+                       for wi, idxs in wanted.items()}
+            for wi, fut in futures.items():
+                _, out, _ = fut.result()
+                for j, idx in enumerate(wanted[wi]):
+                    rows[(wi, idx)] = (out[2 * j], out[2 * j + 1])
+        return [[(*rows[(wi, idx)], score) for score, wi, idx in hits] for hits in winners]
+
+    def shutdown_workers(self):
+        """Ask every worker process to exit (errors from already-dead workers are ignored)."""
+        self._broadcast({"op": "shutdown"}, raise_errors=False)
+        self.close()
+
+    def close(self):
+        for w in self.workers:
+            w.close()
+        self._pool.shutdown(wait=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ── Local stand-in cluster ────────────────────
+
+class LocalCluster:
+    """
+    Start one worker process per partition on localhost (ephemeral ports), for
+    tests and single-machine runs. Production workers are started with
+    `python -m he_vector_db.distributed --db part.db --context ckks_context.pk --port N`
+    on each node and the coordinator is given their host:port list.
+    """
+
+    def __init__(self, db_paths: Sequence[str], context_path: str, host: str = "127.0.0.1",
+                 start_timeout: float = 300.0):
+        self.db_paths = list(db_paths)
+        self.context_path = context_path
+        self.host = host
+        self.start_timeout = start_timeout
+        self.processes: List[mp.Process] = []
+        self.addresses: List[Tuple[str, int]] = []
+
+    def start(self) -> "LocalCluster":
+        ctx = mp.get_context("spawn")
+        queues = []
+        for path in self.db_paths:
+            q = ctx.Queue()
+            p = ctx.Process(target=serve_worker, args=(path, self.context_path, self.host, 0, q), daemon=True)
+            p.start()
+            self.processes.append(p)
+            queues.append(q)
+        for p, q in zip(self.processes, queues):
+            try:
+                self.addresses.append((self.host, q.get(timeout=self.start_timeout)))
+            except Exception as e:
+                self.stop()
+                raise WorkerError(f"worker process {p.pid} did not start") from e
+        return self
+
+    def stop(self):
+        for addr in self.addresses:
+            try:
+                with socket.create_connection(addr, timeout=5) as sock:
+                    send_message(sock, {"op": "shutdown"})
+                    recv_message(sock)
+            except (OSError, ConnectionError):
+                pass
+        for p in self.processes:
+            p.join(timeout=10)
+            if p.is_alive():
+                p.terminate()
+        self.processes, self.addresses = [], []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve one HE vector partition to a QueryCoordinator")
+    parser.add_argument("--db", required=True, help="partition DB (see partition_store)")
+    parser.add_argument("--context", required=True, help="public (or secret) CKKS context")
+    # 기본은 loopback 만: 다른 호스트의 coordinator 가 붙어야 할 때만 --host 0.0.0.0 등으로 연다.
+    # 프로토콜에는 인증/암호화가 없으므로 (점수는 CKKS 로 암호화돼 있어도 파티션의 암호문과
+    # 암호화된 id/text 를 누구나 fetch 할 수 있다) 신뢰할 수 있는 네트워크에서만 노출할 것
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="interface to listen on (default: loopback only; the protocol is unauthenticated)")
+    parser.add_argument("--port", type=int, default=7700)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    serve_worker(args.db, args.context, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class EmbeddingClient:
+    """
+    Minimal interface of an embedding backend: one request embeds a batch of texts.
+    Implementations must be safe to call from several threads at once.
+    """
+
+    model: str = ""
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+
+class OllamaEmbeddingClient(EmbeddingClient):
+    """Batched requests through `ollama.Client.embed` (ollama>=0.5)."""
+
+    def __init__(self, model: str, host: Optional[str] = None):
+        import ollama  # optional dependency, only needed for this backend
+
+        self.model = model
+        self.client = ollama.Client(host=host) if host else ollama.Client()
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        resp = self.client.embed(model=self.model, input=list(texts))
+        return list(resp["embeddings"])
+
+
+class StubEmbeddingClient(EmbeddingClient):
+    """
+    Deterministic local stand-in: the vector of a text is derived from its hash,
+    so identical texts always embed identically. Useful for tests and dry runs.
+    """
+
+    def __init__(self, dim: int = 1024, model: str = "stub", delay: float = 0.0):
+        self.model = model
+        self.dim = dim
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        with self._lock:
+            self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        out = []
+        for t in texts:
+            seed = int.from_bytes(hashlib.sha256(t.encode("utf-8")).digest()[:8], "little")
+            out.append(np.random.default_rng(seed).standard_normal(self.dim).tolist())
+        return out
+
+
+def make_client(backend: str, model: str, **kwargs) -> EmbeddingClient:
+    """Factory for the `experiment.embed_backend` config value."""
+    if backend == "ollama":
+        return OllamaEmbeddingClient(model, host=kwargs.get("host"))
+    if backend == "stub":
+        return StubEmbeddingClient(dim=kwargs.get("dim", 1024), model=model)
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+
+def content_hash(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """
+    Persistent SQLite cache of float32 embeddings keyed by (model, sha256(content)).
+    Shared by every sample size, so overlapping documents are embedded only once.
+    """
+
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        cur = self.conn.cursor()
+        cur.execute('''
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                content_hash BLOB NOT NULL,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, content_hash)
+            )
+        ''')
+        cur.execute('PRAGMA journal_mode = WAL;')
+        cur.execute('PRAGMA synchronous = NORMAL;')
+        self.conn.commit()
+
+    def get_many(self, model: str, hashes: Sequence[bytes]) -> Dict[bytes, np.ndarray]:
+        found = {}
+        with self._lock:
+            cur = self.conn.cursor()
+            # SQLite 변수 개수 제한(999) 때문에 나눠서 조회
+            for i in range(0, len(hashes), 500):
+                part = list(hashes[i:i + 500])
+                marks = ",".join("?" * len(part))
+                cur.execute(
+                    f"SELECT content_hash, vector FROM embeddings WHERE model = ? AND content_hash IN ({marks})",
+                    [model] + part
+                )
+                for h, blob in cur.fetchall():
+                    found[bytes(h)] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, model: str, items: Iterable[Tuple[bytes, Sequence[float]]]):
+        rows = []
+        for h, vec in items:
+            arr = np.asarray(vec, dtype=np.float32)
+            rows.append((model, h, len(arr), arr.tobytes()))
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, content_hash, dim, vector) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self.conn.commit()
+
+    def count(self, model: Optional[str] = None) -> int:
+        with self._lock:
+            cur = self.conn.cursor()
+            if model is None:
+                cur.execute("SELECT COUNT(*) FROM embeddings")
+            else:
+                cur.execute("SELECT COUNT(*) FROM embeddings WHERE model = ?", (model,))
+            return cur.fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def embed_texts(
+    texts: Sequence[str],
+    client: EmbeddingClient,
+    cache: Optional[EmbeddingCache] = None,
+    batch_size: int = 32,
+    max_workers: int = 4,
+    on_batch: Optional[Callable[[int], None]] = None,
+) -> Tuple[np.ndarray, dict]:
+    """
+    Embed `texts` and return (float32 matrix [len(texts), dim], stats).
+
+    Cached texts are served from `cache`; the remaining unique texts are split into
+    `batch_size` requests sent concurrently by `max_workers` threads, and every
+    finished batch is written back to the cache immediately (so an interrupted run
+    keeps its progress). `on_batch(n)` is called after each finished request.
+    """
+    t_start = time.perf_counter()
+    hashes = [content_hash(t) for t in texts]
+    vectors: Dict[bytes, np.ndarray] = cache.get_many(client.model, list(set(hashes))) if cache else {}
+    hits = sum(1 for h in hashes if h in vectors)
+
+    # 중복 텍스트는 한 번만 요청
+    pending: Dict[bytes, str] = {}
+    for h, t in zip(hashes, texts):
+        if h not in vectors and h not in pending:
+            pending[h] = t
+    todo = list(pending.items())
+    batches = [todo[i:i + batch_size] for i in range(0, len(todo), batch_size)]
+
+    def run(batch):
+        t0 = time.perf_counter()
+        embs = client.embed([t for _, t in batch])
+        if len(embs) != len(batch):
+            raise RuntimeError(f"Embedding backend returned {len(embs)} vectors for {len(batch)} texts")
+        return batch, embs, time.perf_counter() - t0
+
+    request_time = 0.0
+    if batches:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as ex:
+            futures = [ex.submit(run, b) for b in batches]
+            for fut in as_completed(futures):
+                batch, embs, elapsed = fut.result()
+                request_time += elapsed
+                for (h, _), e in zip(batch, embs):
+                    vectors[h] = np.asarray(e, dtype=np.float32)
+                if cache:
+                    cache.put_many(client.model, [(h, e) for (h, _), e in zip(batch, embs)])
+                if on_batch:
+                    on_batch(len(batch))
+
+    if texts:
+        matrix = np.vstack([vectors[h] for h in hashes]).astype(np.float32, copy=False)
+    else:
+        matrix = np.empty((0, 0), dtype=np.float32)
+    stats = {
+        "texts": len(texts),
+        "cache_hits": hits,
+        "embedded": len(todo),
+        "requests": len(batches),
+        "request_time": request_time,
+        "wall_time": time.perf_counter() - t_start,
+    }
+    return matrix, stats
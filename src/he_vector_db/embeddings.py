@@ -0,0 +1,220 @@
+"""
+Binary embedding store format (one directory per embedding set):
+
+    manifest.json        format version, count, dim, dtype, model, extra info
+    embeddings.npy       float32 [count, dim] matrix (np.load(..., mmap_mode="r"))
+    ids.bin / ids.idx.npy              UTF-8 ids, concatenated + int64 offsets [count + 1]
+    contents.bin / contents.idx.npy    UTF-8 contents, same layout
+
+Everything is memory-mapped on read, so opening a 100k set costs only the manifest
+parse and rows are paged in as they are sliced.
+"""
+
+import os
+import json
+import time
+import shutil
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+MATRIX_FILE = "embeddings.npy"
+_COLUMNS = ("ids", "contents")
+
+
+class StringColumn:
+    """Read-only, memory-mapped sequence of UTF-8 strings."""
+
+    def __init__(self, data_path: str, index_path: str):
+        self.offsets = np.load(index_path, mmap_mode="r")
+        size = os.path.getsize(data_path)
+        # np.memmap refuses empty files
+        self.data = np.memmap(data_path, dtype=np.uint8, mode="r") if size else np.empty(0, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def _get(self, i: int) -> str:
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(key, slice):
+            return [self._get(i) for i in range(*key.indices(len(self)))]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError(key)
+        return self._get(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self._get(i)
+
+
+class EmbeddingStore:
+    """
+    Reader for the binary embedding format.
+
+    - `matrix`   : float32 memmap [count, dim] (zero-copy slices)
+    - `ids`      : StringColumn of document / query ids
+    - `contents` : StringColumn of document text (or query text)
+    """
+
+    def __init__(self, path: str):
+        manifest_path = os.path.join(path, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            raise FileNotFoundError(f"{manifest_path} not found.")
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported embedding store version: {self.manifest.get('format_version')}")
+        self.path = path
+        self.matrix = np.load(os.path.join(path, MATRIX_FILE), mmap_mode="r")
+        self.ids = StringColumn(os.path.join(path, "ids.bin"), os.path.join(path, "ids.idx.npy"))
+        self.contents = StringColumn(os.path.join(path, "contents.bin"), os.path.join(path, "contents.idx.npy"))
+        if not (len(self.matrix) == len(self.ids) == len(self.contents) == self.manifest["count"]):
+            raise ValueError(f"Corrupt embedding store at {path}: column lengths differ")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dim(self) -> int:
+        return int(self.manifest["dim"])
+
+    def iter_batches(
+        self,
+        batch_size: int = 1000,
+        start: int = 0,
+        stop: Optional[int] = None
+    ) -> Iterator[Tuple[List[str], List[str], np.ndarray]]:
+        """Yield (ids, contents, matrix view) for rows [start, stop) in `batch_size` slices."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        for i in range(start, stop, batch_size):
+            j = min(i + batch_size, stop)
+            yield self.ids[i:j], self.contents[i:j], self.matrix[i:j]
+
+
+class EmbeddingStoreWriter:
+    """
+    Streaming writer: rows are appended to a raw float32 file and the .npy matrix
+    is assembled on close(), so memory stays bounded by a single batch.
+    The directory is written under `<path>.tmp` and renamed into place on close().
+    """
+
+    def __init__(self, path: str, model: Optional[str] = None, extra: Optional[dict] = None):
+        self.path = path.rstrip(os.sep)
+        self.tmp_path = self.path + ".tmp"
+        self.model = model
+        self.extra = dict(extra or {})
+        self.dim: Optional[int] = None
+        self.count = 0
+        if os.path.exists(self.tmp_path):
+            shutil.rmtree(self.tmp_path)
+        os.makedirs(self.tmp_path)
+        self._raw = open(os.path.join(self.tmp_path, "embeddings.f32"), "wb")
+        self._str = {c: open(os.path.join(self.tmp_path, f"{c}.bin"), "wb") for c in _COLUMNS}
+        self._offsets = {c: [0] for c in _COLUMNS}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def append(self, doc_id: str, embedding: Sequence[float], content: str = ""):
+        self.append_batch([doc_id], [embedding], [content])
+
+    def append_batch(self, ids: Sequence[str], embeddings, contents: Optional[Sequence[str]] = None):
+        if len(ids) == 0:
+            return
+        mat = np.asarray(embeddings, dtype=np.float32)
+        if mat.ndim != 2 or len(mat) != len(ids):
+            raise ValueError(f"Expected {len(ids)} embeddings, got array of shape {mat.shape}")
+        if self.dim is None:
+            self.dim = mat.shape[1]
+        elif mat.shape[1] != self.dim:
+            raise ValueError(f"Embedding dim mismatch: {mat.shape[1]} != {self.dim}")
+        contents = contents if contents is not None else [""] * len(ids)
+        self._raw.write(np.ascontiguousarray(mat).tobytes())
+        for col, values in (("ids", ids), ("contents", contents)):
+            fh, offs = self._str[col], self._offsets[col]
+            for v in values:
+                b = (v or "").encode("utf-8")
+                fh.write(b)
+                offs.append(offs[-1] + len(b))
+        self.count += len(ids)
+
+    def abort(self):
+        self._raw.close()
+        for fh in self._str.values():
+            fh.close()
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+
+    def close(self):
+        self._raw.close()
+        for fh in self._str.values():
+            fh.close()
+        dim = self.dim or 0
+        raw_path = os.path.join(self.tmp_path, "embeddings.f32")
+        with open(os.path.join(self.tmp_path, MATRIX_FILE), "wb") as out, open(raw_path, "rb") as raw:
+            np.lib.format.write_array_header_1_0(
+                out, {"descr": "<f4", "fortran_order": False, "shape": (self.count, dim)}
+            )
+            shutil.copyfileobj(raw, out, length=16 << 20)
+        os.remove(raw_path)
+        for col in _COLUMNS:
+            np.save(os.path.join(self.tmp_path, f"{col}.idx.npy"), np.asarray(self._offsets[col], dtype=np.int64))
+
+        manifest = {
+            "format_version": FORMAT_VERSION,
+            "count": self.count,
+            "dim": dim,
+            "dtype": "float32",
+            "model": self.model,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime()),
+            "files": [MATRIX_FILE] + [f"{c}.bin" for c in _COLUMNS] + [f"{c}.idx.npy" for c in _COLUMNS],
+            "extra": self.extra,
+        }
+        with open(os.path.join(self.tmp_path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        if os.path.exists(self.path):
+            shutil.rmtree(self.path)
+        os.replace(self.tmp_path, self.path)
+
+
+def convert_json(json_path: str, out_path: str, batch_size: int = 1000) -> EmbeddingStore:
+    """
+    Convert a legacy `doc_embeddings_*.json` / `query_embeddings_*.json` list
+    ({"doc_id"|"query_id", "content"|"text", "embedding"}) into the binary format.
+    """
+    with open(json_path, "r", encoding="utf-8") as f:
+        records = json.load(f)
+    with EmbeddingStoreWriter(out_path, extra={"converted_from": os.path.basename(json_path)}) as w:
+        for i in range(0, len(records), batch_size):
+            batch = records[i:i + batch_size]
+            w.append_batch(
+                [str(r.get("doc_id", r.get("query_id"))) for r in batch],
+                [r["embedding"] for r in batch],
+                [r.get("content", r.get("text", "")) for r in batch],
+            )
+    return EmbeddingStore(out_path)
+
+
+def open_embeddings(path: str) -> EmbeddingStore:
+    """
+    Open the embedding store at `path`. If only the legacy `<path>.json` exists,
+    it is converted once and the binary store is returned.
+    """
+    if os.path.exists(os.path.join(path, MANIFEST_FILE)):
+        return EmbeddingStore(path)
+    legacy = path + ".json"
+    if os.path.exists(legacy):
+        return convert_json(legacy, path)
+    raise FileNotFoundError(f"No embedding store at {path} (or legacy {legacy})")
@@ -0,0 +1,153 @@
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class ExactSearch:
+    """
+    Brute-force cosine search over a (possibly memory-mapped) float32 matrix.
+
+    Document norms are computed once; each query batch is scored with one GEMM per
+    block of `block_rows` documents and merged into a running top-k, so the matrix
+    is never copied or normalised in memory.
+    """
+
+    def __init__(
+        self,
+        matrix: np.ndarray,
+        ids: Sequence[str],
+        contents: Optional[Sequence[str]] = None,
+        block_rows: int = 65536
+    ):
+        if len(matrix) != len(ids):
+            raise ValueError(f"{len(ids)} ids for a matrix of {len(matrix)} rows")
+        self.matrix = matrix
+        self.ids = ids
+        self.contents = contents
+        self.block_rows = block_rows
+        inv = np.empty(len(matrix), dtype=np.float32)
+        for i in range(0, len(matrix), block_rows):
+            n = np.linalg.norm(np.asarray(matrix[i:i + block_rows], dtype=np.float32), axis=1)
+            inv[i:i + block_rows] = np.divide(1.0, n, out=np.zeros_like(n), where=n > 0)
+        self.inv_norms = inv
+
+    @classmethod
+    def from_embedding_store(cls, store, limit: Optional[int] = None, **kwargs) -> "ExactSearch":
+        """Build from a he_vector_db.embeddings.EmbeddingStore (zero-copy), optionally first `limit` rows."""
+        stop = len(store) if limit is None else min(limit, len(store))
+        return cls(store.matrix[:stop], store.ids[0:stop], store.contents, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.matrix)
+
+    @staticmethod
+    def _normalize(queries) -> np.ndarray:
+        q = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        n = np.linalg.norm(q, axis=1, keepdims=True)
+        return np.divide(q, n, out=np.zeros_like(q), where=n > 0)
+
+    def search(self, queries, k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (scores [Q, k], row indices [Q, k]) sorted by descending cosine similarity."""
+        q = self._normalize(queries)
+        k = min(k, len(self))
+        best_s = np.full((len(q), 0), -np.inf, dtype=np.float32)
+        best_i = np.zeros((len(q), 0), dtype=np.int64)
+        for start in range(0, len(self), self.block_rows):
+            block = np.asarray(self.matrix[start:start + self.block_rows], dtype=np.float32)
+            scores = (q @ block.T) * self.inv_norms[start:start + len(block)]
+            cand_s = np.concatenate([best_s, scores], axis=1)
+            cand_i = np.concatenate(
+                [best_i, np.broadcast_to(np.arange(start, start + len(block)), scores.shape)], axis=1
+            )
+            if cand_s.shape[1] > k:
+                part = np.argpartition(-cand_s, k - 1, axis=1)[:, :k]
+                cand_s = np.take_along_axis(cand_s, part, axis=1)
+                cand_i = np.take_along_axis(cand_i, part, axis=1)
+            best_s, best_i = cand_s, cand_i
+        order = np.argsort(-best_s, axis=1, kind="stable")
+        return np.take_along_axis(best_s, order, axis=1), np.take_along_axis(best_i, order, axis=1)
+
+    def query(self, embeddings, n_results: int = 5) -> List[List[Tuple[str, str, float]]]:
+        """Same shape as HEVectorStore.query, with plaintext (doc_id, content, score)."""
+        if len(embeddings) == 0:
+            return []
+        scores, idx = self.search(embeddings, n_results)
+        out = []
+        for srow, irow in zip(scores, idx):
+            out.append([
+                (self.ids[i], self.contents[i] if self.contents is not None else "", float(s))
+                for s, i in zip(srow, irow)
+            ])
+        return out
+
+    def scores_for(self, query, rows: Sequence[int]) -> np.ndarray:
+        """Exact cosine scores of one query against the given row indices."""
+        q = self._normalize(query)[0]
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0:
+            return np.zeros(0, dtype=np.float32)
+        block = np.asarray(self.matrix[rows], dtype=np.float32)
+        return (block @ q) * self.inv_norms[rows]
+
+
+def compare_to_exact(
+    approx: Sequence[Sequence[Tuple[str, float]]],
+    exact: ExactSearch,
+    queries,
+    k: int = 5
+) -> dict:
+    """
+    Compare approximate (e.g. CKKS) rankings with the exact reference.
+
+    `approx[q]` is a list of (doc_id, score). Reports
+      - score error  : |approx score - exact score of the same doc| (max / mean)
+      - recall@k     : |approx top-k ∩ exact top-k| / k
+      - rank flips   : returned pairs whose order disagrees with the exact scores
+      - exact order  : fraction of queries whose top-k list is identical
+    """
+    index = {d: i for i, d in enumerate(exact.ids)}
+    _, ref_idx = exact.search(queries, k)
+    q = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+
+    errors, per_query = [], []
+    flips_total = 0
+    identical = 0
+    recalls = []
+    for qi, hits in enumerate(approx):
+        hits = list(hits)[:k]
+        ids = [d for d, _ in hits]
+        rows = [index[d] for d in ids if d in index]
+        true = exact.scores_for(q[qi], rows)
+        err = np.abs(np.array([s for d, s in hits if d in index], dtype=np.float64) - true)
+        errors.extend(err.tolist())
+
+        flips = 0
+        for a in range(len(true)):
+            for b in range(a + 1, len(true)):
+                if true[a] < true[b]:
+                    flips += 1
+        flips_total += flips
+
+        ref_ids = [exact.ids[i] for i in ref_idx[qi]]
+        recall = len(set(ids) & set(ref_ids)) / len(ref_ids) if len(ref_ids) else 0.0
+        recalls.append(recall)
+        identical += int(ids == ref_ids)
+        per_query.append({
+            "query": qi,
+            "max_abs_error": float(err.max()) if len(err) else 0.0,
+            "rank_flips": flips,
+            f"recall@{k}": recall,
+        })
+
+    n = max(len(approx), 1)
+    return {
+        "queries": len(approx),
+        "k": k,
+        "max_abs_score_error": float(max(errors)) if errors else 0.0,
+        "mean_abs_score_error": float(np.mean(errors)) if errors else 0.0,
+        "rank_flips": flips_total,
+        "rank_flips_per_query": flips_total / n,
+        f"recall@{k}": float(np.mean(recalls)) if recalls else 0.0,
+        "identical_topk_rate": identical / n,
+        "per_query": per_query,
+    }
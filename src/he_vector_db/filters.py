@@ -0,0 +1,124 @@
+import hmac
+import json
+import math
+import hashlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+RANGE_OPS = ("$gt", "$gte", "$lt", "$lte")
+
+
+def _canonical(value: Any) -> str:
+    """Stable text form of a metadata value (2020 and 2020.0 map to the same tag)."""
+    if isinstance(value, bool):
+        return json.dumps(value)
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+
+class BlindIndex:
+    """
+    Keyed deterministic tags for metadata pre-filtering.
+
+    Every (key, value) pair is stored as HMAC-SHA256(tag_key, key ‖ value), so the
+    server can match equal values without learning them. Keys listed in
+    `numeric_buckets` additionally get a plaintext bucket number
+    floor(value / width) for range filters; candidates from boundary buckets
+    are checked exactly against the Fernet-encrypted metadata afterwards.
+    """
+
+    def __init__(self, secret: bytes, numeric_buckets: Optional[Dict[str, float]] = None):
+        self._key = hashlib.sha256(b"he_vector_db/blind-tag\x00" + secret).digest()
+        self.numeric_buckets = dict(numeric_buckets or {})
+
+    def key_tag(self, key: str) -> bytes:
+        return hmac.new(self._key, b"k\x00" + key.encode("utf-8"), hashlib.sha256).digest()
+
+    def value_tag(self, key: str, value: Any) -> bytes:
+        msg = b"v\x00" + key.encode("utf-8") + b"\x00" + _canonical(value).encode("utf-8")
+        return hmac.new(self._key, msg, hashlib.sha256).digest()
+
+    def id_tag(self, doc_id: str) -> bytes:
+        """Deterministic tag of a document id (Fernet tokens are randomized, so they cannot dedupe)."""
+        return hmac.new(self._key, b"i\x00" + doc_id.encode("utf-8"), hashlib.sha256).digest()
+
+    def bucket(self, key: str, value: Any) -> Optional[int]:
+        width = self.numeric_buckets.get(key)
+        if width is None or isinstance(value, bool) or not isinstance(value, (int, float)):
+            return None
+        return int(math.floor(value / width))
+
+    def rows_for(self, metadata: Dict[str, Any]) -> Tuple[List[Tuple[bytes, bytes]], List[Tuple[bytes, int]]]:
+        """(value tags, numeric buckets) to index for one document's metadata."""
+        tags, buckets = [], []
+        for key, value in (metadata or {}).items():
+            values = value if isinstance(value, (list, tuple)) else [value]
+            for v in values:
+                tags.append((self.key_tag(key), self.value_tag(key, v)))
+                b = self.bucket(key, v)
+                if b is not None:
+                    buckets.append((self.key_tag(key), b))
+        return tags, buckets
+
+    def compile(self, where: Dict[str, Any]) -> Tuple[str, list, List[Tuple[str, Dict[str, Any]]]]:
+        """
+        Translate a filter into an SQL sub-select of candidate `vectors` rowids.
+
+        Supported: {"key": value}, {"key": {"$eq": v}}, {"key": {"$in": [...]}}
+        and, for bucketed numeric keys, {"key": {"$gte": a, "$lt": b, ...}}.
+        Several keys are combined with AND. Returns (sql, params, range_checks);
+        range_checks must be verified on the decrypted metadata of the candidates.
+        """
+        if not where:
+            raise ValueError("Empty filter")
+        parts, params, checks = [], [], []
+        for key, cond in where.items():
+            if not isinstance(cond, dict):
+                cond = {"$eq": cond}
+            unknown = set(cond) - {"$eq", "$in", *RANGE_OPS}
+            if unknown:
+                raise ValueError(f"Unsupported filter operator(s) for {key!r}: {sorted(unknown)}")
+
+            if "$eq" in cond or "$in" in cond:
+                values = [cond["$eq"]] if "$eq" in cond else list(cond["$in"])
+                if not values:
+                    return "SELECT doc_rowid FROM vector_tags WHERE 0", [], []
+                marks = ",".join("?" * len(values))
+                parts.append(f"SELECT doc_rowid FROM vector_tags WHERE key_tag = ? AND value_tag IN ({marks})")
+                params += [self.key_tag(key)] + [self.value_tag(key, v) for v in values]
+
+            ranges = {op: cond[op] for op in RANGE_OPS if op in cond}
+            if ranges:
+                if key not in self.numeric_buckets:
+                    raise ValueError(f"Range filter on {key!r} needs numeric_buckets[{key!r}]")
+                lo = [self.bucket(key, v) for op, v in ranges.items() if op in ("$gt", "$gte")]
+                hi = [self.bucket(key, v) for op, v in ranges.items() if op in ("$lt", "$lte")]
+                sql = "SELECT doc_rowid FROM vector_buckets WHERE key_tag = ?"
+                params.append(self.key_tag(key))
+                if lo:
+                    sql += " AND bucket >= ?"
+                    params.append(max(lo))
+                if hi:
+                    sql += " AND bucket <= ?"
+                    params.append(min(hi))
+                parts.append(sql)
+                checks.append((key, ranges))
+        return " INTERSECT ".join(parts), params, checks
+
+
+def matches_ranges(metadata: Dict[str, Any], checks: Sequence[Tuple[str, Dict[str, Any]]]) -> bool:
+    """Exact check of range conditions against decrypted metadata."""
+    for key, ranges in checks:
+        values = metadata.get(key)
+        values = values if isinstance(values, (list, tuple)) else [values]
+        ok = False
+        for v in values:
+            if v is None or isinstance(v, bool) or not isinstance(v, (int, float)):
+                continue
+            if (("$gt" not in ranges or v > ranges["$gt"]) and ("$gte" not in ranges or v >= ranges["$gte"])
+                    and ("$lt" not in ranges or v < ranges["$lt"]) and ("$lte" not in ranges or v <= ranges["$lte"])):
+                ok = True
+                break
+        if not ok:
+            return False
+    return True
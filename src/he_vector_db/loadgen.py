@@ -0,0 +1,209 @@
+import time
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def percentile(values: Sequence[float], p: float) -> Optional[float]:
+    return float(np.percentile(values, p)) if len(values) else None
+
+
+def poisson_schedule(rate: float, duration: float, rng: np.random.Generator) -> List[float]:
+    """Arrival offsets (seconds) of a Poisson process with `rate` events/s over [0, duration)."""
+    if rate <= 0 or duration <= 0:
+        return []
+    out, t = [], 0.0
+    while True:
+        t += rng.exponential(1.0 / rate)
+        if t >= duration:
+            return out
+        out.append(t)
+
+
+@dataclass
+class RequestRecord:
+    op: str
+    scheduled: float      # perf_counter time the request was due
+    started: float        # ... picked up by a client thread
+    finished: float
+    error: Optional[str] = None
+
+    @property
+    def queue(self) -> float:
+        return self.started - self.scheduled
+
+    @property
+    def service(self) -> float:
+        return self.finished - self.started
+
+    @property
+    def latency(self) -> float:
+        return self.finished - self.scheduled
+
+
+class LoadGenerator:
+    """
+    Open-loop load generator for an HEVectorStore.
+
+    Queries and `add` calls arrive as independent Poisson processes at
+    `query_rate` / `add_rate` per second for `duration` seconds, regardless of
+    how fast earlier requests complete. `concurrency` client threads execute
+    them. A request that finds every client busy waits in the queue, and
+    that wait counts toward its latency. Latency is therefore measured from the
+    scheduled arrival time (no coordinated omission). Queueing delay and service
+    time are reported separately.
+
+    `queries` are sampled with replacement. `docs` = (ids, texts, embeddings)
+    feed the add traffic, `add_batch` documents per call, with ids suffixed so
+    they never collide with stored ones.
+    """
+
+    def __init__(self,
+                 store,
+                 queries: Sequence[Sequence[float]],
+                 docs: Optional[Tuple[Sequence[str], Sequence[str], Sequence[Sequence[float]]]] = None,
+                 query_rate: float = 1.0,
+                 add_rate: float = 0.0,
+                 duration: float = 10.0,
+                 concurrency: int = 4,
+                 n_results: int = 5,
+                 add_batch: int = 1,
+                 max_workers: Optional[int] = 1,
+                 window: float = 1.0,
+                 seed: int = 0):
+        if add_rate > 0 and not docs:
+            raise ValueError("add_rate > 0 needs a document pool (docs)")
+        self.store = store
+        self.queries = queries
+        self.docs = docs
+        self.query_rate = query_rate
+        self.add_rate = add_rate
+        self.duration = duration
+        self.concurrency = concurrency
+        self.n_results = n_results
+        self.add_batch = add_batch
+        self.max_workers = max_workers
+        self.window = window
+        self.seed = seed
+        self._records: List[RequestRecord] = []
+        self._lock = threading.Lock()
+        self._next_doc = 0
+
+    def _take_docs(self) -> Tuple[List[str], List[str], List[Sequence[float]]]:
+        ids, texts, embs = self.docs
+        with self._lock:
+            start = self._next_doc
+            self._next_doc += self.add_batch
+        picks = [(start + i) % len(embs) for i in range(self.add_batch)]
+        return ([f"{ids[p]}#load{start + i}" for i, p in enumerate(picks)],
+                [texts[p] for p in picks] if texts is not None else [],
+                [embs[p] for p in picks])
+
+    def _execute(self, op: str, scheduled: float, payload):
+        started = time.perf_counter()
+        error = None
+        try:
+            if op == "query":
+                self.store.query([payload], n_results=self.n_results, max_workers=self.max_workers)
+            else:
+                ids, texts, embs = self._take_docs()
+                self.store.add(ids=ids, documents=texts, embeddings=embs)
+        except Exception as e:  # 부하 중 오류는 기록만 하고 계속
+            error = f"{type(e).__name__}: {e}"
+        rec = RequestRecord(op, scheduled, started, time.perf_counter(), error)
+        with self._lock:
+            self._records.append(rec)
+
+    def run(self, progress: bool = False) -> dict:
+        rng = np.random.default_rng(self.seed)
+        schedule = sorted(
+            [(t, "query") for t in poisson_schedule(self.query_rate, self.duration, rng)]
+            + [(t, "add") for t in poisson_schedule(self.add_rate, self.duration, rng)]
+        )
+        picks = rng.integers(0, len(self.queries), size=len(schedule)) if len(self.queries) else []
+        self._records, self._next_doc = [], 0
+
+        t_start = time.perf_counter()
+        next_report = t_start + self.window
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for i, (offset, op) in enumerate(schedule):
+                due = t_start + offset
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                payload = self.queries[picks[i]] if op == "query" else None
+                pool.submit(self._execute, op, due, payload)
+                if progress and time.perf_counter() >= next_report:
+                    next_report += self.window
+                    with self._lock:
+                        n_done = len(self._records)
+                    print(f"  ▶ t={time.perf_counter() - t_start:5.1f}s sent {i + 1}/{len(schedule)}, done {n_done}")
+        wall = time.perf_counter() - t_start
+        return self.report(self._records, t_start, wall)
+
+    def report(self, records: List[RequestRecord], t_start: float, wall: float) -> dict:
+        ops = {op: self._summary([r for r in records if r.op == op], wall) for op in ("query", "add")}
+        return {
+            "config": {
+                "query_rate": self.query_rate,
+                "add_rate": self.add_rate,
+                "duration": self.duration,
+                "concurrency": self.concurrency,
+                "n_results": self.n_results,
+                "add_batch": self.add_batch,
+                "max_workers": self.max_workers,
+                "seed": self.seed,
+            },
+            "wall_time": wall,
+            "overall": self._summary(records, wall),
+            "ops": ops,
+            "timeline": self._timeline(records, t_start, wall),
+        }
+
+    @staticmethod
+    def _summary(records: List[RequestRecord], wall: float) -> dict:
+        ok = [r for r in records if r.error is None]
+        lat = [r.latency for r in ok]
+        svc = [r.service for r in ok]
+        queue = [r.queue for r in records]
+        return {
+            "requests": len(records),
+            "errors": len(records) - len(ok),
+            "error_rate": (len(records) - len(ok)) / len(records) if records else 0.0,
+            "error_types": dict(Counter(r.error.split(":")[0] for r in records if r.error)),
+            "throughput": len(ok) / wall if wall > 0 else 0.0,
+            "latency_p50": percentile(lat, 50),
+            "latency_p95": percentile(lat, 95),
+            "latency_p99": percentile(lat, 99),
+            "latency_max": max(lat) if lat else None,
+            "service_p50": percentile(svc, 50),
+            "service_p95": percentile(svc, 95),
+            "service_p99": percentile(svc, 99),
+            "queue_p50": percentile(queue, 50),
+            "queue_p95": percentile(queue, 95),
+            "queue_p99": percentile(queue, 99),
+        }
+
+    def _timeline(self, records: List[RequestRecord], t_start: float, wall: float) -> List[Dict[str, object]]:
+        """Per `window` seconds (by completion time): completions, errors, p95 latency, mean queueing delay."""
+        n = max(1, int(np.ceil(wall / self.window)))
+        buckets: List[List[RequestRecord]] = [[] for _ in range(n)]
+        for r in records:
+            buckets[min(n - 1, int((r.finished - t_start) / self.window))].append(r)
+        rows = []
+        for i, bucket in enumerate(buckets):
+            ok = [r for r in bucket if r.error is None]
+            rows.append({
+                "t": round(i * self.window, 3),
+                "completed": len(ok),
+                "errors": len(bucket) - len(ok),
+                "queries": sum(r.op == "query" for r in ok),
+                "adds": sum(r.op == "add" for r in ok),
+                "latency_p95": percentile([r.latency for r in ok], 95),
+                "queue_mean": float(np.mean([r.queue for r in bucket])) if bucket else None,
+            })
+        return rows
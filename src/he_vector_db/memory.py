@@ -0,0 +1,110 @@
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+
+class MemoryBudgetExceeded(MemoryError):
+    """Raised when even the smallest scan/ingest plan does not fit the memory budget."""
+
+
+class MemoryAccountant:
+    """
+    Byte accounting for one HEVectorStore (or several sharing a budget).
+
+    Callers `hold(category, nbytes)` around the memory they keep alive
+    ("blobs" = SQLite rows in flight, "ciphertexts" = deserialized / encrypted
+    CKKS vectors, "results" = score buffers). The counts are estimates from
+    serialized sizes, not allocator measurements.
+
+    `operation(name)` measures the peak of the accounted total while it runs
+    (the whole accountant, not just that thread, since that is what a server
+    running several stores has to provision for). Per-operation last and
+    maximum peaks are reported by `stats()`.
+
+    With a `budget` (bytes), `plan_scan` shrinks the chunk size first and then
+    the worker count so that the in-flight documents fit.
+    """
+
+    def __init__(self, budget: Optional[int] = None):
+        self.budget = budget
+        self._lock = threading.Lock()
+        self.current: Dict[str, int] = {}
+        self.total = 0
+        self.peak = 0
+        self._active: Dict[int, int] = {}     # operation token → peak so far
+        self._next_token = 0
+        self.last_peak: Dict[str, int] = {}
+        self.max_peak: Dict[str, int] = {}
+        self.runs: Dict[str, int] = {}
+
+    def reserve(self, category: str, nbytes: int):
+        with self._lock:
+            self.current[category] = self.current.get(category, 0) + nbytes
+            self.total += nbytes
+            if self.total > self.peak:
+                self.peak = self.total
+            for token, peak in self._active.items():
+                if self.total > peak:
+                    self._active[token] = self.total
+
+    def release(self, category: str, nbytes: int):
+        with self._lock:
+            self.current[category] = self.current.get(category, 0) - nbytes
+            self.total -= nbytes
+
+    @contextmanager
+    def hold(self, category: str, nbytes: int) -> Iterator[None]:
+        self.reserve(category, nbytes)
+        try:
+            yield
+        finally:
+            self.release(category, nbytes)
+
+    @contextmanager
+    def operation(self, name: str) -> Iterator[Dict[str, int]]:
+        """Track the peak accounted bytes while the block runs; the yielded dict gets {"peak": ...} on exit."""
+        out: Dict[str, int] = {}
+        with self._lock:
+            token = self._next_token
+            self._next_token += 1
+            self._active[token] = self.total
+        try:
+            yield out
+        finally:
+            with self._lock:
+                peak = self._active.pop(token)
+                self.last_peak[name] = peak
+                self.max_peak[name] = max(self.max_peak.get(name, 0), peak)
+                self.runs[name] = self.runs.get(name, 0) + 1
+            out["peak"] = peak
+
+    def plan_scan(self, workers: int, chunk_size: int, doc_bytes: int, fixed_bytes: int = 0) -> Tuple[int, int]:
+        """
+        (workers, chunk_size) whose in-flight bytes, workers × (chunk_size × doc_bytes + doc_bytes)
+        (rows plus one live ciphertext each), fit in the budget next to `fixed_bytes`
+        (encrypted queries, ...) and what is already accounted.
+        """
+        if self.budget is None:
+            return workers, chunk_size
+        with self._lock:
+            free = self.budget - self.total - fixed_bytes
+        per_worker = lambda c: (c + 1) * doc_bytes
+        if free < per_worker(1):
+            raise MemoryBudgetExceeded(
+                f"memory budget {self.budget} B leaves {max(free, 0)} B for the scan; "
+                f"one document needs ~{per_worker(1)} B (send fewer queries per call or raise the budget)")
+        chunk_size = max(1, min(chunk_size, free // doc_bytes - 1))
+        workers = max(1, min(workers, free // per_worker(chunk_size)))
+        return workers, chunk_size
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "budget": self.budget,
+                "current": self.total,
+                "current_by_category": {k: v for k, v in self.current.items() if v},
+                "peak": self.peak,
+                "last_peak": dict(self.last_peak),
+                "max_peak": dict(self.max_peak),
+                "runs": dict(self.runs),
+            }
@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+
+# Stage names used by HEVectorStore; profilers accept any other name as well.
+STAGES = (
+    "encrypt_query",
+    "fetch_rows",
+    "ckks_load",
+    "dot",
+    "decrypt",
+    "topk_merge",
+    "fernet",
+    "encrypt_vector",
+    "sqlite_commit",
+)
+
+StageCallback = Callable[[str, float, int], None]
+
+
+class StoreProfiler:
+    """
+    Thread-safe per-stage timers/counters for HEVectorStore.
+
+    - timers  : stage -> (calls, items, total seconds, max seconds)
+    - counters: monotonically increasing integers (queries, docs_scanned, ...)
+    - gauges  : last observed values (e.g. chosen worker count)
+    Callbacks are invoked as ``cb(stage, seconds, items)`` on every record.
+    """
+
+    def __init__(self, callbacks: Optional[List[StageCallback]] = None):
+        self._lock = threading.Lock()
+        self.callbacks: List[StageCallback] = list(callbacks or [])
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.timers: Dict[str, Dict[str, float]] = {}
+            self.counters: Dict[str, int] = {}
+            self.gauges: Dict[str, float] = {}
+            self.started_at = time.time()
+
+    def add_callback(self, cb: StageCallback):
+        self.callbacks.append(cb)
+
+    def record(self, stage: str, seconds: float, items: int = 1):
+        """Record `items` operations of `stage` that took `seconds` in total."""
+        with self._lock:
+            t = self.timers.get(stage)
+            if t is None:
+                t = self.timers[stage] = {"calls": 0, "items": 0, "total": 0.0, "max": 0.0}
+            t["calls"] += 1
+            t["items"] += items
+            t["total"] += seconds
+            if seconds > t["max"]:
+                t["max"] = seconds
+        for cb in self.callbacks:
+            cb(stage, seconds, items)
+
+    @contextmanager
+    def timer(self, stage: str, items: int = 1):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - t0, items)
+
+    def incr(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def set_gauge(self, name: str, value: float):
+        with self._lock:
+            self.gauges[name] = value
+
+    def snapshot(self) -> dict:
+        """Return a JSON-serialisable copy of all metrics."""
+        with self._lock:
+            timers = {
+                stage: {
+                    **t,
+                    "mean_per_item": (t["total"] / t["items"]) if t["items"] else 0.0,
+                }
+                for stage, t in self.timers.items()
+            }
+            return {
+                "timers": timers,
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "elapsed": time.time() - self.started_at,
+            }
+
+    def absorb(self, snap: dict):
+        """Add another profiler's `snapshot()` (e.g. from a search daemon): timers and counters sum, gauges overwrite."""
+        with self._lock:
+            for stage, t in snap.get("timers", {}).items():
+                mine = self.timers.setdefault(stage, {"calls": 0, "items": 0, "total": 0.0, "max": 0.0})
+                for k in ("calls", "items", "total"):
+                    mine[k] += t[k]
+                mine["max"] = max(mine["max"], t["max"])
+            for name, n in snap.get("counters", {}).items():
+                self.counters[name] = self.counters.get(name, 0) + n
+            self.gauges.update(snap.get("gauges", {}))
+
+    def to_prometheus(self, prefix: str = "he_vector_store", labels: Optional[Dict[str, str]] = None) -> str:
+        """Render the current metrics in the Prometheus text exposition format."""
+        snap = self.snapshot()
+        base = dict(labels or {})
+
+        def fmt(extra: Dict[str, str]) -> str:
+            merged = {**base, **extra}
+            if not merged:
+                return ""
+            inner = ",".join(f'{k}="{v}"' for k, v in sorted(merged.items()))
+            return "{" + inner + "}"
+
+        lines = [
+            f"# HELP {prefix}_stage_seconds_total Total time spent per stage.",
+            f"# TYPE {prefix}_stage_seconds_total counter",
+        ]
+        for stage, t in sorted(snap["timers"].items()):
+            lines.append(f"{prefix}_stage_seconds_total{fmt({'stage': stage})} {t['total']:.9f}")
+        lines += [
+            f"# HELP {prefix}_stage_items_total Items processed per stage.",
+            f"# TYPE {prefix}_stage_items_total counter",
+        ]
+        for stage, t in sorted(snap["timers"].items()):
+            lines.append(f"{prefix}_stage_items_total{fmt({'stage': stage})} {t['items']}")
+        lines += [
+            f"# HELP {prefix}_stage_max_seconds Slowest single record per stage.",
+            f"# TYPE {prefix}_stage_max_seconds gauge",
+        ]
+        for stage, t in sorted(snap["timers"].items()):
+            lines.append(f"{prefix}_stage_max_seconds{fmt({'stage': stage})} {t['max']:.9f}")
+        for name, value in sorted(snap["counters"].items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total{fmt({})} {value}")
+        for name, value in sorted(snap["gauges"].items()):
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name}{fmt({})} {value}")
+        return "\n".join(lines) + "\n"
+
+    def merge_into(self, path: str, section: str, extra: Optional[dict] = None) -> dict:
+        """
+        Merge the current snapshot (plus any `extra` keys) into a JSON metrics file
+        (e.g. metrics_{size}.json) under `section`, keeping all other keys already present.
+        The file is written exactly once.
+        """
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        metrics = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                metrics = json.load(f)
+        metrics[section] = {**self.snapshot(), **(extra or {})}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(metrics, f, ensure_ascii=False, indent=2)
+        return metrics
+
+
+class NullProfiler(StoreProfiler):
+    """Profiler that discards everything; the default for HEVectorStore."""
+
+    def add_callback(self, cb: StageCallback):
+        raise TypeError("NullProfiler never records; pass a StoreProfiler to use callbacks")
+
+    def record(self, stage: str, seconds: float, items: int = 1):
+        pass
+
+    @contextmanager
+    def timer(self, stage: str, items: int = 1):
+        yield
+
+    def incr(self, name: str, n: int = 1):
+        pass
+
+    def set_gauge(self, name: str, value: float):
+        pass
+
+    def absorb(self, snap: dict):
+        pass
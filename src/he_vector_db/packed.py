@@ -0,0 +1,260 @@
+import time
+import logging
+import sqlite3
+import uuid
+from typing import List, Optional, Tuple
+
+import numpy as np
+import tenseal as ts
+
+from .store import HEVectorStore
+from .plain_corpus import slot_count
+from .query_batch import EncryptedQueryBatch
+
+logger = logging.getLogger(__name__)
+
+
+class PackedVectorStore(HEVectorStore):
+    """
+    Dimension-major (transposed) encrypted layout.
+
+    Documents are grouped into blocks of `block_size` (= slot count) documents.
+    Ciphertext d of a block holds coordinate d of every document in the block,
+    one document per slot, so a block of D-dimensional embeddings is D
+    ciphertexts instead of block_size. Scoring is D scalar (plain query) or
+    ciphertext (encrypted query) multiply-accumulates that yield block_size
+    scores in one ciphertext, with no rotations.
+
+    query_mode:
+      - "plain"     : the query is used in the clear (server sees it)
+      - "encrypted" : coordinate d of the query is encrypted replicated over all
+                      slots (D encryptions per query), multiplied ciphertext-ciphertext
+
+    `add` fills the last partial block homomorphically (existing ciphertext +
+    encryption of the new slots), so batched adds are much cheaper than many
+    single-document adds (each touched block costs D encryptions).
+    """
+
+    _doc_table = "packed_docs"
+    _doc_order = "block, slot"
+    supports_subsets = False
+    supports_streaming = False
+
+    def __init__(self,
+                 context_path: str,
+                 db_path: str,
+                 id_key_path: str,
+                 query_mode: str = "plain",
+                 block_size: Optional[int] = None,
+                 **kwargs):
+        if query_mode not in ("plain", "encrypted"):
+            raise ValueError(f"query_mode must be 'plain' or 'encrypted', got {query_mode!r}")
+        super().__init__(context_path=context_path, db_path=db_path, id_key_path=id_key_path, **kwargs)
+        slots = slot_count(self.context)
+        self.block_size = min(block_size or slots, slots)
+        self.query_mode = query_mode
+
+    def _init_db(self):
+        super()._init_db()
+        cur = self.conn.cursor()
+        cur.execute('''
+            CREATE TABLE IF NOT EXISTS packed_blocks (
+                block INTEGER NOT NULL,
+                dim INTEGER NOT NULL,
+                ciphertext BLOB NOT NULL,
+                PRIMARY KEY (block, dim)
+            )
+        ''')
+        cur.execute('''
+            CREATE TABLE IF NOT EXISTS packed_docs (
+                block INTEGER NOT NULL,
+                slot INTEGER NOT NULL,
+                id BLOB NOT NULL,
+                text_enc BLOB,
+                PRIMARY KEY (block, slot)
+            )
+        ''')
+        self.conn.commit()
+
+    def _layout(self, cur) -> Tuple[Optional[int], int, int]:
+        """(embedding dim or None, last block index, documents in the last block)."""
+        cur.execute("SELECT value FROM store_meta WHERE key = 'packed_dim'")
+        row = cur.fetchone()
+        dim = row[0] if row is not None else None
+        cur.execute("SELECT MAX(block) FROM packed_docs")
+        last = cur.fetchone()[0]
+        if last is None:
+            return dim, 0, 0
+        cur.execute("SELECT COUNT(*) FROM packed_docs WHERE block = ?", (last,))
+        return dim, last, cur.fetchone()[0]
+
+    def _add_locked(self, raw_texts, ids, embeddings, metadatas, subset=None) -> List[str]:
+        """
+        Normalize, encrypt IDs/texts and pack embeddings dimension-major into
+        blocks, topping up the last partial block homomorphically
+        (HEVectorStore.add holds the lock, bumps the version and commits).
+        Ids are not deduplicated, so nothing is ever reported as skipped.
+        """
+        if metadatas:
+            raise ValueError("metadata is not supported by PackedVectorStore")
+        prof = self.profiler
+        mat = np.atleast_2d(np.asarray(embeddings, dtype=np.float64))
+        if mat.size == 0:
+            return []
+        norms = np.linalg.norm(mat, axis=1, keepdims=True)
+        mat = np.divide(mat, norms, out=np.zeros_like(mat), where=norms > 0)
+
+        cur = self.conn.cursor()
+        dim, block, fill = self._layout(cur)
+        if dim is None:
+            dim = mat.shape[1]
+            cur.execute("INSERT INTO store_meta (key, value) VALUES ('packed_dim', ?)", (dim,))
+        elif mat.shape[1] != dim:
+            raise ValueError(f"Embedding dim mismatch: {mat.shape[1]} != {dim}")
+        if fill == self.block_size:
+            block, fill = block + 1, 0
+
+        t0 = time.perf_counter()
+        doc_rows = []
+        for idx in range(len(mat)):
+            raw_id = ids[idx] if ids else str(uuid.uuid4())
+            raw_text = raw_texts[idx] if idx < len(raw_texts) else ""
+            doc_rows.append((self.fernet.encrypt(raw_id.encode()), self.fernet.encrypt(raw_text.encode())))
+        prof.record("fernet", time.perf_counter() - t0, 2 * len(mat))
+
+        t_enc = t_load = 0.0
+        start = 0
+        while start < len(mat):
+            take = min(self.block_size - fill, len(mat) - start)
+            part = mat[start:start + take]
+            existing = {}
+            if fill > 0:
+                t0 = time.perf_counter()
+                cur.execute("SELECT dim, ciphertext FROM packed_blocks WHERE block = ?", (block,))
+                existing = {d: ts.ckks_vector_from(self.context, blob) for d, blob in cur.fetchall()}
+                t_load += time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            rows = []
+            slots = np.zeros(self.block_size)
+            for d in range(dim):
+                slots[:] = 0.0
+                slots[fill:fill + take] = part[:, d]
+                enc = ts.ckks_vector(self.context, slots.tolist())
+                if d in existing:
+                    enc = existing.pop(d) + enc
+                rows.append((block, d, enc.serialize()))
+            t_enc += time.perf_counter() - t0
+
+            cur.executemany("REPLACE INTO packed_blocks (block, dim, ciphertext) VALUES (?, ?, ?)", rows)
+            cur.executemany(
+                "INSERT INTO packed_docs (block, slot, id, text_enc) VALUES (?, ?, ?, ?)",
+                [(block, fill + i, enc_id, enc_txt)
+                 for i, (enc_id, enc_txt) in enumerate(doc_rows[start:start + take])]
+            )
+            start += take
+            block, fill = block + 1, 0
+
+        prof.record("ckks_load", t_load)
+        prof.record("encrypt_vector", t_enc, len(mat))
+        return []
+
+    def _encode_queries(self, embeddings) -> List[list]:
+        """Normalized queries; per query a list of D scalars (plain) or D replicated ciphertexts."""
+        out = []
+        for vec in embeddings:
+            arr = np.asarray(vec, dtype=float)
+            norm = np.linalg.norm(arr)
+            if norm > 0:
+                arr = arr / norm
+            if self.query_mode == "plain":
+                out.append([float(x) for x in arr])
+            else:
+                out.append([ts.ckks_vector(self.context, [float(x)] * self.block_size) for x in arr])
+        return out
+
+    def _scan(
+        self,
+        embeddings: List[List[float]],
+        n_results: int,
+        max_workers: Optional[int],
+        where: Optional[dict] = None,
+        subset: Optional[str] = None
+    ) -> List[List[Tuple[bytes, bytes, float]]]:
+        """
+        Block by block: load the D ciphertexts once, multiply-accumulate every
+        query into one score ciphertext per query, decrypt and merge top-k.
+        Blocks are processed sequentially (TenSEAL holds the GIL).
+        """
+        if where or subset:
+            raise ValueError("metadata filters and subsets are not supported by PackedVectorStore")
+        if isinstance(embeddings, EncryptedQueryBatch):
+            # 블록 레이아웃은 차원별 스칼라/복제 암호문이 필요 → 배치의 정규화된 평문으로 다시 인코딩
+            embeddings.check_context(self.context_id, self.db_path)
+            embeddings = embeddings.vectors
+        # 별도 연결의 읽기 트랜잭션 하나로 스캔 → 동시 add 가 블록을 채워도 한 스냅샷만 본다
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        try:
+            cur = conn.cursor()
+            cur.execute("BEGIN")
+            return self._scan_blocks(cur, embeddings, n_results)
+        finally:
+            conn.close()
+
+    def _scan_blocks(self, cur, embeddings, n_results: int) -> List[List[Tuple[bytes, bytes, float]]]:
+        prof = self.profiler
+        dim, _, _ = self._layout(cur)
+        if dim is None:
+            return [[] for _ in embeddings]
+        if len(embeddings[0]) != dim:
+            raise ValueError(f"Query dim {len(embeddings[0])} != stored dim {dim}")
+
+        with prof.timer("encrypt_query", len(embeddings)):
+            queries = self._encode_queries(embeddings)
+
+        cur.execute("SELECT DISTINCT block FROM packed_docs ORDER BY block")
+        blocks = [b for (b,) in cur.fetchall()]
+        best = [[] for _ in embeddings]  # (score, block, slot)
+        t_load = t_mac = t_dec = 0.0
+        n_docs = 0
+        for b in blocks:
+            t0 = time.perf_counter()
+            cur.execute("SELECT dim, ciphertext FROM packed_blocks WHERE block = ? ORDER BY dim", (b,))
+            cts = [ts.ckks_vector_from(self.context, blob) for _, blob in cur.fetchall()]
+            cur.execute("SELECT COUNT(*) FROM packed_docs WHERE block = ?", (b,))
+            filled = cur.fetchone()[0]
+            t_load += time.perf_counter() - t0
+            n_docs += filled
+
+            for qi, q in enumerate(queries):
+                t0 = time.perf_counter()
+                acc = cts[0] * q[0]
+                for d in range(1, dim):
+                    acc += cts[d] * q[d]
+                t1 = time.perf_counter()
+                scores = np.asarray(acc.decrypt()[:filled])
+                t_mac += t1 - t0
+                t_dec += time.perf_counter() - t1
+
+                k = min(n_results, filled)
+                top = np.argpartition(-scores, k - 1)[:k]
+                best[qi].extend((float(scores[s]), b, int(s)) for s in top)
+                best[qi] = sorted(best[qi], key=lambda x: -x[0])[:n_results]
+
+        prof.record("ckks_load", t_load, len(blocks) * dim)
+        prof.record("dot", t_mac, n_docs * len(embeddings))
+        prof.record("decrypt", t_dec, len(blocks) * len(embeddings))
+
+        results = []
+        with prof.timer("topk_merge", len(embeddings)):
+            for hits in best:
+                row = []
+                for score, b, slot in hits:
+                    cur.execute("SELECT id, text_enc FROM packed_docs WHERE block = ? AND slot = ?", (b, slot))
+                    enc_id, enc_txt = cur.fetchone()
+                    row.append((enc_id, enc_txt, score))
+                results.append(row)
+
+        prof.incr("queries", len(embeddings))
+        prof.incr("docs_scanned", n_docs)
+        return results
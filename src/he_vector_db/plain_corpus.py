@@ -0,0 +1,163 @@
+import time
+import logging
+import uuid
+from typing import List, Optional, Tuple
+
+import numpy as np
+import tenseal as ts
+
+from .store import HEVectorStore
+
+logger = logging.getLogger(__name__)
+
+
+def slot_count(context) -> int:
+    """Number of CKKS slots (poly_modulus_degree / 2) of a TenSEAL context."""
+    return context.data.seal_context().first_context_data().parms().poly_modulus_degree() // 2
+
+
+class PlainCorpusStore(HEVectorStore):
+    """
+    Encrypted-query / plaintext-corpus mode.
+
+    The server keeps normalized document embeddings in the clear (IDs and texts
+    are still Fernet-encrypted) and only the query is encrypted. The corpus is
+    held as a float32 matrix split into chunks of at most `slot_count` documents;
+    one `enc_query.mm(chunk.T)` per chunk returns an encrypted vector with the
+    scores of every document in that chunk, instead of one ciphertext dot
+    product per document.
+
+    `query` returns the same (enc_id, enc_text, score) tuples as HEVectorStore.
+    """
+    _doc_table = "plain_vectors"
+    supports_subsets = False
+    supports_streaming = False
+
+    def __init__(self,
+                 context_path: str,
+                 db_path: str,
+                 id_key_path: str,
+                 chunk_size: Optional[int] = None,
+                 **kwargs):
+        super().__init__(context_path=context_path, db_path=db_path, id_key_path=id_key_path, **kwargs)
+        slots = slot_count(self.context)
+        self.chunk_size = min(chunk_size or slots, slots)
+        # (write version, float32 matrix, encrypted (id, text) rows) — 한 번에 교체해 서로 어긋나지 않게
+        self._corpus: Tuple[int, Optional[np.ndarray], List[Tuple[bytes, bytes]]] = (-1, None, [])
+
+    def _init_db(self):
+        super()._init_db()
+        cur = self.conn.cursor()
+        cur.execute('''
+            CREATE TABLE IF NOT EXISTS plain_vectors (
+                id BLOB PRIMARY KEY,
+                embedding BLOB NOT NULL,
+                text_enc BLOB
+            )
+        ''')
+        self.conn.commit()
+
+    def _add_locked(self, raw_texts, ids, embeddings, metadatas, subset=None) -> List[str]:
+        """
+        Store normalized float32 embeddings in the clear with encrypted ID/text
+        (HEVectorStore.add holds the lock, bumps the version and commits).
+        Ids are not deduplicated, so nothing is ever reported as skipped.
+        """
+        if metadatas:
+            raise ValueError("metadata is not supported by PlainCorpusStore")
+        prof = self.profiler
+        mat = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+        if mat.size == 0:
+            return []
+        norms = np.linalg.norm(mat, axis=1, keepdims=True)
+        mat = np.divide(mat, norms, out=np.zeros_like(mat), where=norms > 0)
+        if mat.shape[1] > slot_count(self.context):
+            raise ValueError(f"Embedding dim {mat.shape[1]} exceeds the context slot count")
+
+        rows = []
+        t0 = time.perf_counter()
+        for idx, vec in enumerate(mat):
+            raw_id = ids[idx] if ids else str(uuid.uuid4())
+            raw_text = raw_texts[idx] if idx < len(raw_texts) else ""
+            rows.append((
+                self.fernet.encrypt(raw_id.encode()),
+                vec.tobytes(),
+                self.fernet.encrypt(raw_text.encode())
+            ))
+        prof.record("fernet", time.perf_counter() - t0, 2 * len(rows))
+
+        self.conn.cursor().executemany('REPLACE INTO plain_vectors (id, embedding, text_enc) VALUES (?, ?, ?)', rows)
+        return []
+
+    def _load_corpus(self) -> Tuple[np.ndarray, List[Tuple[bytes, bytes]]]:
+        """(matrix, encrypted id/text rows) of one write version, reloaded when the version changes."""
+        version, matrix, rows = self._corpus
+        if matrix is not None and version == self.version():
+            return matrix, rows
+        with self._lock, self.profiler.timer("fetch_rows"):
+            cur = self.conn.cursor()
+            version = self._read_version(cur)
+            cur.execute("SELECT id, embedding, text_enc FROM plain_vectors ORDER BY rowid")
+            fetched = cur.fetchall()
+        rows = [(enc_id, enc_txt) for enc_id, _, enc_txt in fetched]
+        if fetched:
+            matrix = np.vstack([np.frombuffer(blob, dtype=np.float32) for _, blob, _ in fetched])
+        else:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        self._corpus = (version, matrix, rows)
+        return matrix, rows
+
+    def encrypted_scores(self, enc_query: ts.CKKSVector, matrix: Optional[np.ndarray] = None) -> List[ts.CKKSVector]:
+        """
+        Server-side step: one ciphertext-plaintext matrix product per chunk.
+        Returns encrypted score vectors (chunk i holds documents i*chunk_size ...);
+        only the holder of the secret key can decrypt them.
+        `matrix` defaults to the current corpus.
+        """
+        if matrix is None:
+            matrix, _ = self._load_corpus()
+        out = []
+        t_mm = 0.0
+        for start in range(0, len(matrix), self.chunk_size):
+            chunk = matrix[start:start + self.chunk_size]
+            t0 = time.perf_counter()
+            out.append(enc_query.mm(chunk.T))
+            t_mm += time.perf_counter() - t0
+        self.profiler.record("matmul_plain", t_mm, len(matrix))
+        return out
+
+    def _scan(
+        self,
+        embeddings: List[List[float]],
+        n_results: int,
+        max_workers: Optional[int],
+        where: Optional[dict] = None,
+        subset: Optional[str] = None
+    ) -> List[List[Tuple[bytes, bytes, float]]]:
+        """
+        Encrypt each query (or take them from an EncryptedQueryBatch), score every chunk with encrypted_scores and decrypt.
+        `max_workers` is accepted for API compatibility; TenSEAL holds the GIL,
+        so chunks are processed sequentially.
+        """
+        if where or subset:
+            raise ValueError("metadata filters and subsets are not supported by PlainCorpusStore")
+        prof = self.profiler
+        matrix, rows = self._load_corpus()
+        if len(matrix) == 0:
+            return [[] for _ in range(len(embeddings))]
+
+        results = []
+        for enc_q in self._encrypt_queries(embeddings):
+            enc_scores = self.encrypted_scores(enc_q, matrix)
+            with prof.timer("decrypt", len(matrix)):
+                scores = np.concatenate([np.asarray(s.decrypt()) for s in enc_scores])
+
+            with prof.timer("topk_merge"):
+                k = min(n_results, len(scores))
+                top = np.argpartition(-scores, k - 1)[:k]
+                top = top[np.argsort(-scores[top], kind="stable")]
+                results.append([(rows[i][0], rows[i][1], float(scores[i])) for i in top])
+
+        prof.incr("queries", len(embeddings))
+        prof.incr("docs_scanned", len(matrix) * len(embeddings))
+        return results
@@ -0,0 +1,120 @@
+import os
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence
+
+import numpy as np
+import tenseal as ts
+from tenseal import CKKSVector
+
+from .cache import EncryptedQueryCache
+from .metrics import StoreProfiler, NullProfiler
+
+
+def context_fingerprint(ctx_bytes: bytes) -> str:
+    """Identity of serialized CKKS key material: stores opened from the same context file share it."""
+    return hashlib.blake2b(ctx_bytes, digest_size=16).hexdigest()
+
+
+def vector_key(arr: np.ndarray, context_id: str) -> bytes:
+    """Exact hash of an already-normalised float64 query vector under one context (no quantisation)."""
+    h = hashlib.blake2b(np.ascontiguousarray(arr, dtype=np.float64).tobytes(), digest_size=16)
+    h.update(b"\x00" + context_id.encode("ascii"))
+    return h.digest()
+
+
+class EncryptedQueryBatch:
+    """
+    A batch of L2-normalised, CKKS-encrypted query vectors that can be run
+    against any store (or distributed coordinator) opened with the same key
+    material: `store.query(batch)`, `store.query_iter(batch)`, ...
+
+    `vectors` keeps the normalised plaintext so result-cache keys and stores
+    that need their own query encoding (PackedVectorStore) still work.
+    `serialized()` returns the wire form once and then reuses it.
+    """
+
+    def __init__(self, vectors: np.ndarray, ciphertexts: List[CKKSVector], context_id: str):
+        if len(vectors) != len(ciphertexts):
+            raise ValueError(f"{len(vectors)} vectors but {len(ciphertexts)} ciphertexts")
+        self.vectors = vectors
+        self.ciphertexts = ciphertexts
+        self.context_id = context_id
+        self._blobs: Optional[List[bytes]] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.ciphertexts)
+
+    def select(self, indices: Sequence[int]) -> "EncryptedQueryBatch":
+        """Sub-batch of the given query positions (ciphertexts are shared, not copied)."""
+        indices = list(indices)
+        out = EncryptedQueryBatch(self.vectors[indices], [self.ciphertexts[i] for i in indices], self.context_id)
+        if self._blobs is not None:
+            out._blobs = [self._blobs[i] for i in indices]
+        return out
+
+    def serialized(self) -> List[bytes]:
+        with self._lock:
+            if self._blobs is None:
+                self._blobs = [ct.serialize() for ct in self.ciphertexts]
+            return self._blobs
+
+    def check_context(self, context_id: str, owner: str):
+        if context_id != self.context_id:
+            raise ValueError(f"query batch was encrypted under a different CKKS context than {owner}")
+
+
+def normalize_rows(embeddings) -> np.ndarray:
+    """L2-normalised float64 copy of a (n, dim) batch; zero rows stay zero (same as the per-vector code)."""
+    if len(embeddings) == 0:
+        return np.zeros((0, 0))
+    arr = np.array(embeddings, dtype=float)
+    norms = np.linalg.norm(arr, axis=1, keepdims=True)
+    np.divide(arr, norms, out=arr, where=norms > 0)
+    return arr
+
+
+def encrypt_batch(
+    context: ts.Context,
+    context_id: str,
+    embeddings,
+    cache: Optional[EncryptedQueryCache] = None,
+    max_workers: Optional[int] = None,
+    profiler: Optional[StoreProfiler] = None
+) -> EncryptedQueryBatch:
+    """
+    Normalise and encrypt `embeddings`, reusing ciphertexts from `cache` where
+    the same vector was encrypted before under `context_id`. The misses are
+    encrypted on up to `max_workers` threads (default: one per CPU).
+    """
+    prof = profiler or NullProfiler()
+    vectors = normalize_rows(embeddings)
+    cts: List[Optional[CKKSVector]] = [None] * len(vectors)
+    keys: List[bytes] = []
+    if cache is not None:
+        keys = [vector_key(v, context_id) for v in vectors]
+        for i, k in enumerate(keys):
+            cts[i] = cache.get(k)
+    misses = [i for i, ct in enumerate(cts) if ct is None]
+    if cache is not None:
+        prof.incr("query_ct_hits", len(vectors) - len(misses))
+        prof.incr("query_ct_misses", len(misses))
+
+    if misses:
+        encrypt = lambda i: ts.ckks_vector(context, vectors[i].tolist())
+        workers = min(max_workers or os.cpu_count() or 4, len(misses))
+        with prof.timer("encrypt_query", len(misses)):
+            if workers <= 1:
+                fresh = [encrypt(i) for i in misses]
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as exe:
+                    fresh = list(exe.map(encrypt, misses))
+        # 새로 암호화한 벡터는 크기가 모두 같으므로 직렬화는 한 번만 해서 크기를 잰다
+        nbytes = len(fresh[0].serialize()) if cache is not None else 0
+        for i, ct in zip(misses, fresh):
+            cts[i] = ct
+            if cache is not None:
+                cache.put(keys[i], ct, nbytes)
+    return EncryptedQueryBatch(vectors, cts, context_id)
@@ -0,0 +1,164 @@
+import os
+import json
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class Qrels:
+    """
+    Compact qrels: sorted int64 keys (query_idx * n_docs + doc_idx) with int8 relevance.
+    Lookups for a whole [Q, k] result matrix are a single np.searchsorted.
+    """
+
+    def __init__(self, query_ids: np.ndarray, doc_ids: np.ndarray, q_idx: np.ndarray,
+                 d_idx: np.ndarray, rel: np.ndarray):
+        self.query_ids = query_ids
+        self.doc_ids = doc_ids
+        self.qid_index = {q: i for i, q in enumerate(query_ids.tolist())}
+        self.docid_index = {d: i for i, d in enumerate(doc_ids.tolist())}
+        keys = q_idx.astype(np.int64) * len(doc_ids) + d_idx.astype(np.int64)
+        order = np.argsort(keys)
+        self.keys = keys[order]
+        self.rel = rel[order]
+        # 쿼리별 관련 문서 수 (IDCG / Recall 분모)
+        self.n_relevant = np.bincount(q_idx[rel > 0], minlength=len(query_ids))
+
+    @classmethod
+    def from_ir_datasets(cls, dataset_name: str) -> "Qrels":
+        import ir_datasets
+
+        dataset = ir_datasets.load(dataset_name)
+        triples = [(str(q.query_id), str(q.doc_id), int(q.relevance)) for q in dataset.qrels_iter()]
+        query_ids = np.array(sorted({t[0] for t in triples}))
+        doc_ids = np.array(sorted({t[1] for t in triples}))
+        qmap = {q: i for i, q in enumerate(query_ids.tolist())}
+        dmap = {d: i for i, d in enumerate(doc_ids.tolist())}
+        q_idx = np.array([qmap[t[0]] for t in triples], dtype=np.int32)
+        d_idx = np.array([dmap[t[1]] for t in triples], dtype=np.int32)
+        rel = np.array([t[2] for t in triples], dtype=np.int8)
+        return cls(query_ids, doc_ids, q_idx, d_idx, rel)
+
+    @classmethod
+    def load(cls, dataset_name: str, cache_path: str) -> "Qrels":
+        """Load qrels from the .npz cache, building it from ir_datasets on first use."""
+        if os.path.exists(cache_path):
+            with np.load(cache_path, allow_pickle=False) as z:
+                if str(z["dataset"]) == dataset_name:
+                    return cls(z["query_ids"], z["doc_ids"], z["q_idx"], z["d_idx"], z["rel"])
+        qrels = cls.from_ir_datasets(dataset_name)
+        qrels.save(cache_path, dataset_name)
+        return qrels
+
+    def save(self, cache_path: str, dataset_name: str):
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        n_docs = len(self.doc_ids)
+        np.savez_compressed(
+            cache_path,
+            dataset=np.array(dataset_name),
+            query_ids=self.query_ids,
+            doc_ids=self.doc_ids,
+            q_idx=(self.keys // n_docs).astype(np.int32),
+            d_idx=(self.keys % n_docs).astype(np.int32),
+            rel=self.rel,
+        )
+
+    def relevance(self, query_ids: Sequence[str], doc_matrix: np.ndarray) -> np.ndarray:
+        """Return the int8 relevance matrix [Q, k] for retrieved doc ids ('' = padding)."""
+        if len(self.keys) == 0:
+            return np.zeros(doc_matrix.shape, dtype=np.int8)
+        q_idx = np.array([self.qid_index.get(str(q), -1) for q in query_ids], dtype=np.int64)
+        flat = doc_matrix.ravel().tolist()
+        d_idx = np.array([self.docid_index.get(d, -1) for d in flat], dtype=np.int64)
+        d_idx = d_idx.reshape(doc_matrix.shape)
+        keys = q_idx[:, None] * len(self.doc_ids) + d_idx
+        pos = np.searchsorted(self.keys, keys).clip(max=len(self.keys) - 1)
+        hit = (q_idx[:, None] >= 0) & (d_idx >= 0) & (self.keys[pos] == keys)
+        return np.where(hit, self.rel[pos], 0).astype(np.int8)
+
+    def relevant_counts(self, query_ids: Sequence[str]) -> np.ndarray:
+        idx = [self.qid_index.get(str(q), -1) for q in query_ids]
+        return np.array([self.n_relevant[i] if i >= 0 else 0 for i in idx], dtype=np.int64)
+
+
+def load_results(path: str, k: int) -> Tuple[List[str], np.ndarray]:
+    """Load an eval results JSON into (query_ids, doc id matrix [Q, k]) padded with ''."""
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    query_ids = [str(e.get("query_id")) for e in entries]
+    docs = np.full((len(entries), k), "", dtype=object)
+    for i, e in enumerate(entries):
+        hits = sorted(e.get("results", []), key=lambda h: h.get("rank", 0))[:k]
+        for j, h in enumerate(hits):
+            docs[i, j] = str(h.get("doc_id"))
+    return query_ids, docs
+
+
+def compute_metrics(
+    qrels: Qrels,
+    query_ids: Sequence[str],
+    docs: np.ndarray,
+    k: int,
+    reference: Optional[Tuple[Sequence[str], np.ndarray]] = None,
+    ndcg_ideal: str = "retrieved"
+) -> pd.DataFrame:
+    """
+    Per-query NDCG@k (binary gain), Recall@k, MRR@k and optional overlap@k
+    with a reference (exact) ranking.
+
+    `ndcg_ideal` picks the NDCG normaliser:
+      "retrieved" : ideal ordering of the retrieved list (the original
+                    ndcg5_with_rels.py definition; numbers stay comparable
+                    with earlier results)
+      "qrels"     : ideal ranking of all judged-relevant docs for the query
+                    (standard NDCG; also penalises relevant docs not retrieved)
+    """
+    if ndcg_ideal not in ("retrieved", "qrels"):
+        raise ValueError(f"ndcg_ideal must be 'retrieved' or 'qrels', got {ndcg_ideal!r}")
+    binary = (qrels.relevance(query_ids, docs) > 0).astype(np.float64)
+    discount = 1.0 / np.log2(np.arange(2, k + 2))
+    dcg = binary @ discount
+
+    hits = binary.sum(axis=1)
+    n_rel = qrels.relevant_counts(query_ids)
+    ideal_cum = np.concatenate([[0.0], np.cumsum(discount)])
+    # 이진 gain 이므로 이상적 DCG 는 앞에서부터 관련 문서 수만큼 discount 를 더한 값
+    n_ideal = hits.astype(np.int64) if ndcg_ideal == "retrieved" else np.minimum(n_rel, k)
+    idcg = ideal_cum[n_ideal]
+    ndcg = np.divide(dcg, idcg, out=np.zeros_like(dcg), where=idcg > 0)
+
+    recall = np.divide(hits, n_rel, out=np.full_like(hits, np.nan), where=n_rel > 0)
+
+    first = np.where(binary.any(axis=1), binary.argmax(axis=1) + 1, 0)
+    mrr = np.divide(1.0, first, out=np.zeros(len(first)), where=first > 0)
+
+    df = pd.DataFrame({
+        "query_id": list(query_ids),
+        f"NDCG@{k}": ndcg,
+        f"Recall@{k}": recall,
+        f"MRR@{k}": mrr,
+    })
+
+    if reference is not None:
+        ref_index = {q: i for i, q in enumerate(reference[0])}
+        ref_docs = reference[1]
+        overlap = np.full(len(query_ids), np.nan)
+        for i, q in enumerate(query_ids):
+            j = ref_index.get(q)
+            if j is None:
+                continue
+            ref = set(ref_docs[j, :k].tolist()) - {""}
+            if ref:
+                overlap[i] = len(ref.intersection(docs[i, :k].tolist())) / len(ref)
+        df[f"Overlap@{k}"] = overlap
+    return df
+
+
+def hits_to_matrix(hits: Sequence[Sequence[str]], k: int) -> np.ndarray:
+    """Turn in-memory ranked doc id lists into the [Q, k] matrix used by compute_metrics."""
+    docs = np.full((len(hits), k), "", dtype=object)
+    for i, row in enumerate(hits):
+        for j, doc_id in enumerate(list(row)[:k]):
+            docs[i, j] = str(doc_id)
+    return docs
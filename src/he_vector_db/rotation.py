@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import logging
+import sqlite3
+import hashlib
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import tenseal as ts
+from cryptography.fernet import Fernet
+
+from .filters import BlindIndex
+from .store import HEVectorStore
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[int, int], None]
+
+# per-process state of the re-encryption pool (contexts are not picklable → loaded once per worker)
+_worker: Dict[str, object] = {}
+
+
+def _init_worker(old_context_path: str, old_key_path: str, new_context_path: str, new_key_path: str):
+    with open(old_context_path, "rb") as f:
+        _worker["old_ctx"] = ts.context_from(f.read())
+    with open(new_context_path, "rb") as f:
+        _worker["new_ctx"] = ts.context_from(f.read())
+    with open(old_key_path, "rb") as f:
+        old_key = f.read()
+    with open(new_key_path, "rb") as f:
+        new_key = f.read()
+    _worker["old_fernet"], _worker["new_fernet"] = Fernet(old_key), Fernet(new_key)
+    _worker["old_index"], _worker["new_index"] = BlindIndex(old_key), BlindIndex(new_key)
+
+
+def _reencrypt_batch(rows: List[tuple], buckets: Dict[int, List[Tuple[bytes, int]]]) -> Tuple[List[tuple], float]:
+    """
+    rows: (rowid, id, ciphertext, text_enc, meta_enc) under the old keys.
+    Returns re-encrypted rows plus their blind tags / buckets / id tag under the
+    new keys, and the CPU seconds spent.
+    """
+    t0 = time.process_time()
+    old_ctx, new_ctx = _worker["old_ctx"], _worker["new_ctx"]
+    old_f, new_f = _worker["old_fernet"], _worker["new_fernet"]
+    old_index, new_index = _worker["old_index"], _worker["new_index"]
+    out = []
+    for rowid, enc_id, blob, enc_txt, enc_meta in rows:
+        vec = ts.ckks_vector_from(old_ctx, blob).decrypt()
+        new_blob = ts.ckks_vector(new_ctx, vec).serialize()
+        raw_id = old_f.decrypt(enc_id)
+        new_id = new_f.encrypt(raw_id)
+        new_txt = new_f.encrypt(old_f.decrypt(enc_txt)) if enc_txt is not None else None
+        tags, new_buckets = [], []
+        new_meta = None
+        if enc_meta is not None:
+            raw = old_f.decrypt(enc_meta)
+            new_meta = new_f.encrypt(raw)
+            meta = json.loads(raw)
+            tags, _ = new_index.rows_for(meta)
+            # bucket widths are not stored → keep the bucket numbers, re-key their tags
+            rekey = {old_index.key_tag(k): new_index.key_tag(k) for k in meta}
+            new_buckets = [(rekey[k], b) for k, b in buckets.get(rowid, []) if k in rekey]
+        out.append((rowid, new_id, new_blob, new_txt, new_meta, tags, new_buckets,
+                    new_index.id_tag(raw_id.decode("utf-8"))))
+    return out, time.process_time() - t0
+
+
+def _fingerprint(*paths: str) -> str:
+    h = hashlib.sha256()
+    for p in paths:
+        with open(p, "rb") as f:
+            h.update(hashlib.sha256(f.read()).digest())
+    return h.hexdigest()
+
+
+def _db_file(path: str) -> str:
+    return path if path.endswith(".db") else os.path.join(path, "he_vector_store.db")
+
+
+def rotate_store(
+    src_db_path: str,
+    old_context_path: str,
+    old_key_path: str,
+    new_context_path: str,
+    new_key_path: str,
+    dst_db_path: Optional[str] = None,
+    workers: Optional[int] = None,
+    batch_size: int = 256,
+    progress: Optional[ProgressCallback] = None,
+) -> dict:
+    """
+    Re-encrypt every row of an HEVectorStore under a new CKKS context and Fernet key.
+
+    Rows are streamed out of the source in rowid order, decrypted and re-encrypted
+    by a process pool (`workers` processes, batches of `batch_size`) and written
+    to `<dst>.rotating.db`. Each batch is committed together with a checkpoint
+    (last rowid), so an interrupted job resumes where it stopped when called again
+    with the same arguments. When all rows are done the file is renamed over
+    `dst_db_path` (default: the source itself) in one `os.replace`.
+
+    Raw embeddings are never needed: the CKKS vectors are decrypted with the old
+    secret context. Returns throughput numbers (rows/s, MB/s, CPU seconds).
+    """
+    src = _db_file(src_db_path)
+    dst = _db_file(dst_db_path or src_db_path)
+    tmp = dst[:-len(".db")] + ".rotating.db"
+    if not os.path.exists(src):
+        raise FileNotFoundError(src)
+    job_id = _fingerprint(old_context_path, old_key_path, new_context_path, new_key_path)
+
+    src_conn = sqlite3.connect(src)
+    cur = src_conn.cursor()
+    for table in ("plain_vectors", "packed_docs"):
+        cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table,))
+        if cur.fetchone() and cur.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]:
+            raise ValueError(f"{table} rows are not supported by rotate_store (row layout only)")
+    total, max_rowid = cur.execute("SELECT COUNT(*), COALESCE(MAX(rowid), 0) FROM vectors").fetchone()
+    cur.execute("PRAGMA table_info(vectors)")
+    has_meta = "meta_enc" in {r[1] for r in cur.fetchall()}
+    try:
+        row = cur.execute("SELECT value FROM store_meta WHERE key = 'version'").fetchone()
+    except sqlite3.OperationalError:  # store created before the version counter existed
+        row = None
+    src_version = row[0] if row else 0
+    source_id = f"{job_id}:{total}:{max_rowid}"
+
+    # 1) open (or resume) the temporary store under the new keys
+    new_store = HEVectorStore(context_path=new_context_path, db_path=tmp, id_key_path=new_key_path)
+    out = new_store.conn
+    out.execute("CREATE TABLE IF NOT EXISTS rotation_checkpoint (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    ckpt = dict(out.execute("SELECT key, value FROM rotation_checkpoint").fetchall())
+    if ckpt and ckpt.get("source") != source_id:
+        # 다른 키/소스로 시작된 임시 파일 → 처음부터 다시
+        new_store.close()
+        for ext in ("", "-wal", "-shm"):
+            if os.path.exists(tmp + ext):
+                os.remove(tmp + ext)
+        new_store = HEVectorStore(context_path=new_context_path, db_path=tmp, id_key_path=new_key_path)
+        out = new_store.conn
+        out.execute("CREATE TABLE rotation_checkpoint (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        ckpt = {}
+    last_rowid = int(ckpt.get("last_rowid", 0))
+    done = int(ckpt.get("rows_done", 0))
+    resumed_from = done
+    out.execute("REPLACE INTO rotation_checkpoint (key, value) VALUES ('source', ?)", (source_id,))
+    out.commit()
+    logger.info("[rotate] %s → %s: %d rows (resuming after rowid %d)", src, dst, total, last_rowid)
+
+    # 2) stream batches through the pool, commit in rowid order with the checkpoint
+    workers = workers or os.cpu_count() or 1
+    meta_col = "meta_enc" if has_meta else "NULL"
+    t_start = time.perf_counter()
+    cpu = 0.0
+    bytes_in = 0
+
+    def batches():
+        after = last_rowid
+        while True:
+            rows = cur.execute(
+                f"SELECT rowid, id, ciphertext, text_enc, {meta_col} FROM vectors WHERE rowid > ? "
+                "ORDER BY rowid LIMIT ?", (after, batch_size)).fetchall()
+            if not rows:
+                return
+            after = rows[-1][0]
+            buckets: Dict[int, List[Tuple[bytes, int]]] = {}
+            if has_meta:
+                for rowid, key_tag, bucket in cur.execute(
+                        "SELECT doc_rowid, key_tag, bucket FROM vector_buckets WHERE doc_rowid > ? AND doc_rowid <= ?",
+                        (rows[0][0] - 1, after)):
+                    buckets.setdefault(rowid, []).append((key_tag, bucket))
+            yield rows, buckets
+
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=mp.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(old_context_path, old_key_path, new_context_path, new_key_path),
+    )
+    try:
+        in_flight = []
+        source = batches()
+        exhausted = False
+        while in_flight or not exhausted:
+            while not exhausted and len(in_flight) < 2 * workers:
+                try:
+                    rows, buckets = next(source)
+                except StopIteration:
+                    exhausted = True
+                    break
+                bytes_in += sum(len(r[2]) for r in rows)
+                in_flight.append(pool.submit(_reencrypt_batch, rows, buckets))
+            if not in_flight:
+                break
+            result, cpu_s = in_flight.pop(0).result()
+            cpu += cpu_s
+            ocur = out.cursor()
+            ocur.executemany(
+                "INSERT INTO vectors (rowid, id, ciphertext, text_enc, meta_enc) VALUES (?, ?, ?, ?, ?)",
+                [r[:5] for r in result])
+            ocur.executemany("INSERT INTO vector_tags (doc_rowid, key_tag, value_tag) VALUES (?, ?, ?)",
+                             [(r[0], k, v) for r in result for k, v in r[5]])
+            ocur.executemany("INSERT INTO vector_buckets (doc_rowid, key_tag, bucket) VALUES (?, ?, ?)",
+                             [(r[0], k, b) for r in result for k, b in r[6]])
+            # 중복 id (id_tag 도입 전 행) 는 태그 없이 남김
+            ocur.executemany("UPDATE OR IGNORE vectors SET id_tag = ? WHERE rowid = ?",
+                             [(r[7], r[0]) for r in result])
+            done += len(result)
+            ocur.executemany("REPLACE INTO rotation_checkpoint (key, value) VALUES (?, ?)",
+                             [("last_rowid", str(result[-1][0])), ("rows_done", str(done))])
+            out.commit()
+            if progress is not None:
+                progress(done, total)
+        # subset 은 rowid 로만 참조하므로 그대로 복사
+        cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='vector_subsets'")
+        if cur.fetchone():
+            out.executemany("INSERT OR IGNORE INTO vector_subsets (name, doc_rowid) VALUES (?, ?)",
+                            cur.execute("SELECT name, doc_rowid FROM vector_subsets").fetchall())
+            out.commit()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        src_conn.close()
+
+    # 3) finalize: drop the checkpoint, version = source version + 1, swap the file in
+    seconds = time.perf_counter() - t_start
+    ocur = out.cursor()
+    ocur.execute("DROP TABLE rotation_checkpoint")
+    ocur.execute("UPDATE store_meta SET value = ? WHERE key = 'version'", (src_version + 1,))
+    out.commit()
+    out.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    new_store.close()
+
+    if os.path.exists(dst):
+        # 원본 WAL 내용을 본 파일에 반영한 뒤 -wal/-shm 을 치워야 새 파일에 잘못 적용되지 않는다
+        conn = sqlite3.connect(dst)
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.close()
+    os.replace(tmp, dst)
+    for ext in ("-wal", "-shm"):
+        for path in (tmp + ext, dst + ext):
+            if os.path.exists(path):
+                os.remove(path)
+
+    rotated = done - resumed_from
+    stats = {
+        "rows": done,
+        "rotated_this_run": rotated,
+        "resumed_from": resumed_from,
+        "seconds": seconds,
+        "rows_per_sec": rotated / seconds if seconds > 0 else 0.0,
+        "mb_per_sec": bytes_in / 1e6 / seconds if seconds > 0 else 0.0,
+        "worker_cpu_seconds": cpu,
+        "workers": workers,
+        "batch_size": batch_size,
+        "db_path": dst,
+    }
+    logger.info("[rotate] done: %d rows in %.1fs (%.1f rows/s)", done, seconds, stats["rows_per_sec"])
+    return stats
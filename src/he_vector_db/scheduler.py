@@ -0,0 +1,135 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+R = TypeVar("R")
+
+
+def run_dynamic(
+    n_items: int,
+    chunk_size: int,
+    workers: int,
+    work: Callable[[int, int], R]
+) -> List[Tuple[int, R, float]]:
+    """
+    Self-scheduling loop: [0, n_items) is cut into chunks of `chunk_size` that
+    idle workers pull from a shared cursor, so a slow chunk only delays the
+    worker processing it. `work(start, stop)` is called once per chunk.
+    Returns (start, result, seconds) per chunk, in completion order.
+    """
+    lock = threading.Lock()
+    cursor = [0]
+    perf = time.perf_counter
+
+    def drain() -> List[Tuple[int, R, float]]:
+        done = []
+        while True:
+            with lock:
+                start = cursor[0]
+                if start >= n_items:
+                    return done
+                cursor[0] = start + chunk_size
+            t0 = perf()
+            res = work(start, min(start + chunk_size, n_items))
+            done.append((start, res, perf() - t0))
+
+    if workers <= 1:
+        return drain()
+    out: List[Tuple[int, R, float]] = []
+    with ThreadPoolExecutor(max_workers=workers) as exe:
+        for fut in [exe.submit(drain) for _ in range(workers)]:
+            out.extend(fut.result())
+    return out
+
+
+class QueryAutotuner:
+    """
+    Picks (worker count, chunk size) for HEVectorStore scans on this host.
+
+    The first queries each try one candidate configuration; their throughput
+    (document·query dot products per second of scan time) is recorded, and once
+    every candidate has run `trials` times the fastest one is used from then on.
+    `stats()` reports the trials, per-chunk throughput and the settled choice.
+    """
+
+    def __init__(self,
+                 worker_options: Optional[Sequence[int]] = None,
+                 chunk_options: Sequence[int] = (16, 64, 256),
+                 trials: int = 1):
+        if worker_options is None:
+            cpus = os.cpu_count() or 1
+            worker_options = sorted({1, cpus} | {w for w in (2, 4, 8, 16, 32) if w < cpus})
+        self.candidates: List[Tuple[int, int]] = [(w, c) for w in worker_options for c in chunk_options]
+        self.trials = trials
+        self._lock = threading.Lock()
+        self._results: Dict[Tuple[int, int], List[float]] = {c: [] for c in self.candidates}
+        self._chunk_rates: Dict[Tuple[int, int], List[float]] = {c: [] for c in self.candidates}
+        self.choice: Optional[Tuple[int, int]] = None
+
+    @property
+    def settled(self) -> bool:
+        return self.choice is not None
+
+    def plan(self) -> Tuple[int, int]:
+        """(workers, chunk_size) for the next scan: a candidate still to try, or the settled choice."""
+        with self._lock:
+            if self.choice is not None:
+                return self.choice
+            for cand in self.candidates:
+                if len(self._results[cand]) < self.trials:
+                    return cand
+            return self.candidates[0]
+
+    def observe(self, workers: int, chunk_size: int, work: int, seconds: float,
+                chunk_times: Iterable[Tuple[int, float]] = ()):
+        """Record one scan: `work` dot products in `seconds`; chunk_times = (docs, seconds) per chunk."""
+        key = (workers, chunk_size)
+        with self._lock:
+            if self.choice is not None or key not in self._results or seconds <= 0:
+                return
+            self._results[key].append(work / seconds)
+            self._chunk_rates[key].extend(n / s for n, s in chunk_times if s > 0)
+            self._maybe_settle()
+
+    def discard(self, workers: int, chunk_size: int):
+        """Drop a candidate that cannot run here (e.g. over the memory budget); the last one is kept."""
+        key = (workers, chunk_size)
+        with self._lock:
+            if self.choice is not None or key not in self._results or len(self.candidates) == 1:
+                return
+            self.candidates.remove(key)
+            del self._results[key], self._chunk_rates[key]
+            self._maybe_settle()
+
+    def _maybe_settle(self):
+        if all(len(r) >= self.trials for r in self._results.values()):
+            self.choice = max(self.candidates, key=lambda c: sum(self._results[c]) / len(self._results[c]))
+
+    def reset(self):
+        """Forget measurements (e.g. after the corpus size changed a lot)."""
+        with self._lock:
+            for c in self.candidates:
+                self._results[c] = []
+                self._chunk_rates[c] = []
+            self.choice = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            trials = []
+            for (w, c), rates in self._results.items():
+                chunk = sorted(self._chunk_rates[(w, c)])
+                trials.append({
+                    "workers": w,
+                    "chunk_size": c,
+                    "throughput": sum(rates) / len(rates) if rates else None,
+                    "chunk_throughput_p50": chunk[len(chunk) // 2] if chunk else None,
+                    "chunk_throughput_min": chunk[0] if chunk else None,
+                })
+            return {
+                "settled": self.choice is not None,
+                "workers": self.choice[0] if self.choice else None,
+                "chunk_size": self.choice[1] if self.choice else None,
+                "trials": trials,
+            }
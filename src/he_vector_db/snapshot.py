@@ -0,0 +1,291 @@
+import os
+import json
+import time
+import zlib
+import shutil
+import struct
+import hashlib
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import tenseal as ts
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+MANIFEST = "manifest.json"
+
+
+def context_fingerprint(context) -> str:
+    """sha256 of the context's public key (same for the secret and public copies of a context)."""
+    raw = context.serialize(save_public_key=True, save_secret_key=False,
+                            save_galois_keys=False, save_relin_keys=False)
+    return hashlib.sha256(raw).hexdigest()
+
+
+def key_fingerprint(key: bytes) -> str:
+    """Non-reversible tag of the Fernet key, to refuse importing a bundle with the wrong key."""
+    return hashlib.sha256(b"he_vector_db/fernet-fingerprint\x00" + key).hexdigest()[:32]
+
+
+# ── chunk codec: rows of (int | float | bytes | str | None) ──
+_I64, _F64, _U32 = struct.Struct("!q"), struct.Struct("!d"), struct.Struct("!I")
+
+
+def _encode_rows(rows: Sequence[tuple]) -> bytes:
+    parts = [_U32.pack(len(rows))]
+    for row in rows:
+        parts.append(_U32.pack(len(row)))
+        for v in row:
+            if v is None:
+                parts.append(b"N")
+            elif isinstance(v, int):
+                parts += [b"I", _I64.pack(v)]
+            elif isinstance(v, float):
+                parts += [b"F", _F64.pack(v)]
+            else:
+                raw = v.encode("utf-8") if isinstance(v, str) else bytes(v)
+                parts += [b"S" if isinstance(v, str) else b"B", _U32.pack(len(raw)), raw]
+    return b"".join(parts)
+
+
+def _decode_rows(buf: bytes) -> List[tuple]:
+    view = memoryview(buf)
+    (n,), pos = _U32.unpack_from(view, 0), _U32.size
+    rows = []
+    for _ in range(n):
+        (width,) = _U32.unpack_from(view, pos)
+        pos += _U32.size
+        row = []
+        for _ in range(width):
+            tag = view[pos:pos + 1].tobytes()
+            pos += 1
+            if tag == b"N":
+                row.append(None)
+            elif tag == b"I":
+                row.append(_I64.unpack_from(view, pos)[0])
+                pos += _I64.size
+            elif tag == b"F":
+                row.append(_F64.unpack_from(view, pos)[0])
+                pos += _F64.size
+            else:
+                (size,) = _U32.unpack_from(view, pos)
+                pos += _U32.size
+                raw = view[pos:pos + size].tobytes()
+                pos += size
+                row.append(raw.decode("utf-8") if tag == b"S" else raw)
+        rows.append(tuple(row))
+    return rows
+
+
+def _row_size(row: tuple) -> int:
+    return sum(len(v) if isinstance(v, (bytes, str)) else 8 for v in row)
+
+
+# ── export ──
+
+def export_snapshot(store, out_dir: str, chunk_bytes: int = 32 * 1024 * 1024, level: int = 1) -> dict:
+    """
+    Write a consistent snapshot of `store` (any HEVectorStore subclass) to `out_dir`.
+
+    All tables are read inside one read transaction (a WAL snapshot), streamed
+    in chunks of about `chunk_bytes` raw bytes, zlib-compressed at `level` and
+    written as chunk_00000.bin, ... next to manifest.json (schema, per-chunk
+    sha256, row counts, context and key fingerprints). Memory use is bounded
+    by one chunk. The bundle appears under `out_dir` only once complete.
+    Secret keys are not included; the public context is (context.pk).
+    """
+    if os.path.exists(out_dir):
+        raise FileExistsError(out_dir)
+    partial = out_dir.rstrip("/") + ".partial"
+    if os.path.exists(partial):
+        shutil.rmtree(partial)
+    os.makedirs(partial)
+
+    t0 = time.perf_counter()
+    conn = sqlite3.connect(store.db_path)
+    cur = conn.cursor()
+    cur.execute("BEGIN")  # one read snapshot for every table (and the version recorded below)
+    store_version = store._read_version(cur)
+    cur.execute("SELECT type, name, tbl_name, sql FROM sqlite_master "
+                "WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' ORDER BY type DESC, name")
+    schema = [{"type": t, "name": n, "table": tbl, "sql": sql} for t, n, tbl, sql in cur.fetchall()]
+
+    chunks: List[Dict[str, Any]] = []
+    tables: Dict[str, dict] = {}
+    raw_total = 0
+
+    def flush(table: str, columns: List[str], rows: List[tuple]):
+        nonlocal raw_total
+        raw = _encode_rows(rows)
+        data = zlib.compress(json.dumps({"table": table, "columns": columns}).encode("utf-8") + b"\n" + raw, level)
+        name = f"chunk_{len(chunks):05d}.bin"
+        with open(os.path.join(partial, name), "wb") as f:
+            f.write(data)
+        chunks.append({"file": name, "table": table, "rows": len(rows), "bytes": len(data),
+                       "raw_bytes": len(raw), "sha256": hashlib.sha256(data).hexdigest()})
+        raw_total += len(raw)
+
+    for entry in schema:
+        if entry["type"] != "table":
+            continue
+        table = entry["name"]
+        cur.execute(f'SELECT * FROM "{table}" LIMIT 0')
+        columns = ["rowid"] + [d[0] for d in cur.description]
+        cur.execute(f'SELECT rowid, * FROM "{table}" ORDER BY rowid')
+        rows, size, count = [], 0, 0
+        for row in cur:
+            rows.append(row)
+            size += _row_size(row)
+            if size >= chunk_bytes:
+                flush(table, columns, rows)
+                count += len(rows)
+                rows, size = [], 0
+        if rows:
+            flush(table, columns, rows)
+            count += len(rows)
+        tables[table] = {"rows": count}
+    conn.rollback()
+    conn.close()
+
+    with open(os.path.join(partial, "context.pk"), "wb") as f:
+        public = store.context.copy()
+        public.make_context_public()
+        f.write(public.serialize())
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime()),
+        "store_class": type(store).__name__,
+        "source": os.path.abspath(store.db_path),
+        "store_version": store_version,
+        "context_fingerprint": context_fingerprint(store.context),
+        "key_fingerprint": key_fingerprint(store.id_key),
+        "compression": {"codec": "zlib", "level": level},
+        "schema": schema,
+        "tables": tables,
+        "chunks": chunks,
+        "raw_bytes": raw_total,
+        "bytes": sum(c["bytes"] for c in chunks),
+    }
+    with open(os.path.join(partial, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(partial, out_dir)
+
+    seconds = time.perf_counter() - t0
+    logger.info("[snapshot] exported %d chunks (%.1f MB) in %.1fs", len(chunks), manifest["bytes"] / 1e6, seconds)
+    return {"chunks": len(chunks), "bytes": manifest["bytes"], "raw_bytes": raw_total, "seconds": seconds,
+            "mb_per_sec": raw_total / 1e6 / seconds if seconds > 0 else 0.0}
+
+
+# ── import ──
+
+def read_manifest(bundle_dir: str) -> dict:
+    with open(os.path.join(bundle_dir, MANIFEST), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"unsupported snapshot format {manifest.get('format')!r}")
+    return manifest
+
+
+def _load_chunk(bundle_dir: str, chunk: dict) -> Tuple[str, List[str], List[tuple]]:
+    """Read, verify (sha256) and decode one chunk; runs in the verification pool."""
+    with open(os.path.join(bundle_dir, chunk["file"]), "rb") as f:
+        data = f.read()
+    if len(data) != chunk["bytes"] or hashlib.sha256(data).hexdigest() != chunk["sha256"]:
+        raise ValueError(f"checksum mismatch in {chunk['file']}")
+    header, _, raw = zlib.decompress(data).partition(b"\n")
+    meta = json.loads(header)
+    rows = _decode_rows(raw)
+    if meta["table"] != chunk["table"] or len(rows) != chunk["rows"]:
+        raise ValueError(f"{chunk['file']}: manifest does not match chunk contents")
+    return meta["table"], meta["columns"], rows
+
+
+def _verified_chunks(bundle_dir: str, chunks: List[dict], workers: int) -> Iterator[Tuple[str, List[str], List[tuple]]]:
+    """Verify chunks in parallel (sha256/zlib release the GIL), yield them in order, ≤ 2×workers in flight."""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        it = iter(chunks)
+        for chunk in it:
+            futures.append(pool.submit(_load_chunk, bundle_dir, chunk))
+            if len(futures) >= 2 * workers:
+                break
+        while futures:
+            result = futures.pop(0).result()
+            nxt = next(it, None)
+            if nxt is not None:
+                futures.append(pool.submit(_load_chunk, bundle_dir, nxt))
+            yield result
+
+
+def verify_snapshot(bundle_dir: str, workers: Optional[int] = None) -> dict:
+    """Check every chunk checksum and row count without importing."""
+    manifest = read_manifest(bundle_dir)
+    rows = 0
+    for _, _, chunk_rows in _verified_chunks(bundle_dir, manifest["chunks"], workers or os.cpu_count() or 1):
+        rows += len(chunk_rows)
+    return {"chunks": len(manifest["chunks"]), "rows": rows}
+
+
+def _remove_db_files(path: str):
+    for ext in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(path + ext):
+            os.remove(path + ext)
+
+
+def restore_snapshot(bundle_dir: str, db_file: str, context, id_key: bytes, workers: Optional[int] = None) -> dict:
+    """
+    Rebuild the SQLite file of a snapshot at `db_file` (atomically: written to
+    `<db_file>.importing` and renamed). Refuses bundles whose context or key
+    fingerprint does not match `context` / `id_key`.
+    """
+    manifest = read_manifest(bundle_dir)
+    if manifest["context_fingerprint"] != context_fingerprint(context):
+        raise ValueError("snapshot was made with a different CKKS context")
+    if manifest["key_fingerprint"] != key_fingerprint(id_key):
+        raise ValueError("snapshot was made with a different Fernet key")
+
+    t0 = time.perf_counter()
+    tmp = db_file + ".importing"
+    _remove_db_files(tmp)
+    os.makedirs(os.path.dirname(os.path.abspath(db_file)), exist_ok=True)
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.execute("PRAGMA synchronous = OFF")
+        for entry in manifest["schema"]:
+            if entry["type"] == "table":
+                conn.execute(entry["sql"])
+
+        counts: Dict[str, int] = {}
+        for table, columns, rows in _verified_chunks(bundle_dir, manifest["chunks"], workers or os.cpu_count() or 1):
+            cols = ", ".join(f'"{c}"' for c in columns)
+            marks = ", ".join("?" * len(columns))
+            conn.executemany(f'INSERT INTO "{table}" ({cols}) VALUES ({marks})', rows)
+            counts[table] = counts.get(table, 0) + len(rows)
+        for table, info in manifest["tables"].items():
+            if counts.get(table, 0) != info["rows"]:
+                raise ValueError(f"table {table}: expected {info['rows']} rows, got {counts.get(table, 0)}")
+
+        # 인덱스는 데이터 적재 후 한 번에 생성
+        for entry in manifest["schema"]:
+            if entry["type"] != "table":
+                conn.execute(entry["sql"])
+        conn.commit()
+    except BaseException:
+        # 검증 실패 / 중단 시 반쯤 쓴 임시 DB 를 남기지 않는다 (db_file 은 건드리지 않음)
+        conn.close()
+        _remove_db_files(tmp)
+        raise
+    conn.close()
+
+    for ext in ("-wal", "-shm"):
+        if os.path.exists(db_file + ext):
+            os.remove(db_file + ext)
+    os.replace(tmp, db_file)
+    seconds = time.perf_counter() - t0
+    logger.info("[snapshot] imported %s in %.1fs", db_file, seconds)
+    return {"rows": counts, "seconds": seconds,
+            "mb_per_sec": manifest["raw_bytes"] / 1e6 / seconds if seconds > 0 else 0.0}
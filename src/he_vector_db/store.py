@@ -1,23 +1,70 @@
 import os
+import time
+import logging
 import sqlite3
 import uuid
 import heapq
+import threading
 import tenseal as ts
 from tenseal import CKKSVector
 from cryptography.fernet import Fernet
 import numpy as np
-from tqdm import tqdm
-from typing import Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Any, List, Tuple, Optional
-import math
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import json
+from dataclasses import dataclass
+
+from .metrics import StoreProfiler, NullProfiler
+from .cache import QueryResultCache, EncryptedQueryCache, query_key
+from .filters import BlindIndex, matches_ranges
+from .snapshot import export_snapshot as _export_snapshot, restore_snapshot
+from .scheduler import QueryAutotuner, run_dynamic
+from .memory import MemoryAccountant, MemoryBudgetExceeded
+from .query_batch import EncryptedQueryBatch, context_fingerprint, encrypt_batch
+
+logger = logging.getLogger(__name__)
+
+# estimated bytes of one (id, text, score) tuple plus its float, on top of the id/text bytes
+_SCORE_BYTES = 96
+
+
+@dataclass
+class QueryProgress:
+    """One step of `HEVectorStore.query_iter`: the best hits so far after `scanned` of `total` documents."""
+    hits: List[List[Tuple[bytes, bytes, float]]]
+    scanned: int
+    total: int
+
+    @property
+    def fraction(self) -> float:
+        return self.scanned / self.total if self.total else 1.0
+
+    @property
+    def done(self) -> bool:
+        return self.scanned >= self.total
 
 
 class HEVectorStore:
+    # 문서 행 테이블과 id 순서 (PlainCorpusStore / PackedVectorStore 가 바꿔 씀); subset 과
+    # 청크 단위 스트리밍 (query_iter / query_threshold) 은 vectors 테이블 전용
+    _doc_table = "vectors"
+    _doc_order = "rowid"
+    supports_subsets = True
+    supports_streaming = True
+    # load_resident 가 한 번에 역직렬화하는 행 수
+    _resident_batch = 500
+
     def __init__(self,
                  context_path: str,
                  db_path :str,
-                 id_key_path : str):
+                 id_key_path : str,
+                 profiler: Optional[StoreProfiler] = None,
+                 result_cache: Optional[QueryResultCache] = None,
+                 numeric_buckets: Optional[Dict[str, float]] = None,
+                 chunk_size: int = 64,
+                 autotuner: Optional[QueryAutotuner] = None,
+                 memory_budget=None,
+                 query_cache: Optional[EncryptedQueryCache] = None,
+                 resident: bool = False):
         if not context_path or not os.path.exists(context_path):
             raise ValueError(f"Valid context_path required, got: {context_path}")
         if not db_path or not os.path.exists(os.path.dirname(db_path)):
@@ -25,6 +72,31 @@ class HEVectorStore:
         with open(context_path, "rb") as f:
             ctx_bytes = f.read()
         self.context = ts.context_from(ctx_bytes)
+        # 같은 키 파일로 연 store 끼리는 암호화된 쿼리(EncryptedQueryBatch / query_cache)를 공유할 수 있다
+        self.context_id = context_fingerprint(ctx_bytes)
+        self.profiler = profiler or NullProfiler()
+        # opt-in: 반복 쿼리 결과 캐시 (store version 이 바뀌면 무효)
+        self.result_cache = result_cache
+        # 스캔 스케줄: 작은 chunk 를 idle 워커가 가져감; autotuner 가 있으면 (workers, chunk) 를 자동 선택
+        self.chunk_size = chunk_size
+        self.autotuner = autotuner
+        # 메모리 회계: 바이트 수(int) 또는 여러 store 가 공유하는 MemoryAccountant
+        self.memory = memory_budget if isinstance(memory_budget, MemoryAccountant) else MemoryAccountant(memory_budget)
+        if self.memory.budget is not None and result_cache is not None:
+            # 캐시는 예산의 1/4 까지
+            cap = self.memory.budget // 4
+            result_cache.max_bytes = min(result_cache.max_bytes or cap, cap)
+        # opt-in: 암호화된 쿼리 벡터 LRU (같은 쿼리를 다시 암호화하지 않음)
+        self.query_cache = query_cache
+        if self.memory.budget is not None and query_cache is not None:
+            cap = self.memory.budget // 4
+            query_cache.max_bytes = min(query_cache.max_bytes or cap, cap)
+        # opt-in: 역직렬화된 CKKS 벡터를 메모리에 상주 (장기 실행 프로세스용, write version 이 바뀌면 새 행만 로드)
+        self.resident = resident
+        self._resident: Dict[int, Tuple[bytes, CKKSVector, bytes]] = {}
+        self._resident_version = -1
+        self._resident_bytes = 0
+        self._resident_lock = threading.Lock()
         
         # 2) 컨텍스트 검증  
         self._validate_context(expected_scale=self.context.global_scale)    
@@ -36,6 +108,8 @@ class HEVectorStore:
         self.id_key_path = id_key_path
         self.id_key = id_key
         self.fernet = Fernet(self.id_key)
+        # metadata blind tags (HMAC key derived from the Fernet key) + numeric bucket widths
+        self.blind_index = BlindIndex(self.id_key, numeric_buckets)
         
         # 4) DB 경로 설정
         if not db_path.endswith('.db'):
@@ -45,13 +119,15 @@ class HEVectorStore:
             # db_path가 정확한 파일 경로일 경우 → 그대로 사용
             self.db_path = db_path
 
-        
-        print(f"[INIT] HEVectorStore @ {self.db_path}")
+
+        logger.info("[INIT] HEVectorStore @ %s", self.db_path)
 
         # ✅ DB 파일 경로의 상위 디렉터리 생성
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
         self.conn = sqlite3.connect(self.db_path)
         self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        # self.conn 은 스레드 간 공유 → 쓰기 트랜잭션과 version/count 조회를 직렬화 (query 스캔은 별도 연결)
+        self._lock = threading.Lock()
         self._init_db()
 
     def load_or_create_fernet_key(self,key_path: str) -> bytes:
@@ -85,8 +161,8 @@ class HEVectorStore:
 
         # 2) global_scale 검증/수정
         if getattr(self.context, "global_scale", None) != expected_scale:
-            print(f"[validate] resetting scale "
-                  f"{getattr(self.context, 'global_scale', None)} → {expected_scale}")
+            logger.warning("[validate] resetting scale %s → %s",
+                           getattr(self.context, 'global_scale', None), expected_scale)
             self.context.global_scale = expected_scale
 
         # 3) secret key 포함 여부 확인
@@ -97,32 +173,83 @@ class HEVectorStore:
         except Exception as e:
             raise RuntimeError("Context does not include a valid secret key") from e
 
-        print("[validate] context OK")
+        logger.debug("[validate] context OK")
 
-    def add(self, texts=None, ids=None, embeddings=None, documents=None):
+    def add(self, texts=None, ids=None, embeddings=None, documents=None, metadatas=None, subset=None):
         """
         텍스트 또는 주어진 embeddings/documents를 암호화하여 저장합니다.
         벡터 정규화, ID/text 암호화, DB 저장까지 포함.
+        metadatas[i] (dict) 는 Fernet 으로 암호화해 저장하고, 필터용 blind tag /
+        numeric bucket 을 인덱스 테이블에 기록합니다.
+        이미 저장된 id (keyed id_tag 로 판별) 는 다시 암호화하지 않고 기존 행을 재사용하며,
+        `subset` 이 주어지면 새 문서와 재사용된 문서 모두 그 subset 에 등록됩니다.
+        재사용된 id 의 이번 호출 embedding / document / metadata 는 저장되지 않으므로,
+        그 id 목록을 반환합니다 (모두 새로 저장됐으면 빈 리스트).
         """
-
+        prof = self.profiler
 
         # embeddings 가 없으면 모델로부터 생성
         raw_texts = documents if documents is not None else texts or []
 
-        
-        print(f"[ADD] will insert {len(embeddings)} vectors")
-
+        logger.debug("[ADD] will insert %d vectors", len(embeddings))
+
+        self._check_subset(subset)
+        t_wait = time.perf_counter()
+        with self._lock, self.memory.operation("add") as mem:
+            prof.record("write_lock_wait", time.perf_counter() - t_wait)
+            try:
+                skipped = self._add_locked(raw_texts, ids, embeddings, metadatas, subset)
+                # 쓰기마다 version 증가 → 이전 version 으로 캐시된 결과는 더 이상 반환되지 않음
+                self._bump_version(self.conn.cursor())
+                with prof.timer("sqlite_commit"):
+                    self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+        added = len(embeddings) - len(skipped)
+        prof.set_gauge("mem_peak_add_bytes", mem["peak"])
+        prof.incr("docs_added", added)
+        prof.incr("docs_reused", len(skipped))
+        if skipped:
+            # id 는 평문이므로 로그에는 개수만 남긴다
+            logger.info("[ADD] %d of %d ids already stored; kept their existing rows", len(skipped), len(embeddings))
+        logger.debug("[ADD] committed %d vectors (%d already stored)", added, len(skipped))
+        return skipped
+
+    def _add_locked(self, raw_texts, ids, embeddings, metadatas, subset=None) -> List[str]:
+        """
+        Body of add(): encrypt and insert one batch; the caller holds self._lock,
+        bumps the version and commits (or rolls back if this raises).
+        Subclasses with their own layout override this hook only.
+        Returns the ids that were already stored and left unchanged.
+        """
+        prof = self.profiler
         cur = self.conn.cursor()
-        before = self.count()
-        print(f"[ADD] count before = {before}")
+        t_fernet = t_encrypt = 0.0
+        raw_ids = list(ids) if ids else [str(uuid.uuid4()) for _ in range(len(embeddings))]
+        tags = [self.blind_index.id_tag(raw_id) for raw_id in raw_ids]
+        existing = self._rowids_for_tags(cur, tags)
+        members = []
+        skipped: List[str] = []
+        added = 0
 
         for idx, vec in enumerate(embeddings):
-            raw_id   = ids[idx] if ids else str(uuid.uuid4())
+            raw_id   = raw_ids[idx]
             raw_text = raw_texts[idx] if idx < len(raw_texts) else ""
+            rowid = existing.get(tags[idx])
+            if rowid is not None:
+                # 이미 저장된 문서 → ciphertext 재사용
+                members.append(rowid)
+                skipped.append(raw_id)
+                continue
 
             # Encrypt ID/text
+            t0 = time.perf_counter()
             enc_id   = self.fernet.encrypt(raw_id.encode()) if self.fernet else raw_id.encode()
             enc_text = self.fernet.encrypt(raw_text.encode()) if self.fernet else raw_text.encode()
+            meta = metadatas[idx] if metadatas else None
+            enc_meta = self.fernet.encrypt(json.dumps(meta).encode()) if meta else None
+            t1 = time.perf_counter()
 
             # Normalize vector
             arr = np.array(vec, dtype=float)
@@ -133,16 +260,36 @@ class HEVectorStore:
             # Encrypt vector
             enc_vec = ts.ckks_vector(self.context, arr.tolist())
             blob    = enc_vec.serialize()
-            # Write to DB
-            cur.execute(
-                'REPLACE INTO vectors (id, ciphertext, text_enc) VALUES (?, ?, ?)',
-                (enc_id, blob, enc_text)
-            )
-
-        # Commit & final count
-        self.conn.commit()
-        after = self.count()
-        print(f"[ADD] committed, count after = {after}")
+            t_fernet += t1 - t0
+            t_encrypt += time.perf_counter() - t1
+            # Write to DB (row bytes are live until SQLite has copied them)
+            row_bytes = len(blob) + len(enc_id) + len(enc_text) + (len(enc_meta) if enc_meta else 0)
+            with self.memory.hold("blobs", row_bytes):
+                cur.execute(
+                    'INSERT INTO vectors (id, ciphertext, text_enc, meta_enc, id_tag) VALUES (?, ?, ?, ?, ?)',
+                    (enc_id, blob, enc_text, enc_meta, tags[idx])
+                )
+            existing[tags[idx]] = cur.lastrowid
+            members.append(cur.lastrowid)
+            added += 1
+            if meta:
+                self._index_metadata(cur, cur.lastrowid, meta)
+
+        if subset is not None:
+            cur.executemany("INSERT OR IGNORE INTO vector_subsets (name, doc_rowid) VALUES (?, ?)",
+                            [(subset, r) for r in members])
+        prof.record("fernet", t_fernet, 2 * added)
+        prof.record("encrypt_vector", t_encrypt, added)
+        return skipped
+
+    @staticmethod
+    def _rowids_for_tags(cur, tags: List[bytes]) -> Dict[bytes, int]:
+        found = {}
+        for i in range(0, len(tags), 500):
+            part = tags[i:i + 500]
+            cur.execute(f"SELECT id_tag, rowid FROM vectors WHERE id_tag IN ({','.join('?' * len(part))})", part)
+            found.update((bytes(t), r) for t, r in cur.fetchall())
+        return found
 
     def _search_chunk(
         self,
@@ -151,22 +298,33 @@ class HEVectorStore:
         chunk_id: int
     ) -> List[List[Tuple[bytes, bytes, float]]]:
         """
-        Process one chunk of documents with a tqdm progress bar.
+        Process one chunk of documents.
+        Stage times are accumulated locally and reported once per chunk
+        so the profiler adds no per-document overhead.
         """
         num_q = len(enc_queries)
         partial = [[] for _ in range(num_q)]
-        for enc_id, blob, enc_txt in tqdm(
-            docs,
-            desc=f"Chunk {chunk_id}",
-            position=chunk_id,
-            leave=False,
-            unit="doc"
-        ):
-            enc_vec = CKKSVector.load(self.context, blob)
+        t_load = t_dot = t_dec = 0.0
+        perf = time.perf_counter
+        for enc_id, blob, enc_txt in docs:
+            t0 = perf()
+            # resident rows already hold the live ciphertext
+            enc_vec = blob if isinstance(blob, CKKSVector) else CKKSVector.load(self.context, blob)
+            t_load += perf() - t0
             for qi, enc_q in enumerate(enc_queries):
-                raw = enc_q.dot(enc_vec).decrypt()[0]
+                t0 = perf()
+                prod = enc_q.dot(enc_vec)
+                t1 = perf()
+                raw = prod.decrypt()[0]
+                t_dot += t1 - t0
+                t_dec += perf() - t1
                 partial[qi].append((enc_id, enc_txt, raw))
             del enc_vec
+
+        prof = self.profiler
+        prof.record("ckks_load", t_load, len(docs))
+        prof.record("dot", t_dot, len(docs) * num_q)
+        prof.record("decrypt", t_dec, len(docs) * num_q)
         return partial
     
 
@@ -174,54 +332,367 @@ class HEVectorStore:
         self,
         embeddings: List[List[float]],
         n_results: int = 5,
-        max_workers: Optional[int] = None
+        max_workers: Optional[int] = None,
+        where: Optional[Dict[str, Any]] = None,
+        subset: Optional[str] = None
     ) -> List[List[Tuple[bytes, bytes, float]]]:
         """
-        Parallel batch HE search with per-chunk tqdm bars.
+        Parallel batch HE search.
+        With a result_cache, queries already answered at the current store
+        version are served from the cache and only the misses are scanned.
+        `where` (e.g. {"category": "tax", "year": {"$gte": 2020}}) narrows the
+        candidate rows through the blind-tag index before any ciphertext is read.
+        `subset` restricts the scan to the rows registered under that name by add().
+        `embeddings` may also be an EncryptedQueryBatch from `encrypt_queries`,
+        which skips query encryption.
         """
-        if not embeddings:
+        if len(embeddings) == 0:
             return []
+        cache = self.result_cache
+        if cache is None:
+            return self._scan(embeddings, n_results, max_workers, where=where, subset=subset)
+
+        version = self.version()
+        where_key = json.dumps(where, sort_keys=True, default=str) if where else None
+        vectors = embeddings.vectors if isinstance(embeddings, EncryptedQueryBatch) else embeddings
+        keys = [query_key(vec, n_results, where_key, subset) for vec in vectors]
+        results: List[Optional[list]] = [cache.get(k, version) for k in keys]
+        misses = [i for i, r in enumerate(results) if r is None]
+        self.profiler.incr("cache_hits", len(embeddings) - len(misses))
+        self.profiler.incr("cache_misses", len(misses))
+        if misses:
+            t0 = time.perf_counter()
+            if isinstance(embeddings, EncryptedQueryBatch):
+                pending = embeddings.select(misses)
+            else:
+                pending = [embeddings[i] for i in misses]
+            scanned = self._scan(pending, n_results, max_workers, where=where, subset=subset)
+            cache.record_miss_cost((time.perf_counter() - t0) / len(misses))
+            for i, res in zip(misses, scanned):
+                cache.put(keys[i], version, res)
+                results[i] = res
+        return [list(r) for r in results]
+
+    def _scan(
+        self,
+        embeddings: List[List[float]],
+        n_results: int,
+        max_workers: Optional[int],
+        where: Optional[Dict[str, Any]] = None,
+        subset: Optional[str] = None
+    ) -> List[List[Tuple[bytes, bytes, float]]]:
+        """
+        Encrypted scan of every stored document (or only those matching `where` / in `subset`) for each query.
+        Ciphertexts are read from SQLite chunk by chunk and each chunk keeps only its
+        top-`n_results` per query, so memory is bounded by the chunks in flight.
+        """
+        with self.memory.operation("query") as mem:
+            results, n_docs = self._scan_accounted(embeddings, n_results, max_workers, where, subset)
+        self.profiler.set_gauge("mem_peak_query_bytes", mem["peak"])
+        self.profiler.incr("queries", len(embeddings))
+        self.profiler.incr("docs_scanned", n_docs)
+        return results
 
-        # 1) normalize & encrypt queries
-        enc_queries = []
-        for vec in embeddings:
-            arr = np.array(vec, dtype=float)
-            norm = np.linalg.norm(arr)
-            if norm > 0:
-                arr /= norm
-            enc_queries.append(ts.ckks_vector(self.context, arr.tolist()))
-
-        # 2) load docs once
+    def _scan_accounted(self, embeddings, n_results, max_workers, where, subset) -> Tuple[List[list], int]:
+        prof = self.profiler
+        num_q = len(embeddings)
+
+        # 1) candidate rowids (ints only) + row size estimate
+        with prof.timer("fetch_rows"):
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            cur = conn.cursor()
+            rowids = self._candidate_rowids(cur, where, subset)
+            if rowids is None:
+                rowids = [r for (r,) in cur.execute("SELECT rowid FROM vectors ORDER BY rowid")]
+            doc_bytes, ct_bytes = self._row_sizes(cur)
+            conn.close()
+        if not rowids:
+            return [[] for _ in range(len(embeddings))], 0
+        # after the candidates: the resident copy then covers every rowid in the list
+        resident = self.load_resident() if self.resident else None
+
+        # 2) dynamic chunk scheduling, shrunk to the memory budget if needed
+        tuner = self.autotuner if max_workers is None else None
+        if tuner is not None:
+            workers, chunk_sz = tuner.plan()
+        else:
+            workers, chunk_sz = max_workers or (os.cpu_count() or 4), self.chunk_size
+        # fixed: encrypted queries + the running top-k (≈ id/text bytes per hit)
+        query_bytes = num_q * ct_bytes
+        topk_bytes = num_q * n_results * (doc_bytes - ct_bytes + _SCORE_BYTES)
+        in_flight_doc = num_q * _SCORE_BYTES + (0 if resident is not None else doc_bytes)
+        planned = self.memory.plan_scan(workers, chunk_sz, in_flight_doc, query_bytes + topk_bytes)
+        if planned != (workers, chunk_sz):
+            if tuner is not None:
+                tuner.discard(workers, chunk_sz)
+                tuner = None
+            workers, chunk_sz = planned
+
+        # 3) normalize & encrypt queries
+        mem = self.memory
+        mem.reserve("ciphertexts", query_bytes)
+        # running top-k per query of (score, -position, hit): same order as a stable global sort
+        heaps: List[List[tuple]] = [[] for _ in range(len(embeddings))]
+        heap_bytes = [0]
+        merge_lock = threading.Lock()
+        local = threading.local()
+        conns = []
+        try:
+            enc_queries = self._encrypt_queries(embeddings)
+
+            def work(start: int, stop: int) -> int:
+                if resident is not None:
+                    return score([resident[r] for r in rowids[start:stop]], start, 0)
+                wconn = getattr(local, "conn", None)
+                if wconn is None:
+                    wconn = local.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                    with merge_lock:
+                        conns.append(wconn)
+                t0 = time.perf_counter()
+                docs = [row for part in self._doc_batches(wconn.cursor(), rowids[start:stop], 500) for row in part]
+                prof.record("fetch_rows", time.perf_counter() - t0, len(docs))
+                return score(docs, start, sum(len(i) + len(b) + len(t or b"") for i, b, t in docs))
+
+            def score(docs: List[tuple], start: int, in_flight: int) -> int:
+                # one deserialized ciphertext at a time, unless the rows are resident already
+                live_ct = 0 if resident is not None else ct_bytes
+                with mem.hold("blobs", in_flight), mem.hold("ciphertexts", live_ct), \
+                        mem.hold("results", len(docs) * num_q * _SCORE_BYTES):
+                    part = self._search_chunk(docs, enc_queries, start // chunk_sz)
+                    t0 = time.perf_counter()
+                    with merge_lock:
+                        delta = 0
+                        for heap, scores in zip(heaps, part):
+                            for i, hit in enumerate(scores):
+                                item = (hit[2], -(start + i), hit)
+                                if len(heap) < n_results:
+                                    heapq.heappush(heap, item)
+                                elif item[:2] > heap[0][:2]:
+                                    item = heapq.heapreplace(heap, item)
+                                    delta -= len(item[2][0]) + len(item[2][1] or b"") + _SCORE_BYTES
+                                else:
+                                    continue
+                                delta += len(hit[0]) + len(hit[1] or b"") + _SCORE_BYTES
+                        heap_bytes[0] += delta
+                        mem.reserve("results", delta)
+                    prof.record("topk_merge", time.perf_counter() - t0, num_q)
+                return len(docs)
+
+            t0 = time.perf_counter()
+            done = run_dynamic(len(rowids), chunk_sz, workers, work)
+            scan_time = time.perf_counter() - t0
+            if tuner is not None:
+                tuner.observe(workers, chunk_sz, len(rowids) * num_q, scan_time,
+                              [(n, sec) for _, n, sec in done])
+            prof.set_gauge("workers", workers)
+            prof.set_gauge("chunk_size", chunk_sz)
+
+            # 4) Top-K per query
+            results = [[h for _, _, h in sorted(heap, reverse=True)] for heap in heaps]
+        finally:
+            for c in conns:
+                c.close()
+            mem.release("results", heap_bytes[0])
+            mem.release("ciphertexts", query_bytes)
+        return results, len(rowids)
+
+    def load_resident(self) -> Dict[int, Tuple[bytes, CKKSVector, bytes]]:
+        """
+        Bring the resident copy (rowid → (id, live ciphertext, text)) up to the
+        current write version: rows added since the last load are deserialized,
+        and the whole copy is rebuilt if rows were replaced. The bytes are held
+        under the "resident" memory category; MemoryBudgetExceeded if they do not fit.
+        """
+        with self._resident_lock:
+            version = self.version()
+            if self._resident_version == version:
+                return self._resident
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            try:
+                cur = conn.cursor()
+                total = cur.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+                last = max(self._resident, default=0)
+                new = cur.execute("SELECT COUNT(*) FROM vectors WHERE rowid > ?", (last,)).fetchone()[0]
+                if total != len(self._resident) + new:
+                    self._drop_resident()
+                    last = 0
+                need = cur.execute(
+                    "SELECT COALESCE(SUM(length(id) + length(ciphertext) + COALESCE(length(text_enc), 0)), 0) "
+                    "FROM vectors WHERE rowid > ?", (last,)
+                ).fetchone()[0]
+                budget = self.memory.budget
+                if budget is not None and self.memory.total + need > budget:
+                    raise MemoryBudgetExceeded(
+                        f"resident corpus needs {need} B more; memory budget {budget} B has "
+                        f"{max(budget - self.memory.total, 0)} B free")
+                # 전체 재구성 시에도 새 dict 에 모은 뒤 교체 → 진행 중인 스캔은 이전 dict 를 계속 본다
+                loaded = dict(self._resident)
+                added = 0
+                cur.execute("SELECT rowid, id, ciphertext, text_enc FROM vectors WHERE rowid > ? ORDER BY rowid",
+                            (last,))
+                try:
+                    with self.profiler.timer("resident_load", new):
+                        while True:
+                            rows = cur.fetchmany(self._resident_batch)
+                            if not rows:
+                                break
+                            for rowid, enc_id, blob, enc_txt in rows:
+                                loaded[rowid] = (enc_id, CKKSVector.load(self.context, blob), enc_txt)
+                            nbytes = sum(len(i) + len(b) + len(t or b"") for _, i, b, t in rows)
+                            self.memory.reserve("resident", nbytes)
+                            added += nbytes
+                except BaseException:
+                    # 도중 실패: 이번 로드분 예약만 되돌리고 기존 resident 사본 / 버전은 그대로 둔다
+                    self.memory.release("resident", added)
+                    raise
+            finally:
+                conn.close()
+            self._resident = loaded
+            self._resident_bytes += added
+            self._resident_version = version
+            self.profiler.set_gauge("resident_docs", len(loaded))
+            self.profiler.set_gauge("resident_bytes", self._resident_bytes)
+            return loaded
+
+    def _drop_resident(self):
+        self.memory.release("resident", self._resident_bytes)
+        self._resident, self._resident_bytes, self._resident_version = {}, 0, -1
+
+    def _row_sizes(self, cur) -> Tuple[int, int]:
+        """Largest (row bytes, ciphertext bytes) in a sample of stored rows; a live ciphertext is assumed ≈ its blob."""
+        cur.execute(
+            "SELECT MAX(length(id) + length(ciphertext) + COALESCE(length(text_enc), 0)), MAX(length(ciphertext)) "
+            "FROM (SELECT id, ciphertext, text_enc FROM vectors LIMIT 32)"
+        )
+        row_bytes, ct_bytes = cur.fetchone()
+        return int(row_bytes or 0), int(ct_bytes or 0)
+
+    def encrypt_queries(self, embeddings: List[List[float]], max_workers: Optional[int] = None) -> EncryptedQueryBatch:
+        """
+        Normalise and encrypt a query batch once, for reuse across `query`,
+        `query_iter`, `query_threshold` calls and other stores (or a
+        QueryCoordinator) opened with the same context. Vectors already in
+        `query_cache` are not re-encrypted; the rest are encrypted in parallel.
+        """
+        return encrypt_batch(self.context, self.context_id, embeddings,
+                             cache=self.query_cache, max_workers=max_workers, profiler=self.profiler)
+
+    def _encrypt_queries(self, embeddings) -> List[CKKSVector]:
+        if isinstance(embeddings, EncryptedQueryBatch):
+            embeddings.check_context(self.context_id, self.db_path)
+            return embeddings.ciphertexts
+        return self.encrypt_queries(embeddings).ciphertexts
+
+    def _doc_batches(self, cur, rowids: Optional[List[int]], batch: int) -> Iterator[List[Tuple[bytes, bytes, bytes]]]:
+        """(id, ciphertext, text_enc) rows of `rowids` (None → every document), `batch` at a time, in rowid order."""
+        if rowids is not None:
+            for i in range(0, len(rowids), batch):
+                part = rowids[i:i + batch]
+                cur.execute(
+                    f"SELECT id, ciphertext, text_enc FROM vectors WHERE rowid IN ({','.join('?' * len(part))}) "
+                    "ORDER BY rowid",
+                    part
+                )
+                yield cur.fetchall()
+        else:
+            cur.execute("SELECT id, ciphertext, text_enc FROM vectors ORDER BY rowid")
+            while True:
+                rows = cur.fetchmany(batch)
+                if not rows:
+                    return
+                yield rows
+
+    def _stream_chunks(
+        self,
+        embeddings: List[List[float]],
+        chunk_size: Optional[int],
+        where: Optional[Dict[str, Any]],
+        subset: Optional[str] = None
+    ) -> Iterator[Tuple[int, int, List[List[Tuple[bytes, bytes, float]]]]]:
+        """
+        Score the candidate documents chunk by chunk in the caller's thread,
+        reading ciphertexts from SQLite as they are needed.
+        Yields (docs scanned so far, total candidates, per-query scores of the chunk).
+        """
+        self._check_streaming()
+        prof = self.profiler
+        enc_queries = self._encrypt_queries(embeddings)
         conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        cur  = conn.cursor()
-        cur.execute("SELECT id, ciphertext, text_enc FROM vectors")
-        docs = cur.fetchall()
-        conn.close()
-
-        # 3) split into chunks
-        workers   = max_workers or (os.cpu_count() or 4)
-        chunk_sz  = math.ceil(len(docs) / workers)
-        doc_chunks = [docs[i:i+chunk_sz] for i in range(0, len(docs), chunk_sz)]
-
-        # 4) parallel execution with per-chunk bars
-        all_scores = [[] for _ in embeddings]
-        with ThreadPoolExecutor(max_workers=workers) as exe:
-            futures = {
-                exe.submit(self._search_chunk, chunk, enc_queries, idx): idx
-                for idx, chunk in enumerate(doc_chunks)
-            }
-            for fut in as_completed(futures):
-                part = fut.result()
-                for qi, lst in enumerate(part):
-                    all_scores[qi].extend(lst)
-
-        # 5) Top-K per query
-        results = []
-        for scores in all_scores:
-            topk = sorted(scores, key=lambda x: -x[2])[:n_results]
-            results.append(topk)
+        try:
+            cur = conn.cursor()
+            rowids = self._candidate_rowids(cur, where, subset)
+            if rowids is not None:
+                total = len(rowids)
+            else:
+                total = cur.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+            scanned = 0
+            for docs in self._doc_batches(cur, rowids, chunk_size or self.chunk_size):
+                with self.memory.hold("blobs", sum(len(i) + len(b) + len(t or b"") for i, b, t in docs)):
+                    part = self._search_chunk(docs, enc_queries, scanned)
+                scanned += len(docs)
+                prof.incr("docs_scanned", len(docs))
+                yield scanned, total, part
+        finally:
+            conn.close()
+            prof.incr("queries", len(embeddings))
+
+    def query_iter(
+        self,
+        embeddings: List[List[float]],
+        n_results: int = 5,
+        chunk_size: Optional[int] = None,
+        where: Optional[Dict[str, Any]] = None,
+        subset: Optional[str] = None
+    ) -> Iterator[QueryProgress]:
+        """
+        Streaming variant of `query`: yields a QueryProgress after every chunk
+        of `chunk_size` documents with the top-`n_results` hits seen so far.
+        The last item has `done == True` and equals what `query` returns.
+        Closing the generator (or breaking out of the loop) stops the scan.
+        The result cache is not consulted.
+        """
+        if len(embeddings) == 0:
+            return
+        # min-heap per query of (score, -position, hit): ties keep the earlier document, like `query`
+        heaps: List[List[tuple]] = [[] for _ in range(len(embeddings))]
+        emitted = False
+        for scanned, total, part in self._stream_chunks(embeddings, chunk_size, where, subset):
+            offset = scanned - len(part[0])
+            for heap, scores in zip(heaps, part):
+                for i, hit in enumerate(scores):
+                    item = (hit[2], -(offset + i), hit)
+                    if len(heap) < n_results:
+                        heapq.heappush(heap, item)
+                    elif item[:2] > heap[0][:2]:
+                        heapq.heapreplace(heap, item)
+            emitted = True
+            yield QueryProgress([[h for _, _, h in sorted(heap, reverse=True)] for heap in heaps], scanned, total)
+        if not emitted:
+            yield QueryProgress([[] for _ in range(len(embeddings))], 0, 0)
+
+    def query_threshold(
+        self,
+        embeddings: List[List[float]],
+        min_score: float,
+        chunk_size: Optional[int] = None,
+        where: Optional[Dict[str, Any]] = None,
+        subset: Optional[str] = None
+    ) -> Iterator[Tuple[int, Tuple[bytes, bytes, float]]]:
+        """
+        Range search: yields (query index, (id, text, score)) for every document
+        whose cosine score is >= `min_score`, in document order, as each chunk
+        is scored. Only one chunk of scores is held at a time. Scores are CKKS
+        approximations (error ~1e-6), so documents right at the cutoff may fall
+        on either side of it.
+        """
+        if len(embeddings) == 0:
+            return
+        for _, _, part in self._stream_chunks(embeddings, chunk_size, where, subset):
+            for qi, scores in enumerate(part):
+                for hit in scores:
+                    if hit[2] >= min_score:
+                        yield qi, hit
 
-        return results
     def _init_db(self):
         cur = self.conn.cursor()
         cur.execute('''
@@ -231,36 +702,231 @@ class HEVectorStore:
                 text_enc BLOB
             )
         ''')
+        # 쓰기 version 카운터 (쿼리 결과 캐시 무효화용)
+        cur.execute('''
+            CREATE TABLE IF NOT EXISTS store_meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            )
+        ''')
         # Optional pragmas for performance
         cur.execute('PRAGMA journal_mode = WAL;')
         cur.execute('PRAGMA synchronous = NORMAL;')
+        cur.execute("INSERT OR IGNORE INTO store_meta (key, value) VALUES ('version', 0)")
+        # 메타데이터: Fernet 암호화 원문 + 필터용 blind tag / numeric bucket 인덱스
+        cur.execute("PRAGMA table_info(vectors)")
+        if "meta_enc" not in {row[1] for row in cur.fetchall()}:
+            cur.execute("ALTER TABLE vectors ADD COLUMN meta_enc BLOB")
+        cur.execute('''
+            CREATE TABLE IF NOT EXISTS vector_tags (
+                doc_rowid INTEGER NOT NULL,
+                key_tag BLOB NOT NULL,
+                value_tag BLOB NOT NULL
+            )
+        ''')
+        cur.execute('CREATE INDEX IF NOT EXISTS idx_vector_tags ON vector_tags (key_tag, value_tag)')
+        cur.execute('''
+            CREATE TABLE IF NOT EXISTS vector_buckets (
+                doc_rowid INTEGER NOT NULL,
+                key_tag BLOB NOT NULL,
+                bucket INTEGER NOT NULL
+            )
+        ''')
+        cur.execute('CREATE INDEX IF NOT EXISTS idx_vector_buckets ON vector_buckets (key_tag, bucket)')
+        # 문서 id 의 keyed tag (중복 암호화 방지) + 이름 붙은 subset (샘플 크기별 view)
+        cur.execute("PRAGMA table_info(vectors)")
+        if "id_tag" not in {row[1] for row in cur.fetchall()}:
+            cur.execute("ALTER TABLE vectors ADD COLUMN id_tag BLOB")
+        self._backfill_id_tags(cur)
+        cur.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_vectors_id_tag ON vectors (id_tag)')
+        cur.execute('''
+            CREATE TABLE IF NOT EXISTS vector_subsets (
+                name TEXT NOT NULL,
+                doc_rowid INTEGER NOT NULL,
+                PRIMARY KEY (name, doc_rowid)
+            )
+        ''')
         self.conn.commit()
 
-    def count(self):
-        """Return total number of stored vectors."""
+    def _backfill_id_tags(self, cur):
+        """Tag rows written before id_tag existed; a repeated id keeps NULL (the old REPLACE never deduped)."""
+        cur.execute("SELECT rowid, id FROM vectors WHERE id_tag IS NULL ORDER BY rowid")
+        rows = cur.fetchall()
+        if not rows:
+            return
+        cur.execute("SELECT id_tag FROM vectors WHERE id_tag IS NOT NULL")
+        seen = {bytes(t) for (t,) in cur.fetchall()}
+        updates = []
+        for rowid, enc_id in rows:
+            tag = self.blind_index.id_tag(self.fernet.decrypt(enc_id).decode())
+            if tag not in seen:
+                seen.add(tag)
+                updates.append((tag, rowid))
+        cur.executemany("UPDATE vectors SET id_tag = ? WHERE rowid = ?", updates)
+        logger.info("[INIT] tagged %d existing rows (%d duplicate ids left untagged)", len(updates), len(rows) - len(updates))
+
+    def _index_metadata(self, cur, rowid: int, metadata: Dict[str, Any]):
+        """Write the blind tags / numeric buckets of one document."""
+        tags, buckets = self.blind_index.rows_for(metadata)
+        cur.executemany("INSERT INTO vector_tags (doc_rowid, key_tag, value_tag) VALUES (?, ?, ?)",
+                        [(rowid, k, v) for k, v in tags])
+        cur.executemany("INSERT INTO vector_buckets (doc_rowid, key_tag, bucket) VALUES (?, ?, ?)",
+                        [(rowid, k, b) for k, b in buckets])
+
+    def _candidate_rowids(self, cur, where: Optional[Dict[str, Any]], subset: Optional[str]) -> Optional[List[int]]:
+        """Sorted rowids allowed by `where` and `subset`; None when neither restricts the scan."""
+        rowids = self._filter_rowids(cur, where) if where else None
+        if subset is None:
+            return rowids
+        members = self._subset_rowids(cur, subset)
+        if rowids is None:
+            return members
+        keep = set(members)
+        return [r for r in rowids if r in keep]
+
+    def _subset_rowids(self, cur, name: str) -> List[int]:
+        cur.execute("SELECT doc_rowid FROM vector_subsets WHERE name = ? ORDER BY doc_rowid", (name,))
+        rowids = [r for (r,) in cur.fetchall()]
+        if not rowids:
+            raise ValueError(f"Unknown or empty subset: {name!r}")
+        return rowids
+
+    def subsets(self) -> Dict[str, int]:
+        """Subset name → number of documents."""
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute("SELECT name, COUNT(*) FROM vector_subsets GROUP BY name ORDER BY name")
+            return dict(cur.fetchall())
+
+    def _filter_rowids(self, cur, where: Dict[str, Any]) -> List[int]:
+        """
+        Candidate rowids for `where` from the tag/bucket indexes only; rows from
+        range buckets are checked exactly against their decrypted metadata.
+        """
+        sql, params, checks = self.blind_index.compile(where)
+        cur.execute(sql, params)
+        # a list-valued key can match several of its tags ($in) → one rowid per matching tag
+        rowids = sorted({r for (r,) in cur.fetchall()})
+        if not checks or not rowids:
+            return rowids
+        kept = []
+        for i in range(0, len(rowids), 500):
+            part = rowids[i:i + 500]
+            cur.execute(f"SELECT rowid, meta_enc FROM vectors WHERE rowid IN ({','.join('?' * len(part))})", part)
+            for rowid, enc_meta in cur.fetchall():
+                meta = json.loads(self.fernet.decrypt(enc_meta)) if enc_meta else {}
+                if matches_ranges(meta, checks):
+                    kept.append(rowid)
+        return sorted(kept)
+
+    def _bump_version(self, cur):
+        """Increment the write version inside the caller's transaction (add, and any future delete)."""
+        cur.execute("UPDATE store_meta SET value = value + 1 WHERE key = 'version'")
+
+    def version(self) -> int:
+        """Current write version; changes whenever stored vectors change."""
+        with self._lock:
+            return self._read_version(self.conn.cursor())
+
+    @staticmethod
+    def _read_version(cur) -> int:
+        cur.execute("SELECT value FROM store_meta WHERE key = 'version'")
+        row = cur.fetchone()
+        return row[0] if row is not None else 0
+
+    def autotune_stats(self) -> dict:
+        """Autotuner trials and the settled (workers, chunk_size) ({} when disabled)."""
+        return self.autotuner.stats() if self.autotuner is not None else {}
+
+    def memory_stats(self) -> dict:
+        """Accounted bytes now, overall peak and last/max peak per operation ("query", "add")."""
+        return self.memory.stats()
+
+    def query_cache_stats(self) -> dict:
+        """Encrypted-query cache entries, bytes and hit rate ({} when disabled)."""
+        return self.query_cache.stats() if self.query_cache is not None else {}
+
+    def cache_stats(self) -> dict:
+        """Result-cache entries, hit rate, evictions and estimated scan time saved ({} when disabled)."""
+        return self.result_cache.stats() if self.result_cache is not None else {}
+
+    def _check_subset(self, subset: Optional[str]):
+        if subset is not None and not self.supports_subsets:
+            raise ValueError(f"subsets are not supported by {type(self).__name__}")
+
+    def _check_streaming(self):
+        if not self.supports_streaming:
+            raise ValueError(f"streaming queries are not supported by {type(self).__name__}; use query()")
+
+    def count(self, subset: Optional[str] = None):
+        """Return total number of stored vectors (or of those in `subset`)."""
         if self.conn is None:
             return 0
+        self._check_subset(subset)
 
-        cur = self.conn.cursor()
         try:
-            cur.execute('SELECT COUNT(*) FROM vectors')
-            row = cur.fetchone()
+            with self._lock:
+                cur = self.conn.cursor()
+                if subset is not None:
+                    cur.execute('SELECT COUNT(*) FROM vector_subsets WHERE name = ?', (subset,))
+                else:
+                    cur.execute(f'SELECT COUNT(*) FROM {self._doc_table}')
+                row = cur.fetchone()
             return row[0] if row is not None else 0
         except sqlite3.OperationalError as e:
             # vectors 테이블이 아직 없으면 0으로 처리
-            print(f"[count] Warning: {e}")
+            logger.warning("[count] %s", e)
             return 0
 
-    def get_all_ids(self):
-        """Return all encrypted IDs from the store."""
+    def get_all_ids(self, subset: Optional[str] = None):
+        """Return all encrypted IDs from the store (or from `subset`)."""
         if self.conn is None:
             return []
-        cur = self.conn.cursor()
-        cur.execute('SELECT id FROM vectors')
-        return [row[0] for row in cur.fetchall()]
+        self._check_subset(subset)
+        with self._lock:
+            cur = self.conn.cursor()
+            if subset is not None:
+                cur.execute('SELECT v.id FROM vector_subsets s JOIN vectors v ON v.rowid = s.doc_rowid '
+                            'WHERE s.name = ? ORDER BY v.rowid', (subset,))
+            else:
+                cur.execute(f'SELECT id FROM {self._doc_table} ORDER BY {self._doc_order}')
+            return [row[0] for row in cur.fetchall()]
+
+    def export_snapshot(self, out_dir: str, chunk_bytes: int = 32 * 1024 * 1024, level: int = 1) -> dict:
+        """
+        Write a consistent, zlib-compressed, chunked snapshot bundle of this store
+        (manifest + sha256 per chunk + context/key fingerprints) to `out_dir`.
+        """
+        return _export_snapshot(self, out_dir, chunk_bytes=chunk_bytes, level=level)
+
+    @classmethod
+    def import_snapshot(cls,
+                        bundle_dir: str,
+                        context_path: str,
+                        db_path: str,
+                        id_key_path: str,
+                        workers: Optional[int] = None,
+                        **kwargs) -> "HEVectorStore":
+        """
+        Restore a bundle written by export_snapshot into `db_path` (chunks are
+        verified in parallel) and open it. The context and Fernet key must be the
+        ones the snapshot was made with; they are not part of the bundle.
+        """
+        if not os.path.exists(id_key_path):
+            raise ValueError(f"Fernet key not found: {id_key_path}")
+        with open(context_path, "rb") as f:
+            context = ts.context_from(f.read())
+        with open(id_key_path, "rb") as f:
+            id_key = f.read()
+        db_file = db_path if db_path.endswith('.db') else os.path.join(db_path, "he_vector_store.db")
+        stats = restore_snapshot(bundle_dir, db_file, context, id_key, workers=workers)
+        logger.info("[import_snapshot] %s: %s", db_file, stats)
+        return cls(context_path=context_path, db_path=db_path, id_key_path=id_key_path, **kwargs)
 
     def close(self):
-        """Close DB connection if open."""
+        """Close DB connection if open and drop the resident ciphertexts."""
+        with self._resident_lock:
+            self._drop_resident()
         if self.conn:
             self.conn.close()
 
@@ -0,0 +1,41 @@
+import os
+import sys
+
+# Allow running the suite from a checkout without `pip install -e .`
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def ckks_context_path(tmp_path_factory):
+    """Secret CKKS context with the project's default parameters, serialized once per session."""
+    ts = pytest.importorskip("tenseal")
+    ctx = ts.context(ts.SCHEME_TYPE.CKKS, poly_modulus_degree=8192, coeff_mod_bit_sizes=[60, 40, 40, 60])
+    ctx.generate_galois_keys()
+    ctx.global_scale = 2 ** 40
+    path = tmp_path_factory.mktemp("keys") / "ckks_context.sk"
+    path.write_bytes(ctx.serialize(save_secret_key=True))
+    return str(path)
+
+
+@pytest.fixture
+def make_store(tmp_path, ckks_context_path):
+    """Factory for HEVectorStore instances in tmp_path; closes them after the test."""
+    from he_vector_db.store import HEVectorStore
+
+    stores = []
+
+    def _make(name="store.db", cls=HEVectorStore, **kwargs):
+        store = cls(
+            context_path=ckks_context_path,
+            db_path=str(tmp_path / name),
+            id_key_path=str(tmp_path / "fernet.key"),
+            **kwargs
+        )
+        stores.append(store)
+        return store
+
+    yield _make
+    for store in stores:
+        store.close()
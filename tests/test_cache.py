@@ -0,0 +1,51 @@
+import numpy as np
+
+from he_vector_db.cache import QueryResultCache, query_key
+from he_vector_db.metrics import StoreProfiler
+
+
+def test_query_key_normalizes_and_includes_parts():
+    v = np.array([0.3, -0.4, 0.5])
+    assert query_key(v, 5) == query_key(2 * v + 1e-7, 5)
+    assert query_key(v, 5) != query_key(v, 3)
+    assert query_key(v, 5) != query_key(v[::-1], 5)
+
+
+def test_lru_bounds_and_version_invalidation():
+    cache = QueryResultCache(max_entries=2)
+    cache.put("a", 0, [[("x", "t", 1.0)]])
+    cache.put("b", 0, [[("y", "t", 0.5)]])
+    assert cache.get("a", 0) is not None      # a is now most recent
+    cache.put("c", 0, [[("z", "t", 0.1)]])     # evicts b
+    assert cache.get("b", 0) is None
+    assert cache.get("a", 1) is None           # stale version is dropped
+    assert len(cache) == 1
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["invalidations"] == 1
+    assert stats["hits"] == 1 and stats["misses"] == 2
+
+    small = QueryResultCache(max_entries=100, max_bytes=200)
+    for i in range(10):
+        small.put(i, 0, [[(b"id" * 10, b"txt" * 10, 0.0)]])
+    assert small.stats()["bytes"] <= 200 and small.stats()["evictions"] > 0
+
+
+def test_store_serves_hits_and_invalidates_on_add(make_store):
+    rng = np.random.default_rng(0)
+    docs = rng.standard_normal((6, 16))
+    profiler = StoreProfiler()
+    store = make_store(profiler=profiler, result_cache=QueryResultCache(max_entries=8))
+    store.add(ids=[f"d{i}" for i in range(6)], embeddings=docs.tolist())
+    v0 = store.version()
+
+    first = store.query(docs[:2].tolist(), n_results=2, max_workers=1)
+    again = store.query(docs[:2].tolist(), n_results=2, max_workers=1)
+    assert [[h[0] for h in r] for r in first] == [[h[0] for h in r] for r in again]
+    assert store.cache_stats()["hits"] == 2
+    assert profiler.snapshot()["timers"]["dot"]["calls"] == 1   # second query did not scan
+
+    store.add(ids=["new"], embeddings=[docs[0].tolist()])
+    assert store.version() == v0 + 1
+    after = store.query(docs[:1].tolist(), n_results=2, max_workers=1)
+    assert store.cache_stats()["invalidations"] == 1
+    assert {store.fernet.decrypt(h[0]).decode() for h in after[0]} == {"d0", "new"}
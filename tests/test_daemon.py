@@ -0,0 +1,88 @@
+import os
+import stat
+import threading
+
+import numpy as np
+import pytest
+
+from he_vector_db.daemon import DaemonClient, DaemonError, serve_daemon
+from he_vector_db.metrics import StoreProfiler
+
+
+def test_resident_store_scans_live_ciphertexts_and_follows_adds(make_store):
+    rng = np.random.default_rng(11)
+    docs = rng.standard_normal((6, 8))
+    profiler = StoreProfiler()
+    cold = make_store("cold.db")
+    hot = make_store("hot.db", profiler=profiler, resident=True, memory_budget=64 * 2**20)
+    for s in (cold, hot):
+        s.add(ids=[f"d{i}" for i in range(5)], embeddings=docs[:5].tolist(), subset="first")
+
+    q = docs[[1, 5]].tolist()
+    ids = lambda s, res: [[s.fernet.decrypt(h[0]).decode() for h in row] for row in res]
+    assert ids(hot, hot.query(q, n_results=2)) == ids(cold, cold.query(q, n_results=2))
+    assert profiler.snapshot()["timers"]["resident_load"]["items"] == 5
+    assert hot.memory_stats()["current_by_category"]["resident"] > 0
+
+    hot.add(ids=["d5"], embeddings=[docs[5].tolist()])
+    assert ids(hot, hot.query(q[1:], n_results=1)) == [["d5"]]
+    assert ids(hot, hot.query(q[1:], n_results=1, subset="first"))[0] != ["d5"]
+    snap = profiler.snapshot()
+    assert snap["timers"]["resident_load"]["items"] == 6 and snap["gauges"]["resident_docs"] == 6
+
+    hot.close()
+    assert hot.memory_stats()["current"] == 0
+
+
+def test_daemon_serves_queries_ids_and_stats(make_store, tmp_path):
+    rng = np.random.default_rng(12)
+    docs = rng.standard_normal((6, 8))
+    profiler = StoreProfiler()
+    store = make_store(profiler=profiler, resident=True)
+    store.add(ids=[f"d{i}" for i in range(6)], embeddings=docs.tolist())
+    store.add(ids=["d0", "d1"], embeddings=docs[:2].tolist(), subset="small")
+
+    sock = str(tmp_path / "he.sock")
+    ready = threading.Event()
+    server = threading.Thread(target=serve_daemon, args=({"all": store, "small": store}, sock, ready),
+                              kwargs={"subsets": {"small": "small"}}, daemon=True)
+    server.start()
+    assert ready.wait(30)
+    assert stat.S_IMODE(os.stat(sock).st_mode) == 0o600
+
+    with DaemonClient(sock, timeout=30) as client:
+        health = client.health()
+        assert health["stores"]["all"] == {"docs": 6, "resident": True}
+        assert health["stores"]["small"]["docs"] == 2
+
+        remote = client.store("all")
+        q = docs[[4, 0]].tolist()
+        local = store.query(q, n_results=3)
+        got = remote.query(q, n_results=3)
+        assert [[h[0] for h in row] for row in got] == [[h[0] for h in row] for row in local]
+        np.testing.assert_allclose([[h[2] for h in row] for row in got],
+                                   [[h[2] for h in row] for row in local], atol=1e-4)
+        assert [h[1] for row in got for h in row] == [h[1] for row in local for h in row]
+        assert remote.profiler.snapshot()["timers"]["daemon_call"]["items"] == 2
+
+        # "small" is served restricted to its subset without the client naming it
+        small = client.store("small")
+        assert sorted(small.get_all_ids()) == sorted(store.get_all_ids(subset="small"))
+        assert small.count() == 2 and remote.count() == 6 and remote.count(subset="small") == 2
+        small_hits = small.query(docs[[4]].tolist(), n_results=6)
+        assert sorted(store.fernet.decrypt(h[0]).decode() for h in small_hits[0]) == ["d0", "d1"]
+
+        stats = remote.stats(reset=True)
+        assert stats["profile"]["counters"]["queries"] == 5 and "memory" in stats
+        assert "queries" not in remote.stats()["profile"]["counters"]
+
+        with pytest.raises(DaemonError, match="unknown store"):
+            client.store("nope").count()
+        with pytest.raises(DaemonError, match="ValueError"):
+            remote.query(q, subset="missing")
+
+        client.shutdown()
+    server.join(10)
+    assert not server.is_alive()
+    with pytest.raises(DaemonError):
+        DaemonClient(sock, timeout=2).health()
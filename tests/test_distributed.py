@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from he_vector_db.distributed import (
+    LocalCluster, QueryCoordinator, WorkerError, partition_store, write_public_context,
+)
+from he_vector_db.exact import ExactSearch
+
+
+@pytest.fixture
+def cluster_store(make_store, tmp_path, ckks_context_path):
+    rng = np.random.default_rng(5)
+    docs = rng.standard_normal((9, 16))
+    ids = [f"d{i}" for i in range(9)]
+    store = make_store()
+    store.add(ids=ids, embeddings=docs.tolist())
+    parts = partition_store(store.db_path, str(tmp_path / "parts"), 3)
+    public = write_public_context(ckks_context_path, str(tmp_path / "ckks_context.pk"))
+    return store, docs, ids, parts, public
+
+
+def test_coordinator_matches_exact_topk(cluster_store, ckks_context_path):
+    store, docs, ids, parts, public = cluster_store
+    queries = docs[[1, 7]] + 0.05 * np.random.default_rng(6).standard_normal((2, 16))
+    ref_scores, ref_idx = ExactSearch(docs.astype(np.float32), ids).search(queries, 3)
+
+    with LocalCluster(parts, public) as cluster, QueryCoordinator(cluster.addresses, ckks_context_path) as coord:
+        health = coord.health()
+        assert [h["docs"] for h in health] == [3, 3, 3]
+        assert all(h["ok"] and h["public"] for h in health)
+
+        hits = coord.query(queries, n_results=3)
+        for row, ref_i, ref_s in zip(hits, ref_idx, ref_scores):
+            assert [store.fernet.decrypt(h[0]).decode() for h in row] == [ids[i] for i in ref_i]
+            np.testing.assert_allclose([h[2] for h in row], ref_s, atol=1e-3)
+        assert len(coord.last_timings) == 3
+        assert all(t["dot"] > 0 and t["bytes_received"] > 0 for t in coord.last_timings)
+
+        # public workers cannot decrypt → partial top-k is refused
+        with pytest.raises(WorkerError):
+            coord.query(queries, n_results=3, mode="topk")
+
+    with QueryCoordinator(cluster.addresses or [("127.0.0.1", 1)], ckks_context_path, timeout=2) as coord:
+        assert coord.health()[0]["ok"] is False
+
+
+def test_topk_mode_with_trusted_workers(cluster_store, ckks_context_path):
+    store, docs, ids, parts, _ = cluster_store
+    with LocalCluster(parts[:2], ckks_context_path) as cluster:
+        with QueryCoordinator(cluster.addresses, ckks_context_path) as coord:
+            hits = coord.query(docs[[3]], n_results=2, mode="topk")
+    assert store.fernet.decrypt(hits[0][0][0]).decode() == "d3"
+    assert len(hits[0]) == 2
+
+
+def test_worker_streams_score_blocks_per_chunk(cluster_store, ckks_context_path):
+    import tenseal as ts
+    from he_vector_db.distributed import QueryWorker
+
+    store, docs, ids, _, _ = cluster_store
+    worker = QueryWorker(store.db_path, ckks_context_path)
+    worker.block = 4  # 9 docs → chunks of 4, 4, 1
+    q = docs[[2, 8]] / np.linalg.norm(docs[[2, 8]], axis=1, keepdims=True)
+    blobs = [ts.ckks_vector(worker.context, v.tolist()).serialize() for v in q]
+
+    header, out = worker.handle({"op": "query", "mode": "scores"}, blobs)
+    assert header["blocks"] == [[4, 4, 1], [4, 4, 1]] and len(out) == 6
+    scores = [np.concatenate([ts.ckks_vector_from(worker.context, b).decrypt()[:n]
+                              for b, n in zip(out[3 * qi:3 * qi + 3], header["blocks"][qi])]) for qi in range(2)]
+    assert [int(np.argmax(s)) for s in scores] == [2, 8]
+
+    header, _ = worker.handle({"op": "query", "mode": "topk", "n_results": 1}, blobs)
+    assert [h[0][0] for h in header["hits"]] == [2, 8]
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from he_vector_db.embedding_client import (
+    EmbeddingCache,
+    StubEmbeddingClient,
+    embed_texts,
+    make_client,
+)
+
+
+def test_stub_is_deterministic():
+    client = StubEmbeddingClient(dim=8)
+    a, b = client.embed(["x", "y"]), client.embed(["x"])
+    assert a[0] == b[0] and a[0] != a[1] and len(a[0]) == 8
+
+
+def test_embed_texts_batches_dedupes_and_caches(tmp_path):
+    client = StubEmbeddingClient(dim=8)
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"))
+    texts = ["a", "b", "a", "c", "d", "e"]
+    seen = []
+
+    mat, stats = embed_texts(texts, client, cache, batch_size=2, max_workers=3, on_batch=seen.append)
+    assert mat.shape == (6, 8) and mat.dtype == np.float32
+    np.testing.assert_array_equal(mat[0], mat[2])
+    np.testing.assert_allclose(mat[3], client.embed(["c"])[0], rtol=1e-6)
+    assert stats["embedded"] == 5 and stats["requests"] == 3 and stats["cache_hits"] == 0
+    assert sorted(seen) == [1, 2, 2]
+    assert cache.count("stub") == 5
+
+    # Larger overlapping set: only the new text is embedded
+    client2 = StubEmbeddingClient(dim=8)
+    mat2, stats2 = embed_texts(texts + ["f"], client2, cache, batch_size=2)
+    np.testing.assert_array_equal(mat2[:6], mat)
+    assert stats2["cache_hits"] == 6 and stats2["embedded"] == 1 and client2.calls == 1
+
+
+def test_cache_is_keyed_by_model(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"))
+    embed_texts(["a"], StubEmbeddingClient(dim=4, model="m1"), cache)
+    _, stats = embed_texts(["a"], StubEmbeddingClient(dim=4, model="m2"), cache)
+    assert stats["embedded"] == 1 and cache.count() == 2
+
+
+def test_make_client_rejects_unknown_backend():
+    assert make_client("stub", "m", dim=3).embed(["x"])[0].__len__() == 3
+    with pytest.raises(ValueError):
+        make_client("nope", "m")
@@ -0,0 +1,70 @@
+import json
+
+import numpy as np
+import pytest
+
+from he_vector_db.embeddings import (
+    EmbeddingStore,
+    EmbeddingStoreWriter,
+    convert_json,
+    open_embeddings,
+)
+
+
+def _write(path, n=5, dim=4):
+    rng = np.random.default_rng(0)
+    mat = rng.standard_normal((n, dim)).astype(np.float32)
+    ids = [f"doc#{i}" for i in range(n)]
+    contents = [f"본문 {i}\nline" if i % 2 else "" for i in range(n)]
+    with EmbeddingStoreWriter(str(path), model="m", extra={"k": 1}) as w:
+        w.append(ids[0], mat[0], contents[0])
+        w.append_batch(ids[1:], mat[1:], contents[1:])
+    return ids, contents, mat
+
+
+def test_roundtrip_memmap(tmp_path):
+    ids, contents, mat = _write(tmp_path / "emb")
+    store = EmbeddingStore(str(tmp_path / "emb"))
+
+    assert len(store) == 5 and store.dim == 4
+    assert isinstance(store.matrix, np.memmap)
+    np.testing.assert_array_equal(store.matrix, mat)
+    assert list(store.ids) == ids
+    assert store.contents[:] == contents
+    assert store.ids[-1] == "doc#4"
+    assert store.manifest["model"] == "m" and store.manifest["extra"] == {"k": 1}
+    assert not (tmp_path / "emb.tmp").exists()
+
+
+def test_iter_batches_respects_stop(tmp_path):
+    ids, _, mat = _write(tmp_path / "emb", n=7)
+    store = EmbeddingStore(str(tmp_path / "emb"))
+
+    batches = list(store.iter_batches(3, stop=5))
+    assert [b[0] for b in batches] == [ids[0:3], ids[3:5]]
+    np.testing.assert_array_equal(np.vstack([b[2] for b in batches]), mat[:5])
+
+
+def test_dim_mismatch_and_abort(tmp_path):
+    with pytest.raises(ValueError):
+        with EmbeddingStoreWriter(str(tmp_path / "emb")) as w:
+            w.append("a", [1.0, 2.0])
+            w.append("b", [1.0, 2.0, 3.0])
+    assert not (tmp_path / "emb").exists()
+    assert not (tmp_path / "emb.tmp").exists()
+
+
+def test_open_embeddings_converts_legacy_json(tmp_path):
+    legacy = [
+        {"query_id": "q1", "text": "hello", "embedding": [0.1, 0.2]},
+        {"query_id": "q2", "text": "world", "embedding": [0.3, 0.4]},
+    ]
+    (tmp_path / "query_embeddings_10.json").write_text(json.dumps(legacy))
+
+    store = open_embeddings(str(tmp_path / "query_embeddings_10"))
+    assert list(store.ids) == ["q1", "q2"]
+    assert list(store.contents) == ["hello", "world"]
+    np.testing.assert_allclose(store.matrix, [[0.1, 0.2], [0.3, 0.4]], rtol=1e-6)
+
+    again = convert_json(str(tmp_path / "query_embeddings_10.json"), str(tmp_path / "copy"))
+    assert list(again.ids) == ["q1", "q2"]
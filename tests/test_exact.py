@@ -0,0 +1,53 @@
+import numpy as np
+
+from he_vector_db.embeddings import EmbeddingStoreWriter, EmbeddingStore
+from he_vector_db.exact import ExactSearch, compare_to_exact
+
+
+def _data(n=50, dim=8, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((n, dim)).astype(np.float32), [f"d{i}" for i in range(n)]
+
+
+def test_blocked_search_matches_dense():
+    mat, ids = _data()
+    q = np.random.default_rng(1).standard_normal((3, 8))
+    engine = ExactSearch(mat, ids, block_rows=7)
+
+    scores, idx = engine.search(q, k=4)
+    normed = mat / np.linalg.norm(mat, axis=1, keepdims=True)
+    dense = (q / np.linalg.norm(q, axis=1, keepdims=True)) @ normed.T
+    expected = np.argsort(-dense, axis=1)[:, :4]
+    np.testing.assert_array_equal(idx, expected)
+    np.testing.assert_allclose(scores, np.take_along_axis(dense, expected, axis=1), rtol=1e-5)
+
+    res = engine.query(q, n_results=2)
+    assert [r[0] for r in res[0]] == [ids[i] for i in expected[0, :2]]
+
+
+def test_from_embedding_store_limit(tmp_path):
+    mat, ids = _data(n=10)
+    with EmbeddingStoreWriter(str(tmp_path / "e")) as w:
+        w.append_batch(ids, mat, ids)
+    engine = ExactSearch.from_embedding_store(EmbeddingStore(str(tmp_path / "e")), limit=6)
+    assert len(engine) == 6
+    _, idx = engine.search(mat[8], k=6)
+    assert idx.max() < 6
+
+
+def test_compare_to_exact_reports_errors_and_flips():
+    mat, ids = _data(n=20)
+    q = mat[:2] + 0.01
+    engine = ExactSearch(mat, ids)
+    exact = engine.query(q, n_results=3)
+
+    perfect = [[(d, s) for d, _, s in hits] for hits in exact]
+    rep = compare_to_exact(perfect, engine, q, k=3)
+    assert rep["max_abs_score_error"] < 1e-6
+    assert rep["rank_flips"] == 0 and rep["recall@3"] == 1.0 and rep["identical_topk_rate"] == 1.0
+
+    swapped = [list(reversed(p)) for p in perfect]
+    noisy = [[(d, s + 0.01) for d, s in p] for p in swapped]
+    rep = compare_to_exact(noisy, engine, q, k=3)
+    assert abs(rep["max_abs_score_error"] - 0.01) < 1e-5
+    assert rep["rank_flips"] == 6 and rep["recall@3"] == 1.0 and rep["identical_topk_rate"] == 0.0
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from he_vector_db.filters import BlindIndex, matches_ranges
+from he_vector_db.metrics import StoreProfiler
+
+
+def test_blind_tags_are_keyed_and_canonical():
+    a, b = BlindIndex(b"k1"), BlindIndex(b"k2")
+    assert a.value_tag("year", 2020) == a.value_tag("year", 2020.0)
+    assert a.value_tag("year", 2020) != b.value_tag("year", 2020)
+    assert a.value_tag("cat", "tax") != a.value_tag("kind", "tax")
+    with pytest.raises(ValueError):
+        a.compile({"year": {"$gte": 2020}})   # not bucketed
+    with pytest.raises(ValueError):
+        a.compile({"cat": {"$ne": "tax"}})
+    assert matches_ranges({"year": 2021}, [("year", {"$gte": 2020, "$lt": 2022})])
+    assert not matches_ranges({"year": 2022}, [("year", {"$gte": 2020, "$lt": 2022})])
+
+
+def test_filtered_query_scans_only_matching_rows(make_store):
+    rng = np.random.default_rng(3)
+    docs = rng.standard_normal((8, 8))
+    metas = [{"cat": "tax" if i % 2 else "labor", "year": 2015 + i} for i in range(8)]
+    profiler = StoreProfiler()
+    store = make_store(profiler=profiler, numeric_buckets={"year": 5})
+    store.add(ids=[f"d{i}" for i in range(8)], embeddings=docs.tolist(), metadatas=metas)
+
+    def ids(hits):
+        return [store.fernet.decrypt(h[0]).decode() for h in hits]
+
+    q = docs[0].tolist()
+    hits = store.query([q], n_results=8, max_workers=1, where={"cat": "tax"})[0]
+    assert sorted(ids(hits)) == ["d1", "d3", "d5", "d7"]
+    assert profiler.snapshot()["timers"]["ckks_load"]["items"] == 4
+
+    hits = store.query([q], n_results=8, max_workers=1, where={"cat": {"$in": ["tax", "labor"]}, "year": {"$gte": 2017, "$lt": 2020}})[0]
+    assert sorted(ids(hits)) == ["d2", "d3", "d4"]
+
+    assert store.query([q], n_results=8, max_workers=1, where={"cat": "none"}) == [[]]
+    assert len(store.query([q], n_results=8, max_workers=1)[0]) == 8
+
+
+def test_multi_tag_match_is_scored_once_resident_or_not(make_store):
+    rng = np.random.default_rng(9)
+    docs = rng.standard_normal((3, 8))
+    metas = [{"tags": ["law", "tax"]}, {"tags": ["tax"]}, {"tags": ["labor"]}]
+    where = {"tags": {"$in": ["law", "tax"]}}
+    q = [docs[0].tolist()]
+    hits = {}
+    for resident in (False, True):
+        store = make_store(f"r{int(resident)}.db", resident=resident)
+        store.add(ids=["a", "b", "c"], embeddings=docs.tolist(), metadatas=metas)
+        ids = lambda rows: [store.fernet.decrypt(h[0]).decode() for h in rows]
+        hits[resident] = ids(store.query(q, n_results=5, where=where)[0])
+        assert ids(next(store.query_iter(q, n_results=5, where=where)).hits[0]) == hits[resident]
+        assert sorted(ids(h for _, h in store.query_threshold(q, -1.0, where=where))) == ["a", "b"]
+    assert hits[False] == hits[True] and sorted(hits[True]) == ["a", "b"]
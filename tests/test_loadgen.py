@@ -0,0 +1,52 @@
+import time
+
+import numpy as np
+
+from he_vector_db.loadgen import LoadGenerator, poisson_schedule
+
+
+class SlowStore:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.added = []
+
+    def query(self, embeddings, n_results=5, max_workers=None):
+        time.sleep(self.seconds)
+        if embeddings[0][0] < 0:
+            raise RuntimeError("bad query")
+        return [[]]
+
+    def add(self, ids=None, documents=None, embeddings=None):
+        self.added.extend(ids)
+
+
+def test_poisson_schedule_rate_and_bounds():
+    arrivals = poisson_schedule(200.0, 5.0, np.random.default_rng(0))
+    assert all(0 < t < 5.0 for t in arrivals) and arrivals == sorted(arrivals)
+    assert 900 < len(arrivals) < 1100
+    assert poisson_schedule(0.0, 5.0, np.random.default_rng(0)) == []
+
+
+def test_open_loop_counts_queueing_delay_and_errors():
+    store = SlowStore(0.05)
+    gen = LoadGenerator(store, queries=[[1.0], [-1.0]], docs=(["a", "b"], ["", ""], [[0.0], [1.0]]),
+                        query_rate=60.0, add_rate=20.0, duration=1.0, concurrency=1, add_batch=2, window=0.5)
+    report = gen.run()
+    q = report["ops"]["query"]
+    assert q["requests"] > 30 and 0 < q["error_rate"] < 1 and q["error_types"] == {"RuntimeError": q["errors"]}
+    # one client at ~20 req/s of capacity against ~60 req/s arrivals → requests wait in the queue
+    assert q["queue_p95"] > 0.2 and q["latency_p50"] > q["service_p50"]
+    assert len(store.added) == 2 * report["ops"]["add"]["requests"] and len(set(store.added)) == len(store.added)
+    assert sum(row["completed"] + row["errors"] for row in report["timeline"]) == report["overall"]["requests"]
+
+
+def test_concurrent_adds_and_queries_on_a_real_store(make_store):
+    rng = np.random.default_rng(4)
+    docs = rng.standard_normal((6, 8))
+    store = make_store()
+    store.add(ids=[f"d{i}" for i in range(6)], embeddings=docs.tolist())
+    gen = LoadGenerator(store, queries=docs.tolist(), docs=([f"n{i}" for i in range(6)], [""] * 6, docs.tolist()),
+                        query_rate=15.0, add_rate=15.0, duration=0.6, concurrency=4)
+    report = gen.run()
+    assert report["overall"]["errors"] == 0
+    assert store.count() == 6 + report["ops"]["add"]["requests"]
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from he_vector_db.memory import MemoryAccountant, MemoryBudgetExceeded
+from he_vector_db.metrics import StoreProfiler
+
+
+def test_accountant_tracks_operation_peaks_and_plans_within_budget():
+    mem = MemoryAccountant(budget=10_000)
+    with mem.operation("query") as op:
+        with mem.hold("blobs", 3_000):
+            with mem.hold("results", 500):
+                pass
+        with mem.hold("blobs", 1_000):
+            pass
+    assert op["peak"] == 3_500 and mem.total == 0
+    assert mem.stats()["max_peak"] == {"query": 3_500}
+    # 4 workers × (64 + 1) docs of 100 B do not fit → chunk shrinks first, then workers
+    assert mem.plan_scan(4, 64, 100) == (1, 64)
+    assert mem.plan_scan(1, 200, 100) == (1, 99)
+    assert MemoryAccountant().plan_scan(8, 256, 10 ** 9) == (8, 256)
+    with pytest.raises(MemoryBudgetExceeded):
+        mem.plan_scan(1, 1, 100, fixed_bytes=9_900)
+
+
+def test_store_scan_respects_memory_budget(make_store):
+    rng = np.random.default_rng(6)
+    docs = rng.standard_normal((10, 8))
+    ref = make_store(name="ref.db")
+    ref.add(ids=[f"d{i}" for i in range(10)], embeddings=docs.tolist())
+    q = [docs[4].tolist(), docs[8].tolist()]
+    expected = ref.query(q, n_results=3, max_workers=1)
+
+    row = ref.memory_stats()["max_peak"]["add"]
+    assert row > 0
+    profiler = StoreProfiler()
+    # room for the two query ciphertexts and roughly three rows in flight
+    store = make_store(name="budget.db", profiler=profiler, memory_budget=6 * row)
+    store.add(ids=[f"d{i}" for i in range(10)], embeddings=docs.tolist())
+    got = store.query(q, n_results=3, max_workers=2)
+    assert [[store.fernet.decrypt(h[0]) for h in hits] for hits in got] == \
+        [[ref.fernet.decrypt(h[0]) for h in hits] for hits in expected]
+    gauges = profiler.snapshot()["gauges"]
+    assert gauges["chunk_size"] < 64 and gauges["workers"] == 1
+    stats = store.memory_stats()
+    assert 0 < stats["last_peak"]["query"] <= 6 * row and stats["current"] == 0
+
+    tiny = make_store(name="tiny.db", memory_budget=row // 2)
+    tiny.add(ids=["a"], embeddings=[docs[0].tolist()])
+    with pytest.raises(MemoryBudgetExceeded):
+        tiny.query(q, n_results=1)
+
+
+def test_failed_resident_load_releases_its_reservations(make_store, monkeypatch):
+    import he_vector_db.store as store_mod
+
+    rng = np.random.default_rng(9)
+    docs = rng.standard_normal((6, 8))
+    store = make_store(resident=True, memory_budget=64 * 2**20)
+    store._resident_batch = 2
+    store.add(ids=["d0", "d1"], embeddings=docs[:2].tolist())
+    store.load_resident()
+    before = store.memory_stats()["current"]
+    assert before > 0
+
+    store.add(ids=[f"d{i}" for i in range(2, 6)], embeddings=docs[2:].tolist())
+    real_load, calls = store_mod.CKKSVector.load, []
+
+    def flaky_load(ctx, blob):
+        calls.append(blob)
+        if len(calls) == 3:  # second batch of the incremental load, after the first was reserved
+            raise RuntimeError("corrupt ciphertext")
+        return real_load(ctx, blob)
+
+    monkeypatch.setattr(store_mod.CKKSVector, "load", staticmethod(flaky_load))
+    with pytest.raises(RuntimeError, match="corrupt"):
+        store.load_resident()
+    assert store.memory.total == before
+    assert len(store._resident) == 2
+
+    monkeypatch.setattr(store_mod.CKKSVector, "load", real_load)
+    assert len(store.load_resident()) == 6
+    assert store.memory_stats()["current_by_category"]["resident"] == store._resident_bytes
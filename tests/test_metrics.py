@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from he_vector_db.metrics import StoreProfiler, NullProfiler
+
+
+def test_record_and_timer_aggregate():
+    prof = StoreProfiler()
+    prof.record("dot", 0.5, 10)
+    prof.record("dot", 1.5, 30)
+    with prof.timer("decrypt", 4):
+        pass
+
+    snap = prof.snapshot()
+    dot = snap["timers"]["dot"]
+    assert dot["calls"] == 2
+    assert dot["items"] == 40
+    assert dot["total"] == pytest.approx(2.0)
+    assert dot["max"] == pytest.approx(1.5)
+    assert dot["mean_per_item"] == pytest.approx(0.05)
+    assert snap["timers"]["decrypt"]["items"] == 4
+
+
+def test_counters_gauges_and_callbacks():
+    seen = []
+    prof = StoreProfiler(callbacks=[lambda *a: seen.append(a)])
+    prof.add_callback(lambda stage, sec, n: seen.append(("second", stage, n)))
+    prof.incr("queries", 2)
+    prof.incr("queries")
+    prof.set_gauge("workers", 4)
+    prof.record("fernet", 0.25, 2)
+
+    snap = prof.snapshot()
+    assert snap["counters"] == {"queries": 3}
+    assert snap["gauges"] == {"workers": 4}
+    assert seen == [("fernet", 0.25, 2), ("second", "fernet", 2)]
+
+
+def test_to_prometheus_format():
+    prof = StoreProfiler()
+    prof.record("dot", 0.5, 10)
+    prof.incr("queries", 3)
+    prof.set_gauge("wall_time", 1.25)
+
+    text = prof.to_prometheus(labels={"sample_size": "10000"})
+    lines = text.splitlines()
+    assert text.endswith("\n")
+    assert "# TYPE he_vector_store_stage_seconds_total counter" in lines
+    assert 'he_vector_store_stage_seconds_total{sample_size="10000",stage="dot"} 0.500000000' in lines
+    assert 'he_vector_store_stage_items_total{sample_size="10000",stage="dot"} 10' in lines
+    assert 'he_vector_store_queries_total{sample_size="10000"} 3' in lines
+    assert 'he_vector_store_wall_time{sample_size="10000"} 1.25' in lines
+    for line in lines:
+        assert line.startswith("#") or len(line.rsplit(" ", 1)) == 2
+
+
+def test_merge_into_keeps_existing_keys(tmp_path):
+    path = tmp_path / "results" / "metrics_10.json"
+    path.parent.mkdir()
+    path.write_text(json.dumps({"ingest": {"wall_clock_time": 3.0}, "other": 1}))
+
+    prof = StoreProfiler()
+    prof.record("dot", 0.1)
+    merged = prof.merge_into(str(path), section="query", extra={"last_run_at": "now"})
+
+    on_disk = json.loads(path.read_text())
+    assert on_disk == merged
+    assert on_disk["ingest"] == {"wall_clock_time": 3.0}
+    assert on_disk["other"] == 1
+    assert on_disk["query"]["last_run_at"] == "now"
+    assert on_disk["query"]["timers"]["dot"]["calls"] == 1
+
+
+def test_null_profiler_stays_empty():
+    prof = NullProfiler()
+    prof.record("dot", 1.0, 5)
+    with prof.timer("decrypt"):
+        pass
+    prof.incr("queries")
+    prof.set_gauge("workers", 2)
+
+    snap = prof.snapshot()
+    assert snap["timers"] == {} and snap["counters"] == {} and snap["gauges"] == {}
+    with pytest.raises(TypeError):
+        prof.add_callback(lambda *a: None)
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from he_vector_db.exact import ExactSearch
+from he_vector_db.packed import PackedVectorStore
+
+
+@pytest.mark.parametrize("query_mode", ["plain", "encrypted"])
+def test_packed_matches_exact_with_partial_blocks(make_store, query_mode):
+    rng = np.random.default_rng(2)
+    docs = rng.standard_normal((11, 6))
+    ids = [f"d{i}" for i in range(11)]
+    store = make_store(cls=PackedVectorStore, query_mode=query_mode, block_size=4)
+    store.add(ids=ids[:3], embeddings=docs[:3])     # partial block 0
+    store.add(ids=ids[3:], embeddings=docs[3:])     # tops up block 0, then blocks 1-2
+    assert store.count() == 11
+    assert [store.fernet.decrypt(i).decode() for i in store.get_all_ids()] == ids
+
+    queries = docs[[1, 9]] + 0.05 * rng.standard_normal((2, 6))
+    hits = store.query(queries, n_results=3)
+    ref_scores, ref_idx = ExactSearch(docs.astype(np.float32), ids).search(queries, 3)
+    for row, ref_i, ref_s in zip(hits, ref_idx, ref_scores):
+        assert [store.fernet.decrypt(h[0]).decode() for h in row] == [ids[i] for i in ref_i]
+        np.testing.assert_allclose([h[2] for h in row], ref_s, atol=1e-4)
+
+
+def test_packed_rejects_dim_mismatch(make_store):
+    store = make_store(cls=PackedVectorStore, block_size=4)
+    store.add(ids=["a"], embeddings=[[1.0, 0.0, 0.0]])
+    with pytest.raises(ValueError):
+        store.add(ids=["b"], embeddings=[[1.0, 0.0]])
+
+
+def test_packed_add_is_versioned_and_rejects_subsets(make_store):
+    store = make_store(cls=PackedVectorStore, block_size=4)
+    store.add(ids=["a", "b"], embeddings=[[1.0, 0.0], [0.0, 1.0]])
+    v = store.version()
+    with pytest.raises(ValueError, match="subsets are not supported"):
+        store.add(ids=["c"], embeddings=[[1.0, 1.0]], subset="s")
+    with pytest.raises(ValueError, match="subsets are not supported"):
+        store.get_all_ids(subset="s")
+    with pytest.raises(ValueError):
+        store.add(ids=["c"], embeddings=[[1.0, 1.0, 1.0]])   # rolled back, nothing half-written
+    assert store.version() == v and store.count() == 2
+    store.add(ids=["c"], embeddings=[[1.0, 1.0]])
+    assert store.version() > v and store.count() == 3
@@ -0,0 +1,58 @@
+import numpy as np
+
+from he_vector_db.exact import ExactSearch
+from he_vector_db.plain_corpus import PlainCorpusStore, slot_count
+
+
+def test_matches_exact_topk_across_chunks(make_store):
+    rng = np.random.default_rng(1)
+    docs = rng.standard_normal((23, 16)).astype(np.float32)
+    ids = [f"d{i}" for i in range(23)]
+    store = make_store(cls=PlainCorpusStore, chunk_size=10)
+    assert slot_count(store.context) == 4096
+    store.add(ids=ids[:15], embeddings=docs[:15])
+    store.add(ids=ids[15:], embeddings=docs[15:])
+    assert store.count() == 23
+
+    queries = docs[[2, 17]] + 0.05 * rng.standard_normal((2, 16))
+    hits = store.query(queries, n_results=4)
+    ref_scores, ref_idx = ExactSearch(docs, ids).search(queries, 4)
+    for row, ref_i, ref_s in zip(hits, ref_idx, ref_scores):
+        assert [store.fernet.decrypt(h[0]).decode() for h in row] == [ids[i] for i in ref_i]
+        np.testing.assert_allclose([h[2] for h in row], ref_s, atol=1e-4)
+
+
+def test_encrypted_scores_one_ciphertext_per_chunk(make_store):
+    docs = np.eye(8, dtype=np.float32)
+    store = make_store(cls=PlainCorpusStore, chunk_size=5)
+    store.add(ids=[str(i) for i in range(8)], embeddings=docs)
+    import tenseal as ts
+    enc = store.encrypted_scores(ts.ckks_vector(store.context, docs[6].tolist()))
+    assert len(enc) == 2
+    scores = np.concatenate([e.decrypt() for e in enc])
+    assert int(np.argmax(scores)) == 6
+
+
+def test_add_goes_through_the_locked_versioned_base_path(make_store):
+    import pytest
+    from he_vector_db.loadgen import LoadGenerator
+
+    rng = np.random.default_rng(3)
+    docs = rng.standard_normal((6, 8)).astype(np.float32)
+    store = make_store(cls=PlainCorpusStore, chunk_size=4)
+    store.add(ids=["a", "b"], embeddings=docs[:2])
+    v = store.version()
+    with pytest.raises(ValueError, match="subsets are not supported"):
+        store.add(ids=["c"], embeddings=docs[2:3], subset="s")
+    with pytest.raises(ValueError, match="subsets are not supported"):
+        store.count(subset="s")
+    with pytest.raises(ValueError, match="slot count"):
+        store.add(ids=["big"], embeddings=np.ones((1, 5000), dtype=np.float32))
+    assert store.version() == v and store.count() == 2
+
+    gen = LoadGenerator(store, queries=docs.tolist(), docs=([f"n{i}" for i in range(6)], [""] * 6, docs.tolist()),
+                        query_rate=20.0, add_rate=20.0, duration=0.5, concurrency=4)
+    report = gen.run()
+    assert report["overall"]["errors"] == 0
+    assert store.count() == 2 + report["ops"]["add"]["requests"] == len(store.get_all_ids())
+    assert len(store.query([docs[0].tolist()], n_results=100)[0]) == store.count()
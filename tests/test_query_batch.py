@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from he_vector_db.cache import EncryptedQueryCache, QueryResultCache
+from he_vector_db.metrics import StoreProfiler
+from he_vector_db.query_batch import EncryptedQueryBatch
+
+
+def _ids(store, hits):
+    return [[store.fernet.decrypt(h[0]).decode() for h in row] for row in hits]
+
+
+def test_batch_is_encrypted_once_and_reused_across_stores(make_store):
+    rng = np.random.default_rng(7)
+    docs = rng.standard_normal((8, 16))
+    p1, p2 = StoreProfiler(), StoreProfiler()
+    a = make_store("a.db", profiler=p1)
+    b = make_store("b.db", profiler=p2, result_cache=QueryResultCache(max_entries=8))
+    a.add(ids=[f"a{i}" for i in range(8)], embeddings=docs.tolist())
+    b.add(ids=[f"b{i}" for i in range(4)], embeddings=docs[:4].tolist())
+
+    q = (3 * docs[[5, 1, 2]]).tolist()
+    batch = a.encrypt_queries(q, max_workers=2)
+    assert isinstance(batch, EncryptedQueryBatch) and len(batch) == 3
+    assert np.allclose(np.linalg.norm(batch.vectors, axis=1), 1.0)
+
+    assert _ids(a, a.query(batch, n_results=2, max_workers=1)) == _ids(a, a.query(q, n_results=2, max_workers=1))
+    assert _ids(b, b.query(batch, n_results=1))[1:] == [["b1"], ["b2"]]
+    # result-cache misses are scanned with a sub-batch; the second call is all hits
+    assert _ids(b, b.query(batch.select([2]), n_results=1)) == [["b2"]]
+    assert p2.snapshot()["counters"]["cache_hits"] == 1
+    steps = list(b.query_iter(batch.select([0]), n_results=1, chunk_size=2))
+    assert steps[-1].done and _ids(b, steps[-1].hits) == _ids(b, b.query(batch.select([0]), n_results=1))
+
+    # b never encrypted a query; a encrypted the batch once plus the raw comparison query
+    assert "encrypt_query" not in p2.snapshot()["timers"]
+    assert p1.snapshot()["timers"]["encrypt_query"]["items"] == 6
+
+
+def test_query_cache_skips_repeat_encryption(make_store):
+    rng = np.random.default_rng(8)
+    docs = rng.standard_normal((4, 16))
+    cache = EncryptedQueryCache(max_entries=3)
+    profiler = StoreProfiler()
+    s1 = make_store("s1.db", profiler=profiler, query_cache=cache)
+    s2 = make_store("s2.db", query_cache=cache)
+
+    first = s1.encrypt_queries(docs.tolist())
+    # docs[0] was evicted (max_entries=3); the others come back as the same ciphertext objects
+    again = s2.encrypt_queries([docs[1].tolist(), docs[3].tolist()])
+    assert again.ciphertexts == [first.ciphertexts[1], first.ciphertexts[3]]
+    counters = profiler.snapshot()["counters"]
+    assert counters["query_ct_misses"] == 4 and counters.get("query_ct_hits", 0) == 0
+    stats = cache.stats()
+    assert stats["entries"] == 3 and stats["evictions"] == 1 and stats["hits"] == 2
+    assert stats["bytes"] > 0 and s1.query_cache_stats() == stats
+
+    s1.add(ids=["x"], embeddings=[docs[3].tolist()])
+    assert s1.query([docs[3].tolist()], n_results=1)[0][0][2] == pytest.approx(1.0, abs=1e-4)
+    assert profiler.snapshot()["counters"]["query_ct_hits"] == 1
+
+
+def test_batch_from_another_context_is_rejected(make_store, tmp_path):
+    ts = pytest.importorskip("tenseal")
+    ctx = ts.context(ts.SCHEME_TYPE.CKKS, poly_modulus_degree=8192, coeff_mod_bit_sizes=[60, 40, 40, 60])
+    ctx.global_scale = 2 ** 40
+    other_ctx = tmp_path / "other.sk"
+    other_ctx.write_bytes(ctx.serialize(save_secret_key=True))
+
+    from he_vector_db.store import HEVectorStore
+
+    store = make_store()
+    store.add(ids=["d"], embeddings=[[1.0, 0.0]])
+    other = HEVectorStore(context_path=str(other_ctx), db_path=str(tmp_path / "other.db"),
+                          id_key_path=str(tmp_path / "fernet.key"))
+    try:
+        batch = other.encrypt_queries([[1.0, 0.0]])
+    finally:
+        other.close()
+    assert batch.context_id != store.context_id
+    with pytest.raises(ValueError, match="different CKKS context"):
+        store.query(batch)
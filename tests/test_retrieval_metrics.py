@@ -0,0 +1,70 @@
+import json
+
+import numpy as np
+import pytest
+
+from he_vector_db.retrieval_metrics import Qrels, compute_metrics, hits_to_matrix, load_results
+
+
+@pytest.fixture
+def qrels():
+    # q1: a, b relevant; q2: c relevant, a judged non-relevant
+    return Qrels(
+        np.array(["q1", "q2"]), np.array(["a", "b", "c"]),
+        np.array([0, 0, 1, 1]), np.array([0, 1, 2, 0]), np.array([1, 1, 1, 0], dtype=np.int8),
+    )
+
+
+def test_metrics_against_hand_computed(qrels):
+    docs = hits_to_matrix([["x", "b", "a"], ["c", "a"]], 3)
+    df = compute_metrics(qrels, ["q1", "q2"], docs, 3)
+
+    dcg = 1 / np.log2(3) + 1 / np.log2(4)
+    assert df["NDCG@3"][0] == pytest.approx(dcg / (1 + 1 / np.log2(3)))
+    assert df["NDCG@3"][1] == pytest.approx(1.0)
+    assert list(df["Recall@3"]) == [1.0, 1.0]
+    assert list(df["MRR@3"]) == [0.5, 1.0]
+
+
+def _legacy_ndcg(rels, k):
+    # ndcg5_with_rels.py before the vectorized engine: IDCG from the retrieved rels sorted
+    dcg = lambda r: sum((2 ** r[i] - 1) / np.log2(i + 2) for i in range(min(len(r), k)))
+    ideal = dcg(sorted(rels, reverse=True))
+    return dcg(rels) / ideal if ideal > 0 else 0.0
+
+
+def test_default_ndcg_keeps_the_retrieved_list_ideal(qrels):
+    # q1 has two relevant docs but only "a" is retrieved → the two normalisers differ
+    docs = hits_to_matrix([["x", "a", "y"], ["a", "c"], ["x"]], 3)
+    qids = ["q1", "q2", "q1"]
+    legacy = [_legacy_ndcg([0, 1, 0], 3), _legacy_ndcg([0, 1], 3), 0.0]
+    assert legacy[0] == pytest.approx(1 / np.log2(3))
+
+    assert list(compute_metrics(qrels, qids, docs, 3)["NDCG@3"]) == pytest.approx(legacy)
+    strict = compute_metrics(qrels, qids, docs, 3, ndcg_ideal="qrels")["NDCG@3"]
+    assert strict[0] == pytest.approx((1 / np.log2(3)) / (1 + 1 / np.log2(3)))
+    assert strict[1] == pytest.approx(legacy[1])
+    with pytest.raises(ValueError):
+        compute_metrics(qrels, qids, docs, 3, ndcg_ideal="bogus")
+
+
+def test_unknown_queries_and_overlap(qrels):
+    docs = hits_to_matrix([["a", "x"], ["b", "c"]], 2)
+    ref = (["q1"], hits_to_matrix([["a", "b"]], 2))
+    df = compute_metrics(qrels, ["q1", "qX"], docs, 2, reference=ref)
+
+    assert df["NDCG@2"][1] == 0.0 and np.isnan(df["Recall@2"][1])
+    assert df["Overlap@2"][0] == 0.5 and np.isnan(df["Overlap@2"][1])
+
+
+def test_cache_roundtrip_and_load_results(qrels, tmp_path):
+    qrels.save(str(tmp_path / "c" / "qrels.npz"), "ds")
+    again = Qrels.load("ds", str(tmp_path / "c" / "qrels.npz"))
+    assert list(again.n_relevant) == [2, 1]
+
+    path = tmp_path / "eval.json"
+    path.write_text(json.dumps([
+        {"query_id": "q1", "results": [{"rank": 2, "doc_id": "b"}, {"rank": 1, "doc_id": "a"}]}
+    ]))
+    qids, docs = load_results(str(path), 3)
+    assert qids == ["q1"] and docs.tolist() == [["a", "b", ""]]
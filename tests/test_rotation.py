@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from cryptography.fernet import Fernet, InvalidToken
+
+from he_vector_db.rotation import rotate_store
+from he_vector_db.store import HEVectorStore
+
+
+@pytest.fixture
+def new_keys(tmp_path):
+    ts = pytest.importorskip("tenseal")
+    ctx = ts.context(ts.SCHEME_TYPE.CKKS, poly_modulus_degree=8192, coeff_mod_bit_sizes=[60, 40, 40, 60])
+    ctx.generate_galois_keys()
+    ctx.global_scale = 2 ** 40
+    ctx_path = tmp_path / "new_context.sk"
+    ctx_path.write_bytes(ctx.serialize(save_secret_key=True))
+    key_path = tmp_path / "new_fernet.key"
+    key_path.write_bytes(Fernet.generate_key())
+    return str(ctx_path), str(key_path)
+
+
+def test_rotation_resumes_and_replaces_in_place(make_store, tmp_path, ckks_context_path, new_keys):
+    rng = np.random.default_rng(7)
+    docs = rng.standard_normal((7, 8))
+    store = make_store(numeric_buckets={"year": 10})
+    store.add(ids=[f"d{i}" for i in range(7)], embeddings=docs.tolist(),
+              documents=[f"text {i}" for i in range(7)],
+              metadatas=[{"lang": "ko" if i % 2 else "en", "year": 2000 + 5 * i} for i in range(7)])
+    store.add(ids=["d1", "d2"], embeddings=docs[1:3].tolist(), subset="small")
+    old_version = store.version()
+    db_path, old_key = store.db_path, store.id_key_path
+    store.close()
+    new_ctx, new_key = new_keys
+
+    def interrupt(done, total):
+        if done >= 3:
+            raise KeyboardInterrupt
+
+    args = (db_path, ckks_context_path, old_key, new_ctx, new_key)
+    with pytest.raises(KeyboardInterrupt):
+        rotate_store(*args, workers=1, batch_size=3, progress=interrupt)
+    stats = rotate_store(*args, workers=2, batch_size=3)
+    assert stats["resumed_from"] == 3 and stats["rows"] == 7 and stats["rows_per_sec"] > 0
+
+    rotated = HEVectorStore(context_path=new_ctx, db_path=db_path, id_key_path=new_key,
+                            numeric_buckets={"year": 10})
+    try:
+        assert rotated.count() == 7 and rotated.version() == old_version + 1
+        hits = rotated.query([docs[4].tolist()], n_results=1, max_workers=1)[0]
+        assert rotated.fernet.decrypt(hits[0][0]) == b"d4"
+        assert rotated.fernet.decrypt(hits[0][1]) == b"text 4"
+        assert abs(hits[0][2] - 1.0) < 1e-3
+        hits = rotated.query([docs[4].tolist()], n_results=7, max_workers=1,
+                             where={"lang": "ko", "year": {"$gte": 2010}})[0]
+        assert sorted(rotated.fernet.decrypt(h[0]).decode() for h in hits) == ["d3", "d5"]
+        with pytest.raises(InvalidToken):
+            Fernet(open(old_key, "rb").read()).decrypt(hits[0][0])
+        # subsets and id tags survive: re-adding a stored id encrypts nothing
+        assert rotated.subsets() == {"small": 2}
+        rotated.add(ids=["d5"], embeddings=[docs[5].tolist()], subset="small")
+        assert rotated.count() == 7 and rotated.count(subset="small") == 3
+    finally:
+        rotated.close()
@@ -0,0 +1,55 @@
+import threading
+import time
+
+import numpy as np
+
+from he_vector_db.metrics import StoreProfiler
+from he_vector_db.scheduler import QueryAutotuner, run_dynamic
+
+
+def test_run_dynamic_covers_every_item_and_balances_slow_chunks():
+    seen, owners = [], {}
+
+    def work(start, stop):
+        if start == 0:
+            time.sleep(0.2)  # one slow chunk
+        seen.extend(range(start, stop))
+        owners[start] = threading.get_ident()
+        return stop - start
+
+    done = run_dynamic(40, 4, 2, work)
+    assert sorted(seen) == list(range(40))
+    assert sum(res for _, res, _ in done) == 40
+    # the worker stuck on chunk 0 did not get a fixed half of the work
+    stuck = owners[0]
+    assert sum(1 for o in owners.values() if o == stuck) < 5
+
+
+def test_autotuner_tries_each_candidate_then_settles():
+    tuner = QueryAutotuner(worker_options=[1, 2], chunk_options=[8, 32])
+    speed = {(1, 8): 10.0, (1, 32): 30.0, (2, 8): 20.0, (2, 32): 15.0}
+    tried = []
+    while not tuner.settled:
+        w, c = tuner.plan()
+        tried.append((w, c))
+        tuner.observe(w, c, work=int(speed[(w, c)] * 100), seconds=1.0, chunk_times=[(c, 0.1)])
+    assert sorted(tried) == sorted(speed)
+    assert tuner.plan() == (1, 32)
+    stats = tuner.stats()
+    assert stats["settled"] and stats["chunk_size"] == 32 and len(stats["trials"]) == 4
+
+
+def test_store_autotune_keeps_results_and_reports_choice(make_store):
+    rng = np.random.default_rng(2)
+    docs = rng.standard_normal((12, 8))
+    profiler = StoreProfiler()
+    tuner = QueryAutotuner(worker_options=[1, 2], chunk_options=[3, 12])
+    store = make_store(profiler=profiler, autotuner=tuner)
+    store.add(ids=[f"d{i}" for i in range(12)], embeddings=docs.tolist())
+    reference = store.query([docs[5].tolist()], n_results=3, max_workers=1)[0]
+    for _ in range(4):
+        hits = store.query([docs[5].tolist()], n_results=3)[0]
+        assert [h[0] for h in hits] == [h[0] for h in reference]
+    stats = store.autotune_stats()
+    assert stats["settled"]
+    assert profiler.snapshot()["gauges"]["chunk_size"] in (3, 12)
@@ -0,0 +1,77 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from he_vector_db.packed import PackedVectorStore
+from he_vector_db.snapshot import verify_snapshot
+from he_vector_db.store import HEVectorStore
+
+
+def test_snapshot_round_trip_with_chunking(make_store, tmp_path, ckks_context_path):
+    rng = np.random.default_rng(11)
+    docs = rng.standard_normal((6, 8))
+    store = make_store(numeric_buckets={"year": 10})
+    store.add(ids=[f"d{i}" for i in range(6)], embeddings=docs.tolist(),
+              metadatas=[{"year": 2000 + 3 * i} for i in range(6)])
+    bundle = str(tmp_path / "bundle")
+    stats = store.export_snapshot(bundle, chunk_bytes=1)  # one row per chunk
+    assert stats["chunks"] > 6 and os.path.exists(os.path.join(bundle, "context.pk"))
+    assert verify_snapshot(bundle, workers=2)["rows"] > 6
+
+    replica = HEVectorStore.import_snapshot(bundle, ckks_context_path, str(tmp_path / "replica" / "r.db"),
+                                           store.id_key_path, workers=2, numeric_buckets={"year": 10})
+    try:
+        assert replica.count() == 6 and replica.version() == store.version()
+        q = [docs[2].tolist()]
+        got, want = replica.query(q, n_results=3, max_workers=1)[0], store.query(q, n_results=3, max_workers=1)[0]
+        assert [h[0] for h in got] == [h[0] for h in want]  # same ciphertext rows, byte for byte
+        np.testing.assert_allclose([h[2] for h in got], [h[2] for h in want], atol=1e-4)
+        hits = replica.query(q, n_results=6, max_workers=1, where={"year": {"$gte": 2009}})[0]
+        assert sorted(replica.fernet.decrypt(h[0]).decode() for h in hits) == ["d3", "d4", "d5"]
+    finally:
+        replica.close()
+
+    # corrupted chunk → refused, target untouched
+    with open(os.path.join(bundle, "chunk_00003.bin"), "r+b") as f:
+        f.write(b"\x00")
+    with pytest.raises(ValueError):
+        HEVectorStore.import_snapshot(bundle, ckks_context_path, str(tmp_path / "bad.db"), store.id_key_path)
+    assert not os.path.exists(tmp_path / "bad.db")
+    assert not [p for p in os.listdir(tmp_path) if ".importing" in p]  # partial import removed
+    # an existing target is left as it was
+    with pytest.raises(ValueError):
+        HEVectorStore.import_snapshot(bundle, ckks_context_path, str(tmp_path / "replica" / "r.db"), store.id_key_path)
+    assert os.listdir(tmp_path / "replica") == ["r.db"]
+    replica = HEVectorStore(context_path=ckks_context_path, db_path=str(tmp_path / "replica" / "r.db"),
+                            id_key_path=store.id_key_path)
+    try:
+        assert replica.count() == 6
+    finally:
+        replica.close()
+
+
+def test_snapshot_rejects_other_key_and_keeps_layout(make_store, tmp_path, ckks_context_path):
+    store = make_store(cls=PackedVectorStore, block_size=4)
+    store.add(ids=[f"p{i}" for i in range(5)], embeddings=np.eye(5, 8).tolist())
+    bundle = str(tmp_path / "bundle")
+    store.export_snapshot(bundle)
+    with open(os.path.join(bundle, "manifest.json")) as f:
+        assert json.load(f)["store_class"] == "PackedVectorStore"
+
+    other_key = str(tmp_path / "other" / "k.key")
+    with pytest.raises(ValueError):
+        PackedVectorStore.import_snapshot(bundle, ckks_context_path, str(tmp_path / "x.db"), other_key)
+    os.makedirs(os.path.dirname(other_key))
+    HEVectorStore.load_or_create_fernet_key(store, other_key)
+    with pytest.raises(ValueError):
+        PackedVectorStore.import_snapshot(bundle, ckks_context_path, str(tmp_path / "x.db"), other_key)
+
+    replica = PackedVectorStore.import_snapshot(bundle, ckks_context_path, str(tmp_path / "p.db"),
+                                                store.id_key_path, block_size=4)
+    try:
+        hits = replica.query([np.eye(5, 8)[4].tolist()], n_results=1)[0]
+        assert replica.fernet.decrypt(hits[0][0]) == b"p4"
+    finally:
+        replica.close()
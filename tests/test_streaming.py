@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from he_vector_db.metrics import StoreProfiler
+
+
+def _corpus(make_store, n=10, **kwargs):
+    rng = np.random.default_rng(5)
+    docs = rng.standard_normal((n, 8))
+    store = make_store(**kwargs)
+    store.add(ids=[f"d{i}" for i in range(n)], embeddings=docs.tolist())
+    return store, docs
+
+
+def test_query_iter_refines_to_the_full_result_and_can_stop_early(make_store):
+    profiler = StoreProfiler()
+    store, docs = _corpus(make_store, profiler=profiler)
+    q = [docs[7].tolist(), docs[2].tolist()]
+
+    steps = list(store.query_iter(q, n_results=3, chunk_size=4))
+    assert [(s.scanned, s.total) for s in steps] == [(4, 10), (8, 10), (10, 10)]
+    assert steps[-1].done and steps[-1].fraction == 1.0
+    final = store.query(q, n_results=3, max_workers=1)
+    for got, want in zip(steps[-1].hits, final):
+        assert [h[0] for h in got] == [h[0] for h in want]
+    # d7 is in the second chunk: not found after the first one, best hit after the second
+    first_ids = [store.fernet.decrypt(h[0]).decode() for h in steps[0].hits[0]]
+    assert "d7" not in first_ids
+    assert store.fernet.decrypt(steps[1].hits[0][0][0]).decode() == "d7"
+
+    before = profiler.snapshot()["counters"]["docs_scanned"]
+    it = store.query_iter(q, n_results=3, chunk_size=4)
+    next(it)
+    it.close()
+    assert profiler.snapshot()["counters"]["docs_scanned"] - before == 4
+
+
+def test_query_threshold_streams_every_document_above_the_cutoff(make_store):
+    store, docs = _corpus(make_store)
+    unit = docs / np.linalg.norm(docs, axis=1, keepdims=True)
+    q = unit[3]
+    cosine = unit @ q
+    cutoff = float(np.sort(cosine)[-4]) - 1e-3
+
+    hits = list(store.query_threshold([q.tolist()], cutoff, chunk_size=3))
+    got = [store.fernet.decrypt(h[0]).decode() for qi, h in hits]
+    assert got == [f"d{i}" for i in range(10) if cosine[i] >= cutoff]
+    assert all(qi == 0 and abs(h[2] - cosine[int(doc[1:])]) < 1e-4 for (qi, h), doc in zip(hits, got))
+    assert list(store.query_threshold([q.tolist()], 2.0)) == []
+
+
+def test_stores_without_chunked_scans_refuse_streaming(make_store):
+    from he_vector_db.packed import PackedVectorStore
+    from he_vector_db.plain_corpus import PlainCorpusStore
+
+    for cls in (PlainCorpusStore, PackedVectorStore):
+        store = make_store(f"{cls.__name__}.db", cls=cls)
+        store.add(ids=["a"], embeddings=[[1.0, 0.0]])
+        assert not store.supports_streaming
+        with pytest.raises(ValueError, match="streaming queries are not supported"):
+            next(store.query_iter([[1.0, 0.0]]))
+        with pytest.raises(ValueError, match="streaming queries are not supported"):
+            list(store.query_threshold([[1.0, 0.0]], 0.5))
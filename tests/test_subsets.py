@@ -0,0 +1,68 @@
+import sqlite3
+
+import numpy as np
+import pytest
+from cryptography.fernet import Fernet
+
+from he_vector_db.metrics import StoreProfiler
+
+
+def test_nested_subsets_share_ciphertexts(make_store):
+    rng = np.random.default_rng(8)
+    docs = rng.standard_normal((8, 8))
+    ids = [f"d{i}" for i in range(8)]
+    profiler = StoreProfiler()
+    store = make_store(profiler=profiler)
+
+    assert store.add(ids=ids[:5], embeddings=docs[:5].tolist(), subset="sample_5") == []
+    assert store.add(ids=ids, embeddings=docs.tolist(), subset="sample_8") == ids[:5]
+    counters = profiler.snapshot()["counters"]
+    assert counters["docs_added"] == 8 and counters["docs_reused"] == 5
+    assert store.count() == 8 and store.subsets() == {"sample_5": 5, "sample_8": 8}
+
+    def names(hits):
+        return [store.fernet.decrypt(h[0]).decode() for h in hits]
+
+    q = [docs[6].tolist()]
+    assert names(store.query(q, n_results=1, max_workers=1, subset="sample_8")[0]) == ["d6"]
+    small = store.query(q, n_results=8, max_workers=1, subset="sample_5")[0]
+    assert sorted(names(small)) == ids[:5]
+    progress = list(store.query_iter(q, n_results=2, subset="sample_5"))
+    assert progress[-1].total == 5
+    assert sorted(store.fernet.decrypt(i).decode() for i in store.get_all_ids(subset="sample_5")) == ids[:5]
+    with pytest.raises(ValueError):
+        store.query(q, n_results=1, subset="sample_100")
+
+
+def test_add_reports_ids_it_did_not_overwrite(make_store, caplog):
+    store = make_store()
+    store.add(ids=["a", "b"], embeddings=[[1.0, 0.0], [0.0, 1.0]], documents=["old a", "old b"])
+    with caplog.at_level("INFO", logger="he_vector_db.store"):
+        skipped = store.add(ids=["b", "c", "c"], embeddings=[[1.0, 1.0]] * 3, documents=["new b", "c", "c2"])
+    assert skipped == ["b", "c"]  # "c" repeated within the batch keeps its first row
+    assert "2 of 3 ids already stored" in caplog.text and "new b" not in caplog.text
+    assert store.count() == 3
+    hit = store.query([[0.0, 1.0]], n_results=1)[0][0]
+    assert store.fernet.decrypt(hit[0]) == b"b" and store.fernet.decrypt(hit[1]) == b"old b"
+
+
+def test_existing_rows_are_tagged_on_open(make_store, tmp_path):
+    rng = np.random.default_rng(9)
+    docs = rng.standard_normal((3, 8))
+    store = make_store(name="legacy.db")
+    store.add(ids=["a", "b", "c"], embeddings=docs.tolist())
+    store.close()
+    # simulate a store written before id_tag existed, with a duplicate row from the old REPLACE
+    conn = sqlite3.connect(str(tmp_path / "legacy.db"))
+    conn.execute("DROP INDEX idx_vectors_id_tag")
+    conn.execute("UPDATE vectors SET id_tag = NULL")
+    token = Fernet((tmp_path / "fernet.key").read_bytes()).encrypt(b"a")
+    conn.execute("INSERT INTO vectors (id, ciphertext, text_enc) SELECT ?, ciphertext, text_enc FROM vectors WHERE rowid = 1",
+                 (token,))
+    conn.commit()
+    conn.close()
+
+    reopened = make_store(name="legacy.db")
+    assert reopened.count() == 4
+    reopened.add(ids=["a", "d"], embeddings=[docs[0].tolist(), docs[1].tolist()], subset="s")
+    assert reopened.count() == 5 and reopened.count(subset="s") == 2
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# bench_layout.py — row layout (HEVectorStore) vs dimension-major packed layout (PackedVectorStore)
+
+import os
+import json
+import time
+import argparse
+import tempfile
+from typing import Dict
+
+import tenseal as ts
+from cryptography.fernet import Fernet
+from he_vector_db.store import HEVectorStore
+from he_vector_db.packed import PackedVectorStore
+from bench_store import build_context
+from synthetic import SyntheticCorpus
+from settings import (
+    POLY_MOD_DEGREE,
+    COEFF_MOD_BIT_SIZES,
+    GLOBAL_SCALE,
+    LAYOUT_SIZES,
+    LAYOUT_DIM,
+    LAYOUT_QUERIES,
+    LAYOUT_ROW_SAMPLE,
+    LAYOUT_RESULTS_FILE,
+    RANDOM_SEED,
+)
+
+
+def _db_bytes(store) -> int:
+    return sum(os.path.getsize(store.db_path + ext) for ext in ("", "-wal") if os.path.exists(store.db_path + ext))
+
+
+def _top1(store, results, targets) -> float:
+    hits = sum(1 for res, t in zip(results, targets) if res and store.fernet.decrypt(res[0][0]).decode() == t)
+    return hits / len(targets) if targets else 0.0
+
+
+def bench_layout(store, corpus: SyntheticCorpus, size: int, n_queries: int, batch: int) -> Dict[str, float]:
+    """Ingest `size` docs in `batch`-sized add() calls, then time one query() of `n_queries` queries."""
+    t0 = time.perf_counter()
+    for offset in range(0, size, batch):
+        n = min(batch, size - offset)
+        ids, texts, _ = corpus.docs(n, offset)
+        store.add(ids=ids, embeddings=corpus.doc_matrix(n, offset), documents=texts)
+    ingest = time.perf_counter() - t0
+
+    queries, targets = corpus.queries(n_queries, size)
+    t0 = time.perf_counter()
+    results = store.query(embeddings=queries, n_results=1, max_workers=1)
+    query = time.perf_counter() - t0
+    return {
+        "docs": size,
+        "ingest_sec": ingest,
+        "ingest_docs_per_sec": size / ingest if ingest > 0 else 0.0,
+        "query_sec": query / n_queries,
+        "docs_scored_per_sec": size * n_queries / query if query > 0 else 0.0,
+        "db_bytes": _db_bytes(store),
+        "top1_accuracy": _top1(store, results, targets),
+    }
+
+
+def run(sizes, dim: int, n_queries: int, row_sample: int, seed: int) -> dict:
+    corpus = SyntheticCorpus(dim=dim, seed=seed)
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="he_layout_") as workdir:
+        ctx_path = os.path.join(workdir, "ckks_context.sk")
+        key_path = os.path.join(workdir, "fernet.key")
+        build_context(ctx_path, POLY_MOD_DEGREE, COEFF_MOD_BIT_SIZES, GLOBAL_SCALE)
+        with open(key_path, "wb") as f:
+            f.write(Fernet.generate_key())
+
+        def open_store(cls, name, **kw):
+            return cls(context_path=ctx_path, db_path=os.path.join(workdir, name),
+                       id_key_path=key_path, **kw)
+
+        # Row layout: cost is linear in the corpus size, so it is measured on
+        # `row_sample` docs and extrapolated to each size (marked as such).
+        n = min(row_sample, max(sizes))
+        print(f"▶ row layout (measured on {n} docs)")
+        store = open_store(HEVectorStore, "row")
+        row = bench_layout(store, corpus, n, n_queries, batch=1000)
+        store.close()
+
+        for size in sizes:
+            scale = size / n
+            results[f"row n={size} d={dim}"] = {
+                "docs": size,
+                "ingest_sec": row["ingest_sec"] * scale,
+                "ingest_docs_per_sec": row["ingest_docs_per_sec"],
+                "query_sec": row["query_sec"] * scale,
+                "docs_scored_per_sec": row["docs_scored_per_sec"],
+                "db_bytes": int(row["db_bytes"] * scale),
+                "top1_accuracy": row["top1_accuracy"],
+                "extrapolated_from": n,
+            }
+            for mode in ("plain", "encrypted"):
+                key = f"packed-{mode} n={size} d={dim}"
+                print(f"▶ {key}")
+                store = open_store(PackedVectorStore, f"packed_{size}", query_mode=mode)
+                if store.count() == 0:
+                    results[key] = bench_layout(store, corpus, size, n_queries, batch=store.block_size)
+                else:
+                    # 같은 크기의 packed DB 재사용 → 쿼리만 측정
+                    queries, targets = corpus.queries(n_queries, size)
+                    t0 = time.perf_counter()
+                    res = store.query(embeddings=queries, n_results=1)
+                    q = time.perf_counter() - t0
+                    results[key] = {
+                        "docs": size,
+                        "query_sec": q / n_queries,
+                        "docs_scored_per_sec": size * n_queries / q if q > 0 else 0.0,
+                        "db_bytes": _db_bytes(store),
+                        "top1_accuracy": _top1(store, res, targets),
+                    }
+                store.close()
+                row_q = results[f"row n={size} d={dim}"]["query_sec"]
+                results[key]["query_speedup_vs_row"] = row_q / results[key]["query_sec"]
+
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime()),
+            "tenseal": getattr(ts, "__version__", "unknown"),
+            "poly_mod_degree": POLY_MOD_DEGREE,
+            "dim": dim,
+            "queries": n_queries,
+            "row_sample": n,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Row vs dimension-major packed layout benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=LAYOUT_SIZES)
+    parser.add_argument("--dim", type=int, default=LAYOUT_DIM)
+    parser.add_argument("--queries", type=int, default=LAYOUT_QUERIES)
+    parser.add_argument("--row-sample", type=int, default=LAYOUT_ROW_SAMPLE)
+    parser.add_argument("--seed", type=int, default=RANDOM_SEED or 42)
+    parser.add_argument("--output", default=LAYOUT_RESULTS_FILE)
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.dim, args.queries, args.row_sample, args.seed)
+    for key, r in report["results"].items():
+        speedup = r.get("query_speedup_vs_row")
+        print(f"{key:<32} query {r['query_sec']:>10.3f}s  "
+              f"{r['docs_scored_per_sec']:>10.0f} docs/s  top1={r['top1_accuracy']:.2f}"
+              + (f"  ×{speedup:.1f} vs row" if speedup else ""))
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# bench_store.py — offline micro-benchmarks for HEVectorStore (no dataset / ollama needed)
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import tempfile
+from typing import Dict, List
+
+import tenseal as ts
+from cryptography.fernet import Fernet
+from he_vector_db.store import HEVectorStore
+from synthetic import SyntheticCorpus
+from settings import (
+    POLY_MOD_DEGREE,
+    COEFF_MOD_BIT_SIZES,
+    GLOBAL_SCALE,
+    BENCH_SIZES,
+    BENCH_DIMS,
+    BENCH_QUERY_BATCHES,
+    BENCH_WORKERS,
+    BENCH_REPEATS,
+    BENCH_TOLERANCE,
+    BENCH_RESULTS_FILE,
+    BENCH_BASELINE_FILE,
+    RANDOM_SEED,
+)
+
+# 한 문서씩 add() 하는 구간의 최대 문서 수 (나머지는 한 번의 add() 호출로 배치 삽입)
+SINGLE_ADD_DOCS = 50
+
+
+def build_context(path: str, poly_mod_degree: int, coeff_mod_bit_sizes: List[int], global_scale: int):
+    """Create a throw-away secret CKKS context file for the benchmark run."""
+    context = ts.context(
+        ts.SCHEME_TYPE.CKKS,
+        poly_modulus_degree=poly_mod_degree,
+        coeff_mod_bit_sizes=coeff_mod_bit_sizes
+    )
+    context.generate_galois_keys()
+    context.global_scale = global_scale
+    with open(path, "wb") as f:
+        f.write(context.serialize(save_secret_key=True))
+
+
+def _open_store(workdir: str, name: str) -> HEVectorStore:
+    return HEVectorStore(
+        context_path=os.path.join(workdir, "ckks_context.sk"),
+        db_path=os.path.join(workdir, name, "he_vector_store.db"),
+        id_key_path=os.path.join(workdir, "fernet.key"),
+    )
+
+
+def bench_ingest(workdir: str, corpus: SyntheticCorpus, size: int) -> Dict[str, float]:
+    """
+    Ingest `size` synthetic docs into a fresh store.
+      - add      : one document per add() call (makedb.py style)
+      - add_batch: all remaining documents in a single add() call
+      - startup  : HEVectorStore() construction on the populated store
+    """
+    name = f"store_n{size}_d{corpus.dim}"
+    os.makedirs(os.path.join(workdir, name), exist_ok=True)
+    store = _open_store(workdir, name)
+    ids, texts, embs = corpus.docs(size)
+
+    n_single = min(SINGLE_ADD_DOCS, size // 2)
+    t0 = time.perf_counter()
+    for i in range(n_single):
+        store.add(ids=[ids[i]], embeddings=[embs[i]], documents=[texts[i]])
+    t_single = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    store.add(ids=ids[n_single:], embeddings=embs[n_single:], documents=texts[n_single:])
+    t_batch = time.perf_counter() - t0
+    store.close()
+
+    # 컨텍스트 파싱/검증이 지배적 → 3회 중 최소값 사용
+    startups = []
+    for _ in range(3):
+        t0 = time.perf_counter()
+        store = _open_store(workdir, name)
+        startups.append(time.perf_counter() - t0)
+        store.close()
+    t_startup = min(startups)
+
+    return {
+        "add_docs_per_sec": n_single / t_single if t_single > 0 else 0.0,
+        "add_batch_docs_per_sec": (size - n_single) / t_batch if t_batch > 0 else 0.0,
+        "startup_sec": t_startup,
+    }
+
+
+def bench_query(
+    workdir: str,
+    corpus: SyntheticCorpus,
+    size: int,
+    query_batch: int,
+    workers: int,
+    repeats: int
+) -> Dict[str, float]:
+    """Time `repeats` query() calls of `query_batch` queries each against the populated store."""
+    store = _open_store(workdir, f"store_n{size}_d{corpus.dim}")
+    queries, targets = corpus.queries(query_batch, size)
+
+    latencies = []
+    hits = 0
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        results = store.query(embeddings=queries, n_results=1, max_workers=workers)
+        latencies.append(time.perf_counter() - t0)
+    for res, target in zip(results, targets):
+        if res and store.fernet.decrypt(res[0][0]).decode() == target:
+            hits += 1
+    store.close()
+
+    mean = statistics.mean(latencies)
+    return {
+        "latency_mean_sec": mean,
+        "latency_min_sec": min(latencies),
+        "qps": query_batch / mean if mean > 0 else 0.0,
+        "docs_scored_per_sec": size * query_batch / mean if mean > 0 else 0.0,
+        "top1_accuracy": hits / query_batch,
+    }
+
+
+def run_suite(
+    sizes: List[int],
+    dims: List[int],
+    query_batches: List[int],
+    workers: List[int],
+    repeats: int,
+    seed: int,
+    poly_mod_degree: int
+) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="he_bench_") as workdir:
+        t0 = time.perf_counter()
+        build_context(os.path.join(workdir, "ckks_context.sk"), poly_mod_degree, COEFF_MOD_BIT_SIZES, GLOBAL_SCALE)
+        results["context_keygen"] = {"keygen_sec": time.perf_counter() - t0}
+        with open(os.path.join(workdir, "fernet.key"), "wb") as f:
+            f.write(Fernet.generate_key())
+
+        for dim in dims:
+            corpus = SyntheticCorpus(dim=dim, seed=seed)
+            for size in sizes:
+                key = f"ingest n={size} d={dim}"
+                print(f"▶ {key}")
+                results[key] = bench_ingest(workdir, corpus, size)
+                for qb in query_batches:
+                    for w in workers:
+                        key = f"query n={size} d={dim} qb={qb} w={w}"
+                        print(f"▶ {key}")
+                        results[key] = bench_query(workdir, corpus, size, qb, w, repeats)
+
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime()),
+            "host": platform.node(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "tenseal": getattr(ts, "__version__", "unknown"),
+            "poly_mod_degree": poly_mod_degree,
+            "coeff_mod_bit_sizes": COEFF_MOD_BIT_SIZES,
+            "seed": seed,
+            "repeats": repeats,
+        },
+        "results": results,
+    }
+
+
+# 이 값들이 baseline 과 다르면 수치 비교가 의미 없다 (CPU 수가 다르면 w>1 처리량이 그대로 달라짐)
+HOST_KEYS = ("host", "machine", "cpu_count", "python", "tenseal", "poly_mod_degree", "coeff_mod_bit_sizes")
+
+
+def host_mismatches(current: dict, baseline: dict) -> List[str]:
+    """Host/config metadata that differs between the two runs ("key: baseline → current")."""
+    cur, base = current.get("meta", {}), baseline.get("meta", {})
+    return [f"{k}: {base.get(k)!r} → {cur.get(k)!r}" for k in HOST_KEYS if base.get(k) != cur.get(k)]
+
+
+def _higher_is_better(metric: str) -> bool:
+    return metric.endswith("_per_sec") or metric in ("qps", "top1_accuracy")
+
+
+def compare_to_baseline(current: dict, baseline: dict, tolerance: float) -> List[dict]:
+    """
+    Compare every metric present in both runs.
+    A metric regresses when it is worse than the baseline by more than `tolerance` (relative).
+    """
+    rows = []
+    for key, metrics in current["results"].items():
+        base_metrics = baseline.get("results", {}).get(key)
+        if not base_metrics:
+            continue
+        for metric, value in metrics.items():
+            base = base_metrics.get(metric)
+            if base is None or base == 0:
+                continue
+            change = (value - base) / abs(base)
+            worse = -change if _higher_is_better(metric) else change
+            rows.append({
+                "scenario": key,
+                "metric": metric,
+                "baseline": base,
+                "current": value,
+                "change": change,
+                "regression": worse > tolerance,
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline HEVectorStore micro-benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=BENCH_SIZES)
+    parser.add_argument("--dims", type=int, nargs="+", default=BENCH_DIMS)
+    parser.add_argument("--query-batches", type=int, nargs="+", default=BENCH_QUERY_BATCHES)
+    parser.add_argument("--workers", type=int, nargs="+", default=BENCH_WORKERS)
+    parser.add_argument("--repeats", type=int, default=BENCH_REPEATS)
+    parser.add_argument("--seed", type=int, default=RANDOM_SEED or 42)
+    parser.add_argument("--poly-mod-degree", type=int, default=POLY_MOD_DEGREE)
+    parser.add_argument("--output", default=BENCH_RESULTS_FILE)
+    parser.add_argument("--baseline", default=BENCH_BASELINE_FILE)
+    parser.add_argument("--tolerance", type=float, default=BENCH_TOLERANCE)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="write this run to --baseline instead of comparing against it")
+    parser.add_argument("--force-compare", action="store_true",
+                        help="compare (and fail on regressions) even when the baseline was recorded on another host")
+    args = parser.parse_args()
+
+    report = run_suite(
+        sizes=args.sizes,
+        dims=args.dims,
+        query_batches=args.query_batches,
+        workers=args.workers,
+        repeats=args.repeats,
+        seed=args.seed,
+        poly_mod_degree=args.poly_mod_degree,
+    )
+
+    regressions = []
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        mismatches = host_mismatches(report, baseline)
+        if mismatches:
+            report["baseline_host_mismatch"] = mismatches
+            print(f"⚠️  Baseline {args.baseline} was recorded on a different host/config:")
+            for m in mismatches:
+                print(f"     {m}")
+        if mismatches and not args.force_compare:
+            print("Skipping comparison (re-record with --save-baseline on this host, or pass --force-compare).")
+        else:
+            report["comparison"] = compare_to_baseline(report, baseline, args.tolerance)
+            report["comparison_tolerance"] = args.tolerance
+            regressions = [r for r in report["comparison"] if r["regression"]]
+            for r in report["comparison"]:
+                flag = "❌" if r["regression"] else "  "
+                print(f"{flag} {r['scenario']:<36} {r['metric']:<24} "
+                      f"{r['baseline']:>12.4f} → {r['current']:>12.4f} ({r['change']:+.1%})")
+    else:
+        print(f"No baseline at {args.baseline}; skipping comparison.")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results saved to {args.output}")
+
+    if regressions:
+        print(f"{len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# settings.py for benchmarks
+
+import yaml
+from pathlib import Path
+
+# 1) Locate project root by finding config/config.yaml
+HERE = Path(__file__).resolve()
+root = HERE.parent
+config_path = root / "config" / "config.yaml"
+while not config_path.exists():
+    if root.parent == root:
+        raise FileNotFoundError(
+            f"config/config.yaml not found. Last checked: {root}"
+        )
+    root = root.parent
+    config_path = root / "config" / "config.yaml"
+
+# PROJECT_ROOT is the directory containing config/
+PROJECT_ROOT = root
+
+# 2) Load YAML configuration
+with open(PROJECT_ROOT / "config" / "config.yaml", "r", encoding="utf-8") as f:
+    cfg = yaml.safe_load(f)
+
+# 3) CKKS parameters (benchmarks build their own throw-away context)
+ckks_cfg = cfg.get("ckks_params", {})
+POLY_MOD_DEGREE = ckks_cfg.get("poly_mod_degree")
+COEFF_MOD_BIT_SIZES = ckks_cfg.get("coeff_mod_bit_sizes")
+GLOBAL_SCALE = ckks_cfg.get("global_scale")
+
+# 4) Benchmark settings
+bench_cfg = cfg.get("benchmark", {})
+BENCH_SIZES = bench_cfg.get("sizes", [100, 300])
+BENCH_DIMS = bench_cfg.get("dims", [64, 256])
+BENCH_QUERY_BATCHES = bench_cfg.get("query_batches", [1, 4])
+BENCH_WORKERS = bench_cfg.get("workers", [1, 4])
+BENCH_REPEATS = bench_cfg.get("repeats", 2)
+BENCH_TOLERANCE = bench_cfg.get("tolerance", 0.25)
+
+# Row vs packed layout (bench_layout.py)
+LAYOUT_SIZES = bench_cfg.get("layout_sizes", [10000, 50000, 100000])
+LAYOUT_DIM = bench_cfg.get("layout_dim", 1024)
+LAYOUT_QUERIES = bench_cfg.get("layout_queries", 2)
+LAYOUT_ROW_SAMPLE = bench_cfg.get("layout_row_sample", 500)
+
+# 5) Output files
+out_cfg = cfg.get("output", {})
+RESULTS_DIR = PROJECT_ROOT / out_cfg.get("results_dir", "results")
+BENCH_RESULTS_FILE = str(RESULTS_DIR / bench_cfg.get("results_file", "bench_store.json"))
+BENCH_BASELINE_FILE = str(PROJECT_ROOT / bench_cfg.get("baseline_file", "benchmarks/baseline.json"))
+LAYOUT_RESULTS_FILE = str(RESULTS_DIR / bench_cfg.get("layout_results_file", "bench_layout.json"))
+
+# 6) Random seed
+RANDOM_SEED = cfg.get("random_seed")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# synthetic.py — seeded synthetic embeddings for offline benchmarks
+
+from typing import List, Tuple
+
+import numpy as np
+
+
+class SyntheticCorpus:
+    """
+    Deterministic generator of document/query embeddings.
+
+    Documents are i.i.d. Gaussian vectors; each query is a noisy copy of a
+    random document, so exact search has a known nearest neighbour.
+    The same (dim, seed) always yields the same vectors, independent of call order.
+    """
+
+    BLOCK = 1024  # rows are generated in fixed blocks so any slice is reproducible
+
+    def __init__(self, dim: int, seed: int = 42, noise: float = 0.1):
+        self.dim = dim
+        self.seed = seed
+        self.noise = noise
+
+    def _rng(self, stream: int, block: int = 0) -> np.random.Generator:
+        return np.random.default_rng([self.seed, self.dim, stream, block])
+
+    def _block(self, b: int) -> np.ndarray:
+        return self._rng(0, b).standard_normal((self.BLOCK, self.dim)).astype(np.float32)
+
+    def doc_matrix(self, n: int, offset: int = 0) -> np.ndarray:
+        """Return an (n, dim) float32 matrix of documents `offset .. offset+n-1`."""
+        out = np.empty((n, self.dim), dtype=np.float32)
+        pos = 0
+        while pos < n:
+            b, r = divmod(offset + pos, self.BLOCK)
+            take = min(self.BLOCK - r, n - pos)
+            out[pos:pos + take] = self._block(b)[r:r + take]
+            pos += take
+        return out
+
+    def docs(self, n: int, offset: int = 0) -> Tuple[List[str], List[str], List[List[float]]]:
+        """Return (ids, texts, embeddings) for `n` documents starting at `offset`."""
+        mat = self.doc_matrix(n, offset)
+        ids = [f"syn-{self.seed}-{offset + i}" for i in range(n)]
+        texts = [f"synthetic document {offset + i}" for i in range(n)]
+        return ids, texts, mat.tolist()
+
+    def queries(self, m: int, corpus_size: int) -> Tuple[List[List[float]], List[str]]:
+        """Return `m` query embeddings and the id of the document each was derived from."""
+        rng = self._rng(1)
+        targets = rng.integers(0, corpus_size, size=m)
+        base = np.empty((m, self.dim), dtype=np.float32)
+        # 블록 단위로 묶어 생성 → 블록당 한 번만 난수 생성
+        for b in np.unique(targets // self.BLOCK):
+            sel = np.nonzero(targets // self.BLOCK == b)[0]
+            base[sel] = self._block(int(b))[targets[sel] % self.BLOCK]
+        queries = base + self.noise * rng.standard_normal((m, self.dim))
+        return queries.tolist(), [f"syn-{self.seed}-{int(t)}" for t in targets]
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# metrics_engine.py — vectorized NDCG@k / Recall@k / MRR / overlap for every results file in one run
+
+import os
+import json
+import time
+import argparse
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from he_vector_db.retrieval_metrics import Qrels, load_results, compute_metrics
+from settings import (
+    DATASET_NAME,
+    SAMPLE_SIZES,
+    METRICS_K,
+    NDCG_IDEAL,
+    QRELS_CACHE,
+    BACKEND_PATTERNS,
+    RETRIEVAL_METRICS_FILE,
+    get_results_path,
+    get_exact_results_path,
+    get_per_query_path,
+)
+
+
+def evaluate_all(
+    sizes: Sequence[int],
+    backends: Sequence[str],
+    k: int,
+    qrels: Qrels,
+    write_per_query: bool = True,
+    ndcg_ideal: str = NDCG_IDEAL
+) -> pd.DataFrame:
+    """Evaluate every (backend, size) results file that exists; return one summary table."""
+    rows = []
+    for size in sizes:
+        exact_path = get_exact_results_path(size)
+        reference = load_results(exact_path, k) if os.path.exists(exact_path) else None
+        for backend in backends:
+            path = get_results_path(backend, size)
+            if not os.path.exists(path):
+                print(f"  - skip {backend}/{size}: {path} not found")
+                continue
+            query_ids, docs = load_results(path, k)
+            df = compute_metrics(qrels, query_ids, docs, k, reference, ndcg_ideal)
+            if write_per_query:
+                df.to_csv(get_per_query_path(backend, size), index=False, float_format="%.6f")
+            summary = {"backend": backend, "sample_size": size, "queries": len(df)}
+            for col in df.columns[1:]:
+                summary[col] = float(np.nanmean(df[col])) if df[col].notna().any() else float("nan")
+            rows.append(summary)
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval metrics for all backends and sample sizes")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SAMPLE_SIZES)
+    parser.add_argument("--backends", nargs="+", default=list(BACKEND_PATTERNS))
+    parser.add_argument("-k", type=int, default=METRICS_K)
+    parser.add_argument("--ndcg-ideal", choices=["retrieved", "qrels"], default=NDCG_IDEAL,
+                        help="NDCG normaliser: ideal order of the retrieved list (default, as before) or of all qrels")
+    parser.add_argument("--dataset", default=DATASET_NAME)
+    parser.add_argument("--qrels-cache", default=str(QRELS_CACHE))
+    parser.add_argument("--output", default=RETRIEVAL_METRICS_FILE)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    qrels = Qrels.load(args.dataset, args.qrels_cache)
+    t_qrels = time.perf_counter() - t0
+
+    summary = evaluate_all(args.sizes, args.backends, args.k, qrels, ndcg_ideal=args.ndcg_ideal)
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    summary.to_csv(args.output, index=False, float_format="%.6f")
+    with open(os.path.splitext(args.output)[0] + ".json", "w", encoding="utf-8") as f:
+        json.dump(summary.to_dict(orient="records"), f, ensure_ascii=False, indent=2)
+
+    print(summary.to_string(index=False))
+    print(f"\nqrels load {t_qrels:.2f}s, total {time.perf_counter() - t0:.2f}s → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,73 +1,49 @@
 #!/usr/bin/env python3
-# ndcg5_with_rels.py
+# ndcg5_with_rels.py — single-file NDCG@k (kept for manual use; run_eval.sh uses metrics_engine.py)
 
-import json
 import sys
 import os
 
-import ir_datasets
 import numpy as np
 import pandas as pd
 
-
-def dcg_at_k(rels, k):
-    return sum((2**rels[i] - 1) / np.log2(i + 2) for i in range(min(len(rels), k)))
-
-
-def ndcg_at_k(rels, k=5):
-    dcg = dcg_at_k(rels, k)
-    ideal = sorted(rels, reverse=True)
-    idcg = dcg_at_k(ideal, k)
-    return dcg / idcg if idcg > 0 else 0.0
+from he_vector_db.retrieval_metrics import Qrels, load_results, compute_metrics
+from settings import QRELS_CACHE
 
 
 def compute_ndcg5_with_rels(
     input_path: str,
     output_csv_path: str,
     dataset_name: str = "miracl/en/dev",
-    k: int = 5
+    k: int = 5,
+    qrels_cache: str = str(QRELS_CACHE)
 ):
     """
     Load eval_results JSON, compute NDCG@k per query, and save CSV.
     Each row contains: query_id, list of binary relevance labels, NDCG@k.
-    Adds an AVERAGE row at the end.
+    Adds an AVERAGE row at the end. Qrels come from the cached .npz (see metrics_engine.Qrels).
     """
     # 1) Load eval_results
     if not os.path.exists(input_path):
         raise FileNotFoundError(f"{input_path} not found.")
-    with open(input_path, 'r', encoding='utf-8') as f:
-        eval_results = json.load(f)
-    if not eval_results:
+    query_ids, docs = load_results(input_path, k)
+    if not query_ids:
         raise ValueError("No evaluation results to process.")
 
-    # 2) Load qrels
-    dataset = ir_datasets.load(dataset_name)
-    qrels = {}
-    for qrel in dataset.qrels_iter():
-        qid = str(qrel.query_id)
-        qrels.setdefault(qid, {})[qrel.doc_id] = qrel.relevance
-
-    # 3) Process each entry
-    records = []
-    for entry in eval_results:
-        qid = str(entry.get('query_id'))
-        hits = entry.get('results', [])
-        doc_ids = [h.get('doc_id') for h in hits]
-        rels = [1 if qrels.get(qid, {}).get(did, 0) > 0 else 0 for did in doc_ids]
-        score = ndcg_at_k(rels, k)
-        records.append({
-            'query_id': qid,
-            'rels': rels,
-            f'NDCG@{k}': score
-        })
+    # 2) Load qrels (cached)
+    qrels = Qrels.load(dataset_name, qrels_cache)
 
-    if not records:
-        raise ValueError("After processing, no records to compute.")
+    # 3) Vectorized metrics
+    rels = (qrels.relevance(query_ids, docs) > 0).astype(int)
+    metrics = compute_metrics(qrels, query_ids, docs, k)
 
     # 4) Build DataFrame and append average row
-    df = pd.DataFrame(records, columns=['query_id', 'rels', f'NDCG@{k}'])
-    df[f'NDCG@{k}'] = df[f'NDCG@{k}'].astype(float)
-    avg_score = df[f'NDCG@{k}'].mean()
+    df = pd.DataFrame({
+        'query_id': query_ids,
+        'rels': [list(r) for r in rels],
+        f'NDCG@{k}': metrics[f'NDCG@{k}'].astype(float),
+    })
+    avg_score = float(np.mean(df[f'NDCG@{k}']))
     df.loc[len(df)] = ['AVERAGE', ['-'] * k, avg_score]
 
     # 5) Save CSV
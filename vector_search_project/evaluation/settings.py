@@ -0,0 +1,60 @@
+# settings.py for evaluation
+
+import yaml
+from pathlib import Path
+
+# 1) Locate project root by finding config/config.yaml
+HERE = Path(__file__).resolve()
+root = HERE.parent
+config_path = root / "config" / "config.yaml"
+while not config_path.exists():
+    if root.parent == root:
+        raise FileNotFoundError(
+            f"config/config.yaml not found. Last checked: {root}"
+        )
+    root = root.parent
+    config_path = root / "config" / "config.yaml"
+
+# PROJECT_ROOT is the directory containing config/
+PROJECT_ROOT = root
+
+# 2) Load YAML configuration
+with open(PROJECT_ROOT / "config" / "config.yaml", "r", encoding="utf-8") as f:
+    cfg = yaml.safe_load(f)
+
+# 3) Dataset / sample sizes
+input_cfg = cfg.get("input", {})
+DATASET_NAME = input_cfg.get("dataset_name", "miracl/en/dev")
+SAMPLE_SIZES = input_cfg.get("sample_sizes", [])
+
+# 4) Evaluation settings
+eval_cfg = cfg.get("evaluation", {})
+METRICS_K = eval_cfg.get("k", 5)
+NDCG_IDEAL = eval_cfg.get("ndcg_ideal", "retrieved")
+QRELS_CACHE = PROJECT_ROOT / input_cfg.get("base_dir", "data") / DATASET_NAME / eval_cfg.get("qrels_cache", "qrels.npz")
+
+# 5) Result files
+out_cfg = cfg.get("output", {})
+RESULTS_DIR = PROJECT_ROOT / out_cfg.get("results_dir", "results")
+EVAL_FILE_PATTERN = out_cfg.get("eval_results_pattern", "eval_results_{size}.json")
+PLAIN_EVAL_FILE_PATTERN = out_cfg.get("plain_eval_results_pattern", "chroma_eval_results_{size}.json")
+EXACT_RESULTS_PATTERN = out_cfg.get("exact_results_pattern", "exact_results_{size}.json")
+RETRIEVAL_METRICS_FILE = str(RESULTS_DIR / out_cfg.get("retrieval_metrics_file", "retrieval_metrics.csv"))
+
+# Backend name → eval results file pattern (evaluated side by side)
+BACKEND_PATTERNS = {
+    "he": EVAL_FILE_PATTERN,
+    "chroma": PLAIN_EVAL_FILE_PATTERN,
+}
+
+
+def get_results_path(backend: str, size: int) -> str:
+    return str(RESULTS_DIR / BACKEND_PATTERNS[backend].format(size=size))
+
+
+def get_exact_results_path(size: int) -> str:
+    return str(RESULTS_DIR / EXACT_RESULTS_PATTERN.format(size=size))
+
+
+def get_per_query_path(backend: str, size: int) -> str:
+    return str(RESULTS_DIR / f"per_query_{backend}_{size}.csv")
@@ -0,0 +1,183 @@
+# backends.py — common interface over HEVectorStore, Chroma and the exact NumPy engine
+
+import os
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from he_vector_db.exact import ExactSearch
+
+Hit = Tuple[str, float]  # (doc_id, cosine similarity)
+
+
+class Backend:
+    """
+    build(docs, size)       : make the `size` first documents of an EmbeddingStore searchable
+    query_batch(q, n)       : top-n (doc_id, cosine similarity) per query row
+    stats()                 : backend-specific numbers (build time, disk size, ...)
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.build_time = 0.0
+
+    def build(self, docs, size: int) -> None:
+        raise NotImplementedError
+
+    def query_batch(self, embeddings: np.ndarray, n_results: int) -> List[List[Hit]]:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {"build_time": self.build_time}
+
+    def close(self) -> None:
+        pass
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            total += os.path.getsize(os.path.join(root, f))
+    return total
+
+
+class NumpyBackend(Backend):
+    """Exact brute-force cosine search (blocked GEMM over the memory-mapped matrix)."""
+
+    name = "numpy"
+
+    def build(self, docs, size: int) -> None:
+        t0 = time.perf_counter()
+        self.engine = ExactSearch.from_embedding_store(docs, limit=size)
+        self.build_time = time.perf_counter() - t0
+
+    def query_batch(self, embeddings: np.ndarray, n_results: int) -> List[List[Hit]]:
+        return [[(d, s) for d, _, s in row] for row in self.engine.query(embeddings, n_results)]
+
+    def stats(self) -> dict:
+        return {"build_time": self.build_time, "docs": len(self.engine)}
+
+
+class ChromaBackend(Backend):
+    """Chroma HNSW (cosine space); distances are converted to similarities."""
+
+    name = "chroma"
+
+    def __init__(self, db_dir: str, collection_name: str, batch_size: int = 1000):
+        super().__init__()
+        self.db_dir = db_dir
+        self.collection_name = collection_name
+        self.batch_size = batch_size
+
+    def build(self, docs, size: int) -> None:
+        import chromadb
+        from chromadb.config import Settings
+
+        os.makedirs(self.db_dir, exist_ok=True)
+        self.client = chromadb.PersistentClient(path=self.db_dir, settings=Settings())
+        self.collection = self.client.get_or_create_collection(
+            name=self.collection_name, metadata={"hnsw:space": "cosine"}
+        )
+        t0 = time.perf_counter()
+        if self.collection.count() == 0:
+            for ids, contents, matrix in docs.iter_batches(self.batch_size, stop=size):
+                self.collection.add(ids=ids, documents=contents, embeddings=np.asarray(matrix))
+        self.build_time = time.perf_counter() - t0
+
+    def query_batch(self, embeddings: np.ndarray, n_results: int) -> List[List[Hit]]:
+        res = self.collection.query(
+            query_embeddings=np.asarray(embeddings, dtype=np.float32).tolist(),
+            n_results=n_results,
+            include=["distances"],
+        )
+        return [
+            [(d, 1.0 - float(dist)) for d, dist in zip(ids, dists)]
+            for ids, dists in zip(res["ids"], res["distances"])
+        ]
+
+    def stats(self) -> dict:
+        return {"build_time": self.build_time, "docs": self.collection.count(),
+                "disk_bytes": _dir_size(self.db_dir)}
+
+
+class HEBackend(Backend):
+    """CKKS-encrypted HEVectorStore; ids are decrypted with the store's Fernet key."""
+
+    name = "he"
+
+    def __init__(self, db_path: str, context_path: str, id_key_path: str,
+                 max_workers: int = None, batch_size: int = 1000):
+        super().__init__()
+        self.db_path = db_path
+        self.context_path = context_path
+        self.id_key_path = id_key_path
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+
+    def _store_cls(self):
+        from he_vector_db.store import HEVectorStore
+        return HEVectorStore
+
+    def build(self, docs, size: int) -> None:
+        from he_vector_db.metrics import StoreProfiler
+
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.profiler = StoreProfiler()
+        t0 = time.perf_counter()
+        self.store = self._store_cls()(
+            context_path=self.context_path,
+            db_path=self.db_path,
+            id_key_path=self.id_key_path,
+            profiler=self.profiler,
+        )
+        self.startup_time = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        if self.store.count() == 0:
+            for ids, contents, matrix in docs.iter_batches(self.batch_size, stop=size):
+                self.store.add(ids=ids, embeddings=matrix, documents=contents)
+        self.build_time = time.perf_counter() - t0
+
+    def query_batch(self, embeddings: np.ndarray, n_results: int) -> List[List[Hit]]:
+        hits = self.store.query(embeddings=embeddings, n_results=n_results, max_workers=self.max_workers)
+        dec = self.store.fernet.decrypt
+        return [[(dec(enc_id).decode(), float(score)) for enc_id, _, score in row] for row in hits]
+
+    def stats(self) -> dict:
+        return {
+            "build_time": self.build_time,
+            "startup_time": self.startup_time,
+            "docs": self.store.count(),
+            "disk_bytes": os.path.getsize(self.store.db_path),
+            "profile": self.profiler.snapshot(),
+        }
+
+    def close(self) -> None:
+        self.store.close()
+
+
+class HEPlainCorpusBackend(HEBackend):
+    """Encrypted query against a plaintext corpus (PlainCorpusStore, one matrix product per chunk)."""
+
+    name = "he_plain"
+
+    def _store_cls(self):
+        from he_vector_db.plain_corpus import PlainCorpusStore
+        return PlainCorpusStore
+
+
+def make_backend(name: str, size: int, settings) -> Backend:
+    """Instantiate a backend by name using paths from harness/settings.py."""
+    if name == "numpy":
+        return NumpyBackend()
+    if name == "chroma":
+        return ChromaBackend(settings.get_plain_db_dir(size), settings.COLLECTION_NAME, settings.BATCH_SIZE)
+    if name == "he":
+        return HEBackend(settings.get_he_db_path(size), settings.CONTEXT_SECRET, settings.FERNET_KEY_PATH,
+                         settings.MAX_WORKERS, settings.BATCH_SIZE)
+    if name == "he_plain":
+        return HEPlainCorpusBackend(settings.get_he_db_path(size) + "_plain", settings.CONTEXT_SECRET,
+                                    settings.FERNET_KEY_PATH, settings.MAX_WORKERS, settings.BATCH_SIZE)
+    raise ValueError(f"Unknown backend: {name}")
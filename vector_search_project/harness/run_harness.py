@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# run_harness.py — identical batched workloads over every backend, one table per sample size
+
+import os
+import json
+import time
+import resource
+import argparse
+import statistics
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+import settings
+from backends import make_backend
+from he_vector_db.embeddings import open_embeddings
+from he_vector_db.retrieval_metrics import Qrels, compute_metrics, hits_to_matrix
+
+
+def _rss_bytes() -> int:
+    """Current resident set size (Linux /proc), falling back to the peak RSS."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _percentile(values: List[float], p: float) -> float:
+    return float(np.percentile(values, p)) if values else 0.0
+
+
+def run_backend(name: str, size: int, docs, queries: np.ndarray, query_ids: List[str],
+                batch_size: int, n_results: int, qrels) -> dict:
+    backend = make_backend(name, size, settings)
+    rss0 = _rss_bytes()
+    backend.build(docs, size)
+    rss_build = _rss_bytes()
+
+    latencies, hits = [], []
+    t_all = time.perf_counter()
+    for i in range(0, len(queries), batch_size):
+        t0 = time.perf_counter()
+        hits.extend(backend.query_batch(queries[i:i + batch_size], n_results))
+        latencies.append(time.perf_counter() - t0)
+    wall = time.perf_counter() - t_all
+    rss_query = _rss_bytes()
+
+    row = {
+        "backend": name,
+        "sample_size": size,
+        "queries": len(queries),
+        "query_batch_size": batch_size,
+        "batch_latency_mean": statistics.mean(latencies) if latencies else 0.0,
+        "batch_latency_p50": _percentile(latencies, 50),
+        "batch_latency_p95": _percentile(latencies, 95),
+        "qps": len(queries) / wall if wall > 0 else 0.0,
+        "rss_build_mb": (rss_build - rss0) / 2**20,
+        "rss_query_mb": (rss_query - rss_build) / 2**20,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+    stats = backend.stats()
+    row["build_time"] = stats.get("build_time", 0.0)
+    row["disk_mb"] = stats.get("disk_bytes", 0) / 2**20
+    if qrels is not None:
+        df = compute_metrics(qrels, query_ids, hits_to_matrix([[d for d, _ in h] for h in hits], n_results),
+                             n_results)
+        row[f"NDCG@{n_results}"] = float(df[f"NDCG@{n_results}"].mean())
+        row[f"Recall@{n_results}"] = float(np.nanmean(df[f"Recall@{n_results}"])) if df[f"Recall@{n_results}"].notna().any() else float("nan")
+    backend.close()
+    return {"row": row, "stats": stats, "hits": hits}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plain vs encrypted apples-to-apples harness")
+    parser.add_argument("--sizes", type=int, nargs="+", default=settings.SAMPLE_SIZES)
+    parser.add_argument("--backends", nargs="+", default=settings.BACKENDS)
+    parser.add_argument("--query-batch-size", type=int, default=settings.QUERY_BATCH_SIZE)
+    parser.add_argument("--query-num", type=int, default=settings.QUERY_NUM)
+    parser.add_argument("--no-qrels", action="store_true", help="skip NDCG (no ir_datasets access)")
+    args = parser.parse_args()
+
+    qrels = None if args.no_qrels else Qrels.load(settings.DATASET_NAME, str(settings.QRELS_CACHE))
+
+    for size in args.sizes:
+        print(f"\n=== Harness sample_size={size} ===")
+        docs = open_embeddings(settings.get_doc_embeddings_path(size))
+        qstore = open_embeddings(settings.get_query_embeddings_path(size))
+        stop = len(qstore) if args.query_num is None else min(args.query_num, len(qstore))
+        queries = np.asarray(qstore.matrix[:stop], dtype=np.float32)
+        query_ids = qstore.ids[:stop]
+
+        rows, details = [], {}
+        for name in args.backends:
+            print(f"▶ {name}")
+            out = run_backend(name, size, docs, queries, query_ids, args.query_batch_size,
+                              settings.N_RESULTS, qrels)
+            rows.append(out["row"])
+            details[name] = out["stats"]
+
+        table = pd.DataFrame(rows)
+        out_csv = settings.get_harness_path(size)
+        os.makedirs(os.path.dirname(out_csv), exist_ok=True)
+        table.to_csv(out_csv, index=False, float_format="%.6f")
+        with open(os.path.splitext(out_csv)[0] + ".json", "w", encoding="utf-8") as f:
+            json.dump({"rows": rows, "stats": details}, f, ensure_ascii=False, indent=2)
+        print(table.to_string(index=False))
+        print(f"→ {out_csv}")
+
+
+if __name__ == "__main__":
+    main()
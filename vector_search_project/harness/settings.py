@@ -0,0 +1,84 @@
+# settings.py for harness
+
+import yaml
+from pathlib import Path
+
+# 1) Locate project root by finding config/config.yaml
+HERE = Path(__file__).resolve()
+root = HERE.parent
+config_path = root / "config" / "config.yaml"
+while not config_path.exists():
+    if root.parent == root:
+        raise FileNotFoundError(
+            f"config/config.yaml not found. Last checked: {root}"
+        )
+    root = root.parent
+    config_path = root / "config" / "config.yaml"
+
+# PROJECT_ROOT is the directory containing config/
+PROJECT_ROOT = root
+
+# 2) Load YAML configuration
+with open(PROJECT_ROOT / "config" / "config.yaml", "r", encoding="utf-8") as f:
+    cfg = yaml.safe_load(f)
+
+# 3) Experiment parameters
+exp_cfg = cfg.get("experiment", {})
+MAX_WORKERS = exp_cfg.get("max_workers")
+N_RESULTS = exp_cfg.get("n_results")
+QUERY_NUM = exp_cfg.get("query_num")
+
+input_cfg = cfg.get("input", {})
+DATASET_NAME = input_cfg.get("dataset_name", "miracl/en/dev")
+SAMPLE_SIZES = input_cfg.get("sample_sizes", [])
+BASE_EMB_DIR = PROJECT_ROOT / input_cfg.get("base_dir", "data") / DATASET_NAME / input_cfg.get("embedding_dir", "embeddings")
+EMB_FILE_PATTERN = input_cfg.get("embedding_file_pattern", "doc_embeddings_{size}")
+
+# 4) Vector DB locations (shared with he_db_experiments / plain_db_experiments)
+vdb_cfg = cfg.get("vector_db", {})
+he_cfg = vdb_cfg.get("encrypted", {})
+HE_DB_BASE = PROJECT_ROOT / DATASET_NAME / he_cfg.get("base_dir", "data/he_dbs")
+HE_DB_PATTERN = he_cfg.get("db_dir_pattern", "he_db_{size}")
+plain_cfg = vdb_cfg.get("plain", {})
+PLAIN_DB_BASE = PROJECT_ROOT / DATASET_NAME / plain_cfg.get("base_dir", "data/plain_dbs")
+PLAIN_DB_PATTERN = plain_cfg.get("db_dir_pattern", "chroma_db_{size}")
+COLLECTION_NAME = vdb_cfg.get("collection_name", "docs")
+BATCH_SIZE = vdb_cfg.get("batch_size", 1000)
+
+# 5) Keys
+key_cfg = cfg.get("keys", {})
+KEY_BASE = PROJECT_ROOT / key_cfg.get("base_dir", "data/keys")
+FERNET_KEY_PATH = str(KEY_BASE / key_cfg.get("fernet_key", "fernet_symmetric.key"))
+CONTEXT_SECRET = str(KEY_BASE / key_cfg.get("ckks", {}).get("secret", "ckks_context.sk"))
+
+# 6) Harness settings
+harness_cfg = cfg.get("harness", {})
+BACKENDS = harness_cfg.get("backends", ["numpy", "chroma", "he"])
+QUERY_BATCH_SIZE = harness_cfg.get("query_batch_size", 8)
+METRICS_K = cfg.get("evaluation", {}).get("k", 5)
+QRELS_CACHE = PROJECT_ROOT / input_cfg.get("base_dir", "data") / DATASET_NAME / cfg.get("evaluation", {}).get("qrels_cache", "qrels.npz")
+
+# 7) Output
+out_cfg = cfg.get("output", {})
+RESULTS_DIR = PROJECT_ROOT / out_cfg.get("results_dir", "results")
+HARNESS_PATTERN = out_cfg.get("harness_pattern", "harness_{size}.csv")
+
+
+def get_doc_embeddings_path(size: int) -> str:
+    return str(BASE_EMB_DIR / EMB_FILE_PATTERN.format(size=size))
+
+
+def get_query_embeddings_path(size: int) -> str:
+    return str(BASE_EMB_DIR / EMB_FILE_PATTERN.replace("doc_", "query_").format(size=size))
+
+
+def get_he_db_path(size: int) -> str:
+    return str(HE_DB_BASE / HE_DB_PATTERN.format(size=size))
+
+
+def get_plain_db_dir(size: int) -> str:
+    return str(PLAIN_DB_BASE / PLAIN_DB_PATTERN.format(size=size))
+
+
+def get_harness_path(size: int) -> str:
+    return str(RESULTS_DIR / HARNESS_PATTERN.format(size=size))
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# accuracy_report.py — exact NumPy top-k reference + CKKS score-error report per sample size
+
+import os
+import json
+import time
+import argparse
+
+import numpy as np
+from he_vector_db.store import HEVectorStore
+from he_vector_db.embeddings import open_embeddings
+from he_vector_db.exact import ExactSearch, compare_to_exact
+from settings import (
+    SAMPLE_SIZES,
+    get_doc_embeddings_path,
+    get_query_embeddings_path,
+    get_he_store,
+    get_exact_results_path,
+    get_accuracy_path,
+    FERNET_KEY_PATH,
+    CONTEXT_SECRET,
+    MAX_WORKERS,
+    N_RESULTS,
+    QUERY_NUM,
+)
+
+
+def write_exact_results(path: str, query_ids, hits) -> None:
+    """Save exact top-k in the eval_results format (consumed by evaluation/metrics_engine.py)."""
+    results = [
+        {
+            "query_id": qid,
+            "results": [
+                {"rank": r, "doc_id": doc_id, "score": score}
+                for r, (doc_id, _, score) in enumerate(row, start=1)
+            ],
+        }
+        for qid, row in zip(query_ids, hits)
+    ]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+def run_report(size: int, n_results: int, limit: int, max_workers: int, skip_he: bool = False) -> dict:
+    docs = open_embeddings(get_doc_embeddings_path(size))
+    queries = open_embeddings(get_query_embeddings_path(size))
+    stop = len(queries) if limit is None else min(limit, len(queries))
+    query_ids = queries.ids[:stop]
+    q = np.asarray(queries.matrix[:stop])
+
+    # 1) Exact reference: one blocked GEMM over the memory-mapped doc matrix
+    t0 = time.perf_counter()
+    exact = ExactSearch.from_embedding_store(docs, limit=size)
+    exact_hits = exact.query(q, n_results)
+    exact_time = time.perf_counter() - t0
+    write_exact_results(get_exact_results_path(size), query_ids, exact_hits)
+    print(f"[exact] {len(query_ids)} queries × {len(exact)} docs in {exact_time:.3f}s")
+
+    report = {"sample_size": size, "exact_time": exact_time}
+    if skip_he:
+        return report
+
+    # 2) Same queries through HEVectorStore
+    db_path, subset = get_he_store(size)
+    store = HEVectorStore(
+        context_path=CONTEXT_SECRET,
+        db_path=db_path,
+        id_key_path=FERNET_KEY_PATH
+    )
+    t0 = time.perf_counter()
+    he_hits = store.query(embeddings=q, n_results=n_results, max_workers=max_workers, subset=subset)
+    report["he_time"] = time.perf_counter() - t0
+    decoded = [
+        [(store.fernet.decrypt(enc_id).decode(), score) for enc_id, _, score in row]
+        for row in he_hits
+    ]
+    store.close()
+
+    # 3) Score error / rank flips / recall@k against the reference
+    report.update(compare_to_exact(decoded, exact, q, k=n_results))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exact reference search and CKKS accuracy report")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SAMPLE_SIZES)
+    parser.add_argument("--exact-only", action="store_true", help="only write exact_results_{size}.json")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        print(f"\n=== Accuracy report sample_size={size} ===")
+        report = run_report(size, N_RESULTS, QUERY_NUM, MAX_WORKERS, skip_he=args.exact_only)
+        out = get_accuracy_path(size)
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        if not args.exact_only:
+            print(f"  max |Δscore|={report['max_abs_score_error']:.2e}  "
+                  f"mean |Δscore|={report['mean_abs_score_error']:.2e}  "
+                  f"rank flips={report['rank_flips']}  recall@{N_RESULTS}={report[f'recall@{N_RESULTS}']:.3f}")
+        print(f"  → {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# distributed_eval.py — coordinator/worker 모드로 HE 검색 평가
+#
+#   python he_db_experiments/distributed_eval.py                 # localhost 에 local_workers 개 워커 자동 실행
+#   python he_db_experiments/distributed_eval.py --partition-only  # 파티션 DB + 공개 컨텍스트만 생성 (노드 배포용)
+#   python he_db_experiments/distributed_eval.py --workers node1:7700 node2:7700
+#
+# 각 노드에서: python -m he_vector_db.distributed --db part_000.db --context ckks_context.pk --port 7700
+
+import os
+import json
+import time
+import argparse
+
+from he_vector_db.distributed import LocalCluster, QueryCoordinator, partition_store, write_public_context
+from he_vector_db.embeddings import open_embeddings
+from he_vector_db.metrics import StoreProfiler
+from cryptography.fernet import Fernet
+from settings import (
+    SAMPLE_SIZES,
+    get_query_embeddings_path,
+    get_he_db_path,
+    get_partition_dir,
+    get_distributed_eval_path,
+    get_metrics_path,
+    FERNET_KEY_PATH,
+    CONTEXT_SECRET,
+    CONTEXT_PUBLIC,
+    N_RESULTS,
+    QUERY_NUM,
+    DIST_WORKERS,
+    DIST_LOCAL_WORKERS,
+    DIST_MODE,
+    DIST_TIMEOUT,
+)
+
+
+def prepare_partitions(size: int, n_parts: int):
+    """HE DB → n_parts 파티션 DB, 워커용 공개 컨텍스트 (없을 때만 생성)."""
+    parts = partition_store(get_he_db_path(size), get_partition_dir(size), n_parts)
+    if not os.path.exists(CONTEXT_PUBLIC):
+        write_public_context(CONTEXT_SECRET, CONTEXT_PUBLIC)
+    print(f"📦 {len(parts)} partitions → {get_partition_dir(size)}")
+    return parts
+
+
+def run_queries(coord: QueryCoordinator, size: int, fernet: Fernet, mode: str):
+    queries = open_embeddings(get_query_embeddings_path(size))
+    stop = len(queries) if QUERY_NUM is None else min(QUERY_NUM, len(queries))
+
+    for h in coord.health():
+        status = "✅" if h["ok"] else "❌"
+        print(f"  {status} {h['worker']} " + (f"docs={h['docs']} latency={h['latency'] * 1000:.1f}ms"
+                                             if h["ok"] else h["error"]))
+
+    t0 = time.perf_counter()
+    all_hits = coord.query(queries.matrix[:stop], n_results=N_RESULTS, mode=mode)
+    wall_time = time.perf_counter() - t0
+    print(f"Distributed search for {stop} queries took {wall_time:.2f}s")
+    for t in coord.last_timings:
+        print(f"  {t['worker']}: docs={t['docs']} worker={t['total']:.2f}s "
+              f"(dot {t['dot']:.2f}s, pack {t['pack']:.2f}s) rtt={t['rtt']:.2f}s "
+              f"recv={t['bytes_received'] / 1e6:.1f}MB")
+
+    results = []
+    for qid, hits in zip(queries.ids[:stop], all_hits):
+        results.append({
+            "query_id": qid,
+            "results": [{"rank": r, "doc_id": fernet.decrypt(enc_id).decode(), "score": score}
+                        for r, (enc_id, _, score) in enumerate(hits, start=1)],
+        })
+    return results, wall_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coordinator/worker encrypted search")
+    parser.add_argument("--workers", nargs="*", default=DIST_WORKERS, help="host:port of running workers")
+    parser.add_argument("--local-workers", type=int, default=DIST_LOCAL_WORKERS)
+    parser.add_argument("--mode", choices=["scores", "topk"], default=DIST_MODE)
+    parser.add_argument("--partition-only", action="store_true")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SAMPLE_SIZES)
+    args = parser.parse_args()
+
+    with open(FERNET_KEY_PATH, "rb") as f:
+        fernet = Fernet(f.read())
+
+    for size in args.sizes:
+        print(f"\n=== Distributed eval sample_size={size} ===")
+        profiler = StoreProfiler()
+        cluster = None
+        if args.partition_only or not args.workers:
+            parts = prepare_partitions(size, args.local_workers)
+            if args.partition_only:
+                continue
+            # topk 모드 워커는 복호화가 필요 → 비밀 컨텍스트
+            cluster = LocalCluster(parts, CONTEXT_SECRET if args.mode == "topk" else CONTEXT_PUBLIC).start()
+            workers = cluster.addresses
+        else:
+            workers = args.workers
+
+        try:
+            with QueryCoordinator(workers, CONTEXT_SECRET, timeout=DIST_TIMEOUT, profiler=profiler) as coord:
+                results, wall_time = run_queries(coord, size, fernet, args.mode)
+                timings = coord.last_timings
+        finally:
+            if cluster is not None:
+                cluster.stop()
+
+        out = get_distributed_eval_path(size)
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Results saved to {out}")
+
+        profiler.set_gauge("wall_time", wall_time)
+        profiler.merge_into(
+            get_metrics_path(size),
+            section="distributed",
+            extra={
+                "last_run_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime()),
+                "mode": args.mode,
+                "workers": timings,
+            }
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,21 @@
 #!/usr/bin/env python3
 import os
 import json
+import argparse
 import time
 import sqlite3
 from tqdm import tqdm
 from cryptography.fernet import Fernet
 from he_vector_db.store import HEVectorStore
+from he_vector_db.metrics import StoreProfiler
+from he_vector_db.cache import QueryResultCache, EncryptedQueryCache
+from he_vector_db.scheduler import QueryAutotuner
+from he_vector_db.embeddings import open_embeddings
 from typing import List
 from settings import (
     SAMPLE_SIZES,
     get_query_embeddings_path,
-    get_he_db_path,
+    get_he_store,
     get_eval_path,
     get_docid_list_path,
     get_metrics_path,
@@ -18,30 +23,38 @@ from settings import (
     CONTEXT_SECRET,
     MAX_WORKERS,
     N_RESULTS,
-    QUERY_NUM
+    QUERY_NUM,
+    RESULT_CACHE_ENTRIES,
+    RESULT_CACHE_BYTES,
+    QUERY_CT_CACHE_BYTES,
+    CHUNK_SIZE,
+    AUTOTUNE,
+    MEMORY_BUDGET,
+    DAEMON_SOCKET,
+    DAEMON_TIMEOUT
 )
 
 
 def evaluate_queries(
     embeddings_file: str,
-    store: HEVectorStore,
+    store,
     fernet: Fernet,
     n_results: int,
     max_workers: int,
-    limit: int = None
+    limit: int = None,
+    subset: str = None
 ):
     """
     Load query embeddings, perform parallel encrypted vector queries,
-    and return formatted results.
+    and return formatted results. `store` is an HEVectorStore or a
+    daemon RemoteStore (search_daemon.py).
     """
-    with open(embeddings_file, "r", encoding="utf-8") as f:
-        queries = json.load(f)
-    if limit is not None:
-        queries = queries[:limit]
-
-    embeddings = [q["embedding"] for q in queries]
-    query_ids = [q["query_id"] for q in queries]
-    if not embeddings:
+    queries = open_embeddings(embeddings_file)
+    stop = len(queries) if limit is None else min(limit, len(queries))
+
+    embeddings = queries.matrix[:stop]
+    query_ids = queries.ids[:stop]
+    if len(embeddings) == 0:
         print("No embeddings found in the file.")
         return []
     if len(embeddings) != len(query_ids):
@@ -50,13 +63,36 @@ def evaluate_queries(
     print(f"Loaded {len(embeddings)} query embeddings from {embeddings_file}")
 
     start = time.perf_counter()
-    all_hits = store.query(
-        embeddings=embeddings,
-        n_results=n_results,
-        max_workers=max_workers
-    )
-    wall_time = time.perf_counter() - start
-    print(f"Parallel search for {len(embeddings)} queries took {wall_time:.2f}s")
+    if not isinstance(store, HEVectorStore):
+        # 데몬이 암호화 + 스캔 (암호화된 쿼리는 데몬의 query_cache 에 남는다)
+        all_hits = store.query(embeddings=embeddings, n_results=n_results,
+                               max_workers=None if AUTOTUNE else max_workers, subset=subset)
+        return format_results(store, fernet, query_ids, all_hits, time.perf_counter() - start)
+
+    # 쿼리 배치를 한 번만 암호화 (query_cache 에 있는 벡터는 이전 크기에서 만든 암호문 재사용)
+    batch = store.encrypt_queries(embeddings, max_workers=max_workers)
+    print(f"Encrypted {len(batch)} queries in {time.perf_counter() - start:.2f}s")
+    all_hits = []
+    done = 0
+    tuner = store.autotuner
+    # autotune: 설정이 정해질 때까지 쿼리를 하나씩 보내 후보 (workers, chunk_size) 를 측정
+    while tuner is not None and not tuner.settled and done < len(embeddings):
+        all_hits += store.query(embeddings=batch.select([done]), n_results=n_results, subset=subset)
+        done += 1
+    if done < len(embeddings):
+        all_hits += store.query(
+            embeddings=batch.select(range(done, len(batch))),
+            n_results=n_results,
+            max_workers=None if tuner is not None else max_workers,
+            subset=subset
+        )
+    return format_results(store, fernet, query_ids, all_hits, time.perf_counter() - start)
+
+
+def format_results(store, fernet: Fernet, query_ids, all_hits, wall_time: float):
+    print(f"Parallel search for {len(all_hits)} queries took {wall_time:.2f}s")
+    store.profiler.set_gauge("wall_time", wall_time)
+    store.profiler.set_gauge("query_count", len(all_hits))
 
     results = []
     for qid, hits in zip(query_ids, all_hits):
@@ -73,21 +109,23 @@ def evaluate_queries(
 
 
 def dump_all_docids(
-    store: HEVectorStore,
-    out_path: str
+    store,
+    out_path: str,
+    fernet: Fernet,
+    subset: str = None
 ) -> None:
     """
     HEVectorStore에서 모든 암호화된 문서 ID를 가져와 복호화한 뒤 JSON으로 덤프합니다.
     """
     # 1) HEVectorStore에 저장된 암호화된 ID 조회
-    enc_ids: List[bytes] = store.get_all_ids()
+    enc_ids: List[bytes] = store.get_all_ids(subset=subset)
 
     # 2) Fernet 키를 이용해 복호화
     doc_ids: List[str] = []
     for enc_id in enc_ids:
         try:
             # bytes → 복호화 → str
-            doc_id = store.fernet.decrypt(enc_id).decode()
+            doc_id = fernet.decrypt(enc_id).decode()
         except Exception:
             # 복호화에 실패하면 가능한 방식으로 디코딩
             doc_id = enc_id.decode() if isinstance(enc_id, (bytes, bytearray)) else str(enc_id)
@@ -100,23 +138,51 @@ def dump_all_docids(
 
     print(f"[DUMP] Saved {len(doc_ids)} doc ids to {out_path}")
 
+def open_store(db_path: str, query_cache) -> HEVectorStore:
+    return HEVectorStore(
+        context_path=CONTEXT_SECRET,
+        db_path=db_path,
+        id_key_path=FERNET_KEY_PATH,
+        profiler=StoreProfiler(),
+        result_cache=QueryResultCache(RESULT_CACHE_ENTRIES, RESULT_CACHE_BYTES) if RESULT_CACHE_ENTRIES else None,
+        chunk_size=CHUNK_SIZE,
+        autotuner=QueryAutotuner() if AUTOTUNE else None,
+        memory_budget=MEMORY_BUDGET,
+        query_cache=query_cache
+    )
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Evaluate encrypted HE DBs")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SAMPLE_SIZES, help="sample sizes (default: config)")
+    parser.add_argument("--daemon", action="store_true",
+                        help="query a running search_daemon.py instead of opening the DBs in this process")
+    args = parser.parse_args()
+
     # Load Fernet key and initialize decryptor
     with open(FERNET_KEY_PATH, "rb") as f:
         key_bytes = f.read()
     fernet = Fernet(key_bytes)
+    # 같은 컨텍스트로 여는 모든 크기의 store 가 공유 → 같은 쿼리 셋은 한 번만 암호화
+    query_cache = EncryptedQueryCache(max_entries=1 << 20, max_bytes=QUERY_CT_CACHE_BYTES) \
+        if QUERY_CT_CACHE_BYTES else None
+    client = None
+    if args.daemon:
+        from he_vector_db.daemon import DaemonClient  # Unix 소켓 → POSIX 전용
+        client = DaemonClient(DAEMON_SOCKET, timeout=DAEMON_TIMEOUT)
+        print(f"🔌 Using search daemon on {DAEMON_SOCKET}")
 
     # Loop over each sample size
-    for size in SAMPLE_SIZES:
+    for size in args.sizes:
         print(f"\n=== Evaluating sample_size={size} ===")
 
         # HE DB 경로 가져오기
-        db_path = get_he_db_path(size)
-        store = HEVectorStore(
-            context_path=CONTEXT_SECRET,
-            db_path=db_path,
-            id_key_path=FERNET_KEY_PATH
-        )
+        db_path, subset = get_he_store(size)
+        if client is not None:
+            store = client.store(str(size))
+            store.stats(reset=True)  # 이전 실행의 데몬 측 프로파일은 버린다
+        else:
+            store = open_store(db_path, query_cache)
 
         # Perform query evaluation
         query_file = get_query_embeddings_path(size)
@@ -126,21 +192,32 @@ def main():
             fernet=fernet,
             n_results=N_RESULTS,
             max_workers=MAX_WORKERS,
-            limit=QUERY_NUM
+            limit=QUERY_NUM,
+            subset=subset
         )
 
-        # Update metrics
-        metrics_file = get_metrics_path(size)
-        os.makedirs(os.path.dirname(metrics_file), exist_ok=True)
-        if os.path.exists(metrics_file):
-            with open(metrics_file, "r", encoding="utf-8") as f:
-                metrics = json.load(f)
+        # Update metrics: per-stage profile → metrics_{size}.json (+ Prometheus text)
+        profiler = store.profiler
+        if client is not None:
+            stats = store.stats(reset=True)
+            profiler.absorb(stats.pop("profile"))
+            extra = dict(stats, daemon=True)
         else:
-            metrics = {}
-        # 여기서는 wall_time이나 별도 측정값을 넣으셔도 좋습니다.
-        metrics["last_run_at"] = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime())
-        with open(metrics_file, "w", encoding="utf-8") as f:
-            json.dump(metrics, f, ensure_ascii=False, indent=2)
+            extra = {
+                "result_cache": store.cache_stats(),
+                "query_cache": store.query_cache_stats(),
+                "autotune": store.autotune_stats(),
+                "memory": store.memory_stats(),
+            }
+        metrics_file = get_metrics_path(size)
+        profiler.merge_into(
+            metrics_file,
+            section="query",
+            extra={"last_run_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime()), **extra}
+        )
+        prom_file = os.path.splitext(metrics_file)[0] + ".prom"
+        with open(prom_file, "w", encoding="utf-8") as f:
+            f.write(profiler.to_prometheus(labels={"sample_size": str(size)}))
 
         # Save evaluation results
         eval_file = get_eval_path(size)
@@ -152,11 +229,16 @@ def main():
         # Dump all doc IDs
         docid_out = get_docid_list_path(size)
         dump_all_docids(
-            store =store,
-            out_path=docid_out
+            store=store,
+            out_path=docid_out,
+            fernet=fernet,
+            subset=subset
         )
 
-        store.close()
+        if client is None:
+            store.close()
+    if client is not None:
+        client.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# load_test.py — open-loop mixed query/add load against an HE DB, latency percentiles over time
+#
+#   python he_db_experiments/load_test.py --sizes 1000 --query-rate 2 --add-rate 0.5 --duration 60
+#   python he_db_experiments/load_test.py --synthetic 500 --dim 1024 --query-rate 5
+#
+# 기본적으로 DB 를 임시 디렉터리에 복사한 뒤 부하를 건다 (add 트래픽이 평가용 DB 를 바꾸지 않도록).
+
+import os
+import json
+import time
+import sqlite3
+import argparse
+import tempfile
+
+import numpy as np
+
+from he_vector_db.store import HEVectorStore
+from he_vector_db.metrics import StoreProfiler
+from he_vector_db.loadgen import LoadGenerator
+from he_vector_db.embeddings import open_embeddings
+from settings import (
+    SAMPLE_SIZES,
+    get_he_store,
+    get_query_embeddings_path,
+    get_doc_embeddings_path,
+    get_load_test_path,
+    FERNET_KEY_PATH,
+    CONTEXT_SECRET,
+    N_RESULTS,
+    RANDOM_SEED,
+    LOAD_QUERY_RATE,
+    LOAD_ADD_RATE,
+    LOAD_DURATION,
+    LOAD_CONCURRENCY,
+    LOAD_ADD_BATCH,
+    LOAD_WINDOW,
+    LOAD_MAX_WORKERS,
+)
+
+
+def copy_db(src_dir: str, workdir: str) -> str:
+    """SQLite online backup of the size's DB into workdir (consistent even while WAL is in use)."""
+    src_file = src_dir if src_dir.endswith(".db") else os.path.join(src_dir, "he_vector_store.db")
+    dst_file = os.path.join(workdir, "he_vector_store.db")
+    src, dst = sqlite3.connect(src_file), sqlite3.connect(dst_file)
+    src.backup(dst)
+    src.close()
+    dst.close()
+    return dst_file
+
+
+def synthetic_pools(n_docs: int, dim: int, seed: int):
+    rng = np.random.default_rng(seed)
+    docs = rng.standard_normal((n_docs, dim))
+    queries = docs[rng.integers(0, n_docs, size=64)] + 0.1 * rng.standard_normal((64, dim))
+    ids = [f"syn-{i}" for i in range(n_docs)]
+    return ids, [""] * n_docs, docs.tolist(), queries.tolist()
+
+
+def print_report(label: str, report: dict):
+    print(f"\n📊 {label}: wall {report['wall_time']:.1f}s")
+    for op, s in report["ops"].items():
+        if not s["requests"]:
+            continue
+        fmt = lambda v: f"{v * 1000:8.1f}ms" if v is not None else "       -"
+        print(f"  {op:<5} n={s['requests']:<5} err={s['error_rate']:.1%} thr={s['throughput']:.2f}/s "
+              f"p50={fmt(s['latency_p50'])} p95={fmt(s['latency_p95'])} p99={fmt(s['latency_p99'])} "
+              f"queue_p95={fmt(s['queue_p95'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop load test (queries + adds) for HEVectorStore")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SAMPLE_SIZES)
+    parser.add_argument("--query-rate", type=float, default=LOAD_QUERY_RATE, help="query arrivals per second")
+    parser.add_argument("--add-rate", type=float, default=LOAD_ADD_RATE, help="add() arrivals per second")
+    parser.add_argument("--duration", type=float, default=LOAD_DURATION, help="seconds of arrivals")
+    parser.add_argument("--concurrency", type=int, default=LOAD_CONCURRENCY, help="client threads")
+    parser.add_argument("--add-batch", type=int, default=LOAD_ADD_BATCH, help="documents per add() call")
+    parser.add_argument("--synthetic", type=int, metavar="N_DOCS", help="use a fresh store of N synthetic docs")
+    parser.add_argument("--dim", type=int, default=1024, help="embedding dim for --synthetic")
+    parser.add_argument("--in-place", action="store_true", help="load the real DB instead of a copy (adds persist)")
+    args = parser.parse_args()
+
+    runs = [("synthetic", None)] if args.synthetic else [(f"size={s}", s) for s in args.sizes]
+    for label, size in runs:
+        print(f"\n=== Load test {label} ===")
+        with tempfile.TemporaryDirectory(prefix="he_load_") as workdir:
+            if size is None:
+                db_file = os.path.join(workdir, "he_vector_store.db")
+                ids, texts, embs, queries = synthetic_pools(args.synthetic, args.dim, RANDOM_SEED or 0)
+            else:
+                src_db, _ = get_he_store(size)
+                db_file = src_db if args.in_place else copy_db(src_db, workdir)
+                q = open_embeddings(get_query_embeddings_path(size))
+                d = open_embeddings(get_doc_embeddings_path(size))
+                queries = q.matrix
+                ids, texts, embs = d.ids, d.contents, d.matrix
+
+            profiler = StoreProfiler()
+            store = HEVectorStore(context_path=CONTEXT_SECRET, db_path=db_file,
+                                  id_key_path=FERNET_KEY_PATH, profiler=profiler)
+            if size is None:
+                t0 = time.perf_counter()
+                store.add(ids=ids, documents=texts, embeddings=embs)
+                print(f"📦 {len(ids)} synthetic docs encrypted in {time.perf_counter() - t0:.1f}s")
+
+            gen = LoadGenerator(
+                store, queries=queries, docs=(ids, texts, embs),
+                query_rate=args.query_rate, add_rate=args.add_rate, duration=args.duration,
+                concurrency=args.concurrency, n_results=N_RESULTS, add_batch=args.add_batch,
+                max_workers=LOAD_MAX_WORKERS, window=LOAD_WINDOW, seed=RANDOM_SEED or 0,
+            )
+            report = gen.run(progress=True)
+            report["corpus_docs_at_end"] = store.count()
+            report["profile"] = profiler.snapshot()
+            store.close()
+
+        print_report(label, report)
+        out = get_load_test_path(size if size is not None else f"synthetic{args.synthetic}")
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+        report["finished_at"] = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime())
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Load test report saved to {out}")
+
+
+if __name__ == "__main__":
+    main()
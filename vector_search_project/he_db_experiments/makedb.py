@@ -2,19 +2,26 @@
 import os
 import json
 import time
+import argparse
 from typing import List
 import tenseal as ts
+from cryptography.fernet import Fernet
 from he_vector_db.store import HEVectorStore
+from he_vector_db.metrics import StoreProfiler
+from he_vector_db.embeddings import open_embeddings
 from settings import (
     SAMPLE_SIZES,
     get_doc_embeddings_path,
-    get_he_db_path,
+    get_he_store,
+    get_subset_marker_path,
     get_metrics_path,
     FERNET_KEY_PATH,
     CONTEXT_SECRET,
     POLY_MOD_DEGREE,
     COEFF_MOD_BIT_SIZES,
     GLOBAL_SCALE,
+    BATCH_SIZE,
+    MEMORY_BUDGET,
 )
 
 
@@ -38,62 +45,108 @@ def build_and_serialize_context(secret_path: str):
     print(f"Context saved to {secret_path}")
 
 
+def ensure_fernet_key(key_path: str):
+    """Create the Fernet key once, so parallel per-size builds all share the same key."""
+    if os.path.exists(key_path):
+        return
+    os.makedirs(os.path.dirname(key_path), exist_ok=True)
+    with open(key_path, "wb") as f:
+        f.write(Fernet.generate_key())
+    print(f"Fernet key saved to {key_path}")
+
+
+def progress_callback(total: int, every: int = 1000):
+    """Profiler callback that prints ingest progress every `every` encrypted vectors."""
+    state = {"done": 0}
+
+    def _cb(stage: str, seconds: float, items: int):
+        if stage != "encrypt_vector":
+            return
+        before = state["done"]
+        state["done"] += items
+        if state["done"] // every > before // every or state["done"] == total:
+            print(f"  ▶ {state['done']}/{total} encrypted")
+
+    return _cb
+
+
 def ingest_documents(
     db_path: str,
     context_path: str,
     fernet_key_path: str,
     doc_embeddings_file: str,
     sample_size: int,
-    metrics_file: str
+    metrics_file: str,
+    subset: str = None
 ):
     print(f"🔐 Initializing HEVectorStore @ {db_path}")
-    store = HEVectorStore(db_path=db_path, context_path=context_path, id_key_path=fernet_key_path)
-
+    profiler = StoreProfiler()
+    profiler.add_callback(progress_callback(sample_size))
+    store = HEVectorStore(
+        db_path=db_path,
+        context_path=context_path,
+        id_key_path=fernet_key_path,
+        profiler=profiler,
+        memory_budget=MEMORY_BUDGET
+    )
 
+    # Memory-mapped embedding store; only the first sample_size rows are streamed
+    emb_store = open_embeddings(doc_embeddings_file)
+    total = min(sample_size, len(emb_store))
 
-    if store.count() > 0:
+    done = store.count(subset=subset)
+    if done >= total:
         print("📦 Existing embeddings found. Skipping ingestion.")
         store.close()
         return
-
-    # Load embeddings and take only the first sample_size items
-    with open(doc_embeddings_file, "r", encoding="utf-8") as f:
-        all_docs = json.load(f)
-
-    docs = all_docs[:sample_size]
+    if done > 0:
+        # 중단된 빌드: 이미 저장된 문서는 id_tag 로 재사용되므로 처음부터 다시 add 해도 나머지만 암호화된다
+        print(f"⏯️ {done}/{total} documents already stored; completing the rest.")
 
     metrics = {"total_time": 0.0}
     start_all = time.perf_counter()
 
-    print(f"🚀 Ingesting {len(docs)} documents...")
-    for rec in docs:
+    print(f"🚀 Ingesting {total} documents...")
+    for ids, contents, matrix in emb_store.iter_batches(BATCH_SIZE, stop=sample_size):
         t0 = time.perf_counter()
-        store.add(
-            ids=[rec["doc_id"]],
-            embeddings=[rec["embedding"]],
-            documents=[rec.get("content", "")]  # content 키가 없으면 빈 문자열
-        )
-        elapsed = time.perf_counter() - t0
-        metrics["total_time"] += elapsed
-        print(f"  + {rec['doc_id']} ({elapsed:.3f}s)")
+        store.add(ids=ids, embeddings=matrix, documents=contents, subset=subset)
+        metrics["total_time"] += time.perf_counter() - t0
 
     metrics["wall_clock_time"] = time.perf_counter() - start_all
-
-    os.makedirs(os.path.dirname(metrics_file), exist_ok=True)
-    with open(metrics_file, "w", encoding="utf-8") as mf:
-        json.dump(metrics, mf, indent=2)
+    metrics["memory"] = store.memory_stats()
+    counters = profiler.snapshot()["counters"]
+    metrics["docs_encrypted"] = counters.get("docs_added", 0)
+    metrics["docs_reused"] = counters.get("docs_reused", 0)
+    if subset is not None:
+        print(f"♻️ {metrics['docs_reused']} documents reused from the shared store, {metrics['docs_encrypted']} encrypted")
+        marker = {"subset": subset, "docs": store.count(subset=subset), "store_docs": store.count(),
+                  "store_version": store.version()}
+        with open(get_subset_marker_path(sample_size), "w", encoding="utf-8") as f:
+            json.dump(marker, f, indent=2)
+
+    # 기존 metrics 파일에 병합 (eval.py 결과를 덮어쓰지 않음)
+    profiler.merge_into(metrics_file, section="ingest", extra=metrics)
     print(f"✅ Metrics saved to {metrics_file}")
 
     store.close()
 
 
 if __name__ == "__main__":
-    # 1. Context 생성
+    parser = argparse.ArgumentParser(description="Build encrypted HE DBs")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SAMPLE_SIZES, help="sample sizes (default: config)")
+    parser.add_argument("--keys-only", action="store_true",
+                        help="only create the CKKS context and Fernet key (run once before parallel per-size builds)")
+    args = parser.parse_args()
+
+    # 1. Context / Fernet 키 생성
     build_and_serialize_context(CONTEXT_SECRET)
+    if args.keys_only:
+        ensure_fernet_key(FERNET_KEY_PATH)
+        raise SystemExit(0)
 
-    # 2. 각 크기별 DB 생성
-    for size in SAMPLE_SIZES:
-        db_path      = get_he_db_path(size)
+    # 2. 각 크기별 DB 생성 (공유 store 모드: 작은 크기부터 → 큰 샘플은 새 문서만 암호화)
+    for size in sorted(args.sizes):
+        db_path, subset = get_he_store(size)
         emb_path     = get_doc_embeddings_path(size)
         metrics_path = get_metrics_path(size)
 
@@ -110,5 +163,6 @@ if __name__ == "__main__":
             fernet_key_path=FERNET_KEY_PATH,
             doc_embeddings_file=emb_path,
             sample_size=size,
-            metrics_file=metrics_path
+            metrics_file=metrics_path,
+            subset=subset
         )
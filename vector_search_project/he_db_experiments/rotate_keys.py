@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# rotate_keys.py — CKKS context + Fernet key rotation for every HE DB (raw embeddings not needed)
+#
+# 1) 새 컨텍스트/키를 <key>.new 로 생성 (이미 있으면 재사용 → 중단 후 재실행 시 이어서)
+# 2) 크기별 DB 를 새 키로 재암호화 → he_vector_store.rotated.db (배치마다 checkpoint)
+# 3) 모든 DB 가 끝나면 DB 와 키 파일을 교체, 이전 키는 <key>.old-<timestamp> 로 보관
+
+import os
+import json
+import time
+import argparse
+
+from he_vector_db.rotation import rotate_store
+from he_vector_db.distributed import write_public_context
+from makedb import build_and_serialize_context, ensure_fernet_key
+from settings import (
+    SAMPLE_SIZES,
+    get_he_store,
+    get_metrics_path,
+    FERNET_KEY_PATH,
+    CONTEXT_SECRET,
+    CONTEXT_PUBLIC,
+    MAX_WORKERS,
+)
+
+ROTATED_NAME = "he_vector_store.rotated.db"
+
+
+def progress_printer(size: int, every: int = 1000):
+    state = {"t0": time.perf_counter(), "last": 0}
+
+    def _cb(done: int, total: int):
+        if done - state["last"] >= every or done == total:
+            state["last"] = done
+            rate = done / max(time.perf_counter() - state["t0"], 1e-9)
+            print(f"  ▶ [{size}] {done}/{total} rows ({rate:.1f} rows/s)")
+
+    return _cb
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-encrypt HE DBs under a new CKKS context and Fernet key")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SAMPLE_SIZES)
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="re-encryption processes (default: all cores)")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--no-swap", action="store_true", help="stop after writing the rotated DBs")
+    args = parser.parse_args()
+
+    new_ctx, new_key = CONTEXT_SECRET + ".new", FERNET_KEY_PATH + ".new"
+    build_and_serialize_context(new_ctx)
+    ensure_fernet_key(new_key)
+
+    # Phase 1: 크기별 재암호화 (원본은 그대로)
+    pending = []
+    seen = set()
+    for size in args.sizes:
+        db_dir, _ = get_he_store(size)
+        if db_dir in seen:  # shared_store: 모든 크기가 같은 DB
+            continue
+        seen.add(db_dir)
+        src = os.path.join(db_dir, "he_vector_store.db")
+        rotated = os.path.join(db_dir, ROTATED_NAME)
+        if os.path.exists(rotated):
+            print(f"✅ [{size}] already rotated → {rotated}")
+            pending.append((size, src, rotated))
+            continue
+        if not os.path.exists(src):
+            print(f"⚠️ [{size}] no DB at {src}, skipping")
+            continue
+        print(f"\n=== Rotating sample_size={size} ===")
+        stats = rotate_store(src, CONTEXT_SECRET, FERNET_KEY_PATH, new_ctx, new_key,
+                             dst_db_path=rotated, workers=args.workers, batch_size=args.batch_size,
+                             progress=progress_printer(size))
+        print(f"🔁 [{size}] {stats['rows']} rows in {stats['seconds']:.1f}s — "
+              f"{stats['rows_per_sec']:.1f} rows/s, {stats['mb_per_sec']:.1f} MB/s, "
+              f"{stats['workers']} workers (resumed from {stats['resumed_from']})")
+        metrics_file = get_metrics_path(size)
+        metrics = {}
+        if os.path.exists(metrics_file):
+            with open(metrics_file, "r", encoding="utf-8") as f:
+                metrics = json.load(f)
+        metrics["rotation"] = dict(stats, finished_at=time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime()))
+        os.makedirs(os.path.dirname(metrics_file), exist_ok=True)
+        with open(metrics_file, "w", encoding="utf-8") as f:
+            json.dump(metrics, f, indent=2)
+        pending.append((size, src, rotated))
+
+    if args.no_swap:
+        print("⏸ --no-swap: rotated DBs and *.new keys left in place")
+        return
+
+    # Phase 2: DB → 키 순서로 교체 (각 교체는 os.replace 한 번)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    for size, src, rotated in pending:
+        for ext in ("-wal", "-shm"):
+            if os.path.exists(src + ext):
+                os.remove(src + ext)
+        os.replace(rotated, src)
+        print(f"📦 [{size}] {src} now under the new keys")
+    for path, new in ((CONTEXT_SECRET, new_ctx), (FERNET_KEY_PATH, new_key)):
+        os.replace(path, f"{path}.old-{stamp}")
+        os.replace(new, path)
+    if os.path.exists(CONTEXT_PUBLIC):
+        # 분산 워커용 공개 컨텍스트도 새 키로
+        write_public_context(CONTEXT_SECRET, CONTEXT_PUBLIC)
+    print(f"🔑 Keys rotated; previous keys kept as *.old-{stamp}")
+
+
+if __name__ == "__main__":
+    main()
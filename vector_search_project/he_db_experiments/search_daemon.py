@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# search_daemon.py — 설정된 크기의 HE DB 를 한 번 열어 두고 Unix 소켓으로 쿼리 배치를 처리하는 상주 데몬
+#
+#   python he_db_experiments/search_daemon.py                 # 서빙 시작 (Ctrl-C 로 종료)
+#   python he_db_experiments/search_daemon.py --sizes 1000    # 일부 크기만
+#   python he_db_experiments/search_daemon.py --status | --reload | --stop
+#
+# 클라이언트: python he_db_experiments/eval.py --daemon  (컨텍스트 파싱 / 암호문 역직렬화 없이 warm 쿼리)
+
+import time
+import logging
+import argparse
+
+from he_vector_db.store import HEVectorStore
+from he_vector_db.metrics import StoreProfiler
+from he_vector_db.cache import QueryResultCache, EncryptedQueryCache
+from he_vector_db.memory import MemoryAccountant
+from he_vector_db.scheduler import QueryAutotuner
+from he_vector_db.daemon import DaemonClient, serve_daemon
+from settings import (
+    SAMPLE_SIZES,
+    get_he_store,
+    FERNET_KEY_PATH,
+    CONTEXT_SECRET,
+    RESULT_CACHE_ENTRIES,
+    RESULT_CACHE_BYTES,
+    QUERY_CT_CACHE_BYTES,
+    CHUNK_SIZE,
+    AUTOTUNE,
+    MEMORY_BUDGET,
+    DAEMON_SOCKET,
+    DAEMON_RESIDENT,
+    DAEMON_TIMEOUT,
+)
+
+
+def open_stores(sizes):
+    """(size 이름 → store, size 이름 → subset). shared_store 모드에서는 모든 크기가 같은 store 의 서로 다른 subset 을 가리킨다."""
+    memory = MemoryAccountant(MEMORY_BUDGET)  # 모든 store 가 하나의 예산을 공유
+    query_cache = EncryptedQueryCache(max_entries=1 << 20, max_bytes=QUERY_CT_CACHE_BYTES) \
+        if QUERY_CT_CACHE_BYTES else None
+    by_path, stores, subsets = {}, {}, {}
+    for size in sizes:
+        db_path, subset = get_he_store(size)
+        if db_path not in by_path:
+            by_path[db_path] = HEVectorStore(
+                context_path=CONTEXT_SECRET,
+                db_path=db_path,
+                id_key_path=FERNET_KEY_PATH,
+                profiler=StoreProfiler(),
+                result_cache=QueryResultCache(RESULT_CACHE_ENTRIES, RESULT_CACHE_BYTES) if RESULT_CACHE_ENTRIES else None,
+                chunk_size=CHUNK_SIZE,
+                autotuner=QueryAutotuner() if AUTOTUNE else None,
+                memory_budget=memory,
+                query_cache=query_cache,
+                resident=DAEMON_RESIDENT,
+            )
+        stores[str(size)] = by_path[db_path]
+        subsets[str(size)] = subset
+    return stores, subsets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident HE search daemon (Unix socket)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SAMPLE_SIZES, help="sample sizes to serve")
+    parser.add_argument("--socket", default=DAEMON_SOCKET, help="Unix socket path (default: config daemon.socket)")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--status", action="store_true", help="print the running daemon's health")
+    group.add_argument("--reload", action="store_true", help="load rows added since the last query now")
+    group.add_argument("--stop", action="store_true", help="shut the running daemon down")
+    args = parser.parse_args()
+
+    if args.status or args.reload or args.stop:
+        with DaemonClient(args.socket, timeout=DAEMON_TIMEOUT) as client:
+            if args.reload:
+                client.reload()
+            if args.stop:
+                client.shutdown()
+                print(f"🛑 Daemon on {args.socket} stopped")
+                return
+            health = client.health()
+        print(f"✅ Daemon pid {health['pid']} up {health['uptime']:.0f}s, {health['queries']} queries served")
+        for name, info in health["stores"].items():
+            print(f"  size={name:<8} docs={info['docs']:<8} resident={info['resident']}")
+        return
+
+    logging.basicConfig(level=logging.INFO)
+    t0 = time.perf_counter()
+    stores, subsets = open_stores(args.sizes)
+    try:
+        print(f"🚀 Stores for sizes {', '.join(stores)} opened in {time.perf_counter() - t0:.1f}s; "
+              f"loading resident ciphertexts, then serving on {args.socket}")
+        serve_daemon(stores, args.socket, subsets=subsets)
+    except KeyboardInterrupt:
+        print("\n🛑 Interrupted")
+    finally:
+        for store in {id(s): s for s in stores.values()}.values():
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
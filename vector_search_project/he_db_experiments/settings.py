@@ -28,19 +28,59 @@ MODEL = exp_cfg.get("model")
 MAX_WORKERS = exp_cfg.get("max_workers")
 N_RESULTS = exp_cfg.get("n_results")
 QUERY_NUM = exp_cfg.get("query_num")
+CHUNK_SIZE = exp_cfg.get("chunk_size", 64)
+AUTOTUNE = exp_cfg.get("autotune", False)
 
 input_cfg = cfg.get("input", {})
 SAMPLE_SIZES = input_cfg.get("sample_sizes", [])
 
 # 4) Input embedding file paths
 BASE_EMB_DIR = PROJECT_ROOT / input_cfg.get("base_dir", "data")  / input_cfg.get("dataset_name", "") / input_cfg.get("embedding_dir", "embeddings")
-EMB_FILE_PATTERN = input_cfg.get("embedding_file_pattern", "doc_embeddings_{size}.json")
+EMB_FILE_PATTERN = input_cfg.get("embedding_file_pattern", "doc_embeddings_{size}")
 DOCID_PATTERN = input_cfg.get("docid_pattern", "docid_list_{size}.json")
 
 # 5) HE Vector DB settings
 he_cfg = cfg.get("vector_db", {}).get("encrypted", {})
 HE_DB_BASE = PROJECT_ROOT / input_cfg.get("dataset_name", "") /  he_cfg.get("base_dir", "data/he_dbs")
 HE_DB_PATTERN = he_cfg.get("db_dir_pattern", "regulation_vectors_{size}.db")
+BATCH_SIZE = cfg.get("vector_db", {}).get("batch_size", 1000)
+# 공유 store 모드: 크기별 DB 대신 하나의 DB + subset (makedb / eval / accuracy_report)
+SHARED_STORE = he_cfg.get("shared_store", False)
+SHARED_DB_DIR = he_cfg.get("shared_db_dir", "he_db_shared")
+# 쿼리 결과 캐시 (0 → 사용 안 함)
+RESULT_CACHE_ENTRIES = he_cfg.get("result_cache_entries", 0)
+RESULT_CACHE_BYTES = he_cfg.get("result_cache_bytes")
+# 암호화된 쿼리 캐시 (eval.py 가 모든 크기에 하나를 공유, 0/None → 사용 안 함)
+QUERY_CT_CACHE_BYTES = int(he_cfg["query_ct_cache_mb"] * 2**20) if he_cfg.get("query_ct_cache_mb") else None
+# store 메모리 예산 (스캔 in-flight chunk / 캐시 상한)
+MEMORY_BUDGET = int(he_cfg["memory_budget_mb"] * 2**20) if he_cfg.get("memory_budget_mb") else None
+# 스냅샷 번들 (snapshot_store.py)
+SNAPSHOT_PATTERN = he_cfg.get("snapshot_dir_pattern", "snapshots/he_db_{size}")
+SNAPSHOT_CHUNK_MB = he_cfg.get("snapshot_chunk_mb", 32)
+
+# 분산 모드 (distributed_eval.py): workers 가 비어 있으면 localhost 에 local_workers 개 워커를 띄운다
+dist_cfg = cfg.get("distributed", {})
+DIST_WORKERS = dist_cfg.get("workers") or []
+DIST_LOCAL_WORKERS = dist_cfg.get("local_workers", 2)
+DIST_MODE = dist_cfg.get("mode", "scores")
+DIST_TIMEOUT = dist_cfg.get("timeout", 600)
+DIST_PARTITION_PATTERN = dist_cfg.get("partition_dir_pattern", "he_db_{size}_parts")
+
+# 상주 검색 데몬 (search_daemon.py / eval.py --daemon)
+daemon_cfg = cfg.get("daemon", {})
+DAEMON_SOCKET = daemon_cfg.get("socket", "/tmp/he_vector_db.sock")
+DAEMON_RESIDENT = daemon_cfg.get("resident", True)
+DAEMON_TIMEOUT = daemon_cfg.get("timeout", 600)
+
+# 부하 테스트 (load_test.py)
+load_cfg = cfg.get("load_test", {})
+LOAD_QUERY_RATE = load_cfg.get("query_rate", 1.0)
+LOAD_ADD_RATE = load_cfg.get("add_rate", 0.0)
+LOAD_DURATION = load_cfg.get("duration", 60)
+LOAD_CONCURRENCY = load_cfg.get("concurrency", 4)
+LOAD_ADD_BATCH = load_cfg.get("add_batch", 1)
+LOAD_WINDOW = load_cfg.get("window", 5)
+LOAD_MAX_WORKERS = load_cfg.get("max_workers", 1)
 
 # 6) CKKS context & key paths
 key_cfg = cfg.get("keys", {})
@@ -62,6 +102,10 @@ out_cfg = cfg.get("output", {})
 RESULTS_DIR = PROJECT_ROOT / out_cfg.get("results_dir", "results")
 EVAL_FILE_PATTERN = out_cfg.get("eval_results_pattern", "eval_results_{size}.json")
 METRICS_FILE_PATTERN = out_cfg.get("metrics_pattern", "metrics_{size}.json")
+DIST_EVAL_PATTERN = out_cfg.get("distributed_eval_pattern", "distributed_eval_results_{size}.json")
+EXACT_RESULTS_PATTERN = out_cfg.get("exact_results_pattern", "exact_results_{size}.json")
+ACCURACY_PATTERN = out_cfg.get("accuracy_report_pattern", "accuracy_{size}.json")
+LOAD_TEST_PATTERN = out_cfg.get("load_test_pattern", "load_test_{size}.json")
 
 # 9) Random seed
 RANDOM_SEED = cfg.get("random_seed")
@@ -86,3 +130,31 @@ def get_eval_path(size: int) -> str:
 
 def get_metrics_path(size: int) -> str:
     return str(RESULTS_DIR / METRICS_FILE_PATTERN.format(size=size))
+
+def get_exact_results_path(size: int) -> str:
+    return str(RESULTS_DIR / EXACT_RESULTS_PATTERN.format(size=size))
+
+def get_accuracy_path(size: int) -> str:
+    return str(RESULTS_DIR / ACCURACY_PATTERN.format(size=size))
+
+def get_partition_dir(size: int) -> str:
+    return str(HE_DB_BASE / DIST_PARTITION_PATTERN.format(size=size))
+
+def get_distributed_eval_path(size: int) -> str:
+    return str(RESULTS_DIR / DIST_EVAL_PATTERN.format(size=size))
+
+def get_snapshot_dir(size: int) -> str:
+    return str(HE_DB_BASE / SNAPSHOT_PATTERN.format(size=size))
+
+def get_load_test_path(size) -> str:
+    return str(RESULTS_DIR / LOAD_TEST_PATTERN.format(size=size))
+
+def get_he_store(size: int):
+    """(db_path, subset) to open for a sample size: the shared DB + "sample_{size}", or the per-size DB."""
+    if SHARED_STORE:
+        return str(HE_DB_BASE / SHARED_DB_DIR), f"sample_{size}"
+    return get_he_db_path(size), None
+
+def get_subset_marker_path(size: int) -> str:
+    """Small JSON written by makedb.py once a size's subset is complete (pipeline output)."""
+    return str(HE_DB_BASE / SHARED_DB_DIR / f"subset_{size}.json")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# snapshot_store.py — HE DB 스냅샷 번들 내보내기 / 가져오기 (복제본 준비용)
+#
+#   python he_db_experiments/snapshot_store.py export                 # he_db_{size} → snapshots/he_db_{size}
+#   python he_db_experiments/snapshot_store.py verify --bundle DIR
+#   python he_db_experiments/snapshot_store.py import --bundle DIR --size 10000
+#
+# 번들에는 비밀키가 들어가지 않는다: CKKS 비밀 컨텍스트 / Fernet 키는 따로 안전하게 옮길 것.
+
+import os
+import time
+import argparse
+
+from he_vector_db.store import HEVectorStore
+from he_vector_db.snapshot import verify_snapshot
+from settings import (
+    SAMPLE_SIZES,
+    get_he_db_path,
+    get_snapshot_dir,
+    FERNET_KEY_PATH,
+    CONTEXT_SECRET,
+    SNAPSHOT_CHUNK_MB,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export / import HE DB snapshot bundles")
+    parser.add_argument("action", choices=["export", "import", "verify"])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SAMPLE_SIZES)
+    parser.add_argument("--bundle", help="bundle directory (default: vector_db.encrypted.snapshot_dir_pattern)")
+    parser.add_argument("--workers", type=int, default=None, help="parallel chunk verification threads")
+    parser.add_argument("--level", type=int, default=1, help="zlib level")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        bundle = args.bundle or get_snapshot_dir(size)
+        db_path = get_he_db_path(size)
+        t0 = time.perf_counter()
+        if args.action == "export":
+            store = HEVectorStore(context_path=CONTEXT_SECRET, db_path=db_path, id_key_path=FERNET_KEY_PATH)
+            os.makedirs(os.path.dirname(bundle), exist_ok=True)
+            stats = store.export_snapshot(bundle, chunk_bytes=SNAPSHOT_CHUNK_MB * 1024 * 1024, level=args.level)
+            store.close()
+            print(f"📦 [{size}] {stats['chunks']} chunks, {stats['bytes'] / 1e6:.1f} MB "
+                  f"(raw {stats['raw_bytes'] / 1e6:.1f} MB) in {stats['seconds']:.1f}s → {bundle}")
+        elif args.action == "verify":
+            stats = verify_snapshot(bundle, workers=args.workers)
+            print(f"✅ [{size}] {stats['chunks']} chunks / {stats['rows']} rows OK "
+                  f"({time.perf_counter() - t0:.1f}s)")
+        else:
+            store = HEVectorStore.import_snapshot(bundle, CONTEXT_SECRET, db_path, FERNET_KEY_PATH,
+                                                  workers=args.workers)
+            print(f"📥 [{size}] {store.count()} vectors restored → {store.db_path} "
+                  f"({time.perf_counter() - t0:.1f}s)")
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,42 @@
 
 import os
-import json
-import time
-import random
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import argparse
 from tqdm import tqdm
 
 import ir_datasets
-import ollama
+from he_vector_db.embeddings import EmbeddingStoreWriter
+from he_vector_db.embedding_client import EmbeddingCache, embed_texts, make_client
+from sample_miracl_with_qrels import sample_with_qrels
 
 from settings import (
     SAMPLE_SIZES,
     DATASET_NAME,
+    RANDOM_SEED,
     MODEL,
     MAX_WORKERS,
+    EMBED_BACKEND,
+    EMBED_BATCH_SIZE,
+    EMBED_CACHE_PATH,
     get_embedding_path,
     get_query_path
 )
 
 
+def embed_and_write(writer, ids, texts, client, cache, batch_size, max_workers, stats, pbar=None):
+    """Embed one buffered chunk (cache first, batched concurrent requests for the rest) and append it."""
+    if not ids:
+        return
+    matrix, chunk_stats = embed_texts(
+        texts, client, cache,
+        batch_size=batch_size,
+        max_workers=max_workers,
+        on_batch=pbar.update if pbar is not None else None
+    )
+    writer.append_batch(ids, matrix, texts)
+    for k in ("texts", "cache_hits", "embedded", "requests", "request_time"):
+        stats[k] = stats.get(k, 0) + chunk_stats[k]
+
+
 def run_precompute_all(
     sample_size: int,
     dataset_name: str = DATASET_NAME,
@@ -27,125 +45,97 @@ def run_precompute_all(
     doc_embeddings_file: str = None,
     query_embeddings_file: str = None,
     model: str = None,
-    max_workers: int = None
+    max_workers: int = None,
+    client=None,
+    cache: EmbeddingCache = None,
+    embed_batch_size: int = None
 ):
     """
     주어진 sample_size와 dataset_name에 따라 문서 및 쿼리 임베딩을 수행하고 파일로 저장합니다.
     """
     # 기본 설정
-    random_seed = random_seed or random_seed
+    random_seed = RANDOM_SEED if random_seed is None else random_seed
     model = model or MODEL
     max_workers = max_workers or MAX_WORKERS
+    embed_batch_size = embed_batch_size or EMBED_BATCH_SIZE
+    client = client or make_client(EMBED_BACKEND, model)
 
     # 파일 경로 동적 생성
- 
     doc_embeddings_file = doc_embeddings_file or get_embedding_path(sample_size)
     query_embeddings_file = query_embeddings_file or get_query_path(sample_size)
 
     ds = ir_datasets.load(dataset_name)
 
-    random.seed(random_seed)
-
-
     # ▶️ 빠른 count API 활용
-    DOC_TOTAL   = ds.docs_count()
-    QRELS_TOTAL = ds.qrels_count()
-
+    DOC_TOTAL = ds.docs_count()
     print(f"✅ Total documents: {DOC_TOTAL:,}")
-    print(f"✅ Total qrels: {QRELS_TOTAL:,}")
+    print(f"✅ Total qrels: {ds.qrels_count():,}")
 
-    # 1. qrels 로딩
-    qrels_list = list(ds.qrels_iter())
-    relevant = {q.doc_id for q in tqdm(qrels_list, desc="Loading qrels", total=QRELS_TOTAL)}
+    # 1. qrels 우선 reservoir 샘플링 (코퍼스 1회 스트리밍)
+    doc_ids = sample_with_qrels(ds, sample_size, random_seed=random_seed, total=DOC_TOTAL)
+    print(f"[1] Sampled {len(doc_ids):,} doc IDs")
 
-    # 2. 전체 문서 ID 수집 (조금 느릴 수 있음 → tqdm으로)
-    all_ids = [d.doc_id for d in tqdm(ds.docs_iter(), desc="Collecting all doc IDs", total=DOC_TOTAL)]
-
-    # 3. relevant 필터링
-    relevant &= set(all_ids)
-    if len(relevant) > sample_size:
-        raise ValueError("sample_size smaller than number of relevant docs")
-
-    negatives = random.sample(list(set(all_ids) - relevant), k=sample_size - len(relevant))
-    doc_ids = sorted(relevant) + negatives
-
-    # 4. 바로 문서 임베딩 (메모리에 올리지 않음)
-    needed = set(doc_ids)
-    print(f"[2]📦 Embedding {len(needed)} documents via docs_store().get_many_iter()...")
+    # 2. 샘플 문서만 docs_store() 랜덤 액세스로 읽어 바로 임베딩
+    docs_store = ds.docs_store()
+    print(f"[2]📦 Embedding {len(doc_ids)} documents via docs_store().get_many_iter()...")
 
     workers = max_workers or (os.cpu_count() or 4)
-    doc_records = []
-
-
-    doc_records = []
-    print(f"[2] Embedding {len(needed)} docs sequentially…")
+    # 요청 `workers`개가 동시에 돌 수 있을 만큼 문서를 모아서 한 번에 임베딩
+    chunk_docs = embed_batch_size * workers * 4
 
     found = 0
-    print(f"🔍 임베딩 대상 문서 수: {len(needed):,}")
-
-    for doc in tqdm(ds.docs_iter(), desc="Embedding filtered docs", total=DOC_TOTAL, unit="doc"):
-        if doc.doc_id in needed:
-            # 실제 임베딩 수행
-            text = f"{doc.title or ''}\n{doc.text or ''}"
-            t0 = time.perf_counter()
-            emb = ollama.embeddings(model=model, prompt=text)["embedding"]
-            rec = {
-                "doc_id": doc.doc_id,
-                "content": text,
-                "embedding": emb,
-                "embed_time": time.perf_counter() - t0
-            }
-            doc_records.append(rec)
-            found += 1
-
-            # 필요한 수만큼 다 찾았으면 중단
-            if found == len(needed):
-                break
-
-
+    print(f"🔍 임베딩 대상 문서 수: {len(doc_ids):,} (batch={embed_batch_size}, workers={workers})")
 
-    # 3) Save document embeddings
+    # 3) 캐시에 없는 문서만 배치·동시 요청으로 임베딩 → 바이너리 저장소에 스트리밍
+    doc_stats = {}
     os.makedirs(os.path.dirname(doc_embeddings_file), exist_ok=True)
-    with open(doc_embeddings_file, "w", encoding="utf-8") as f:
-        json.dump(doc_records, f, ensure_ascii=False, indent=2)
-    print(f"[3] Saved {len(doc_records)} doc embeddings → {doc_embeddings_file}")
-
-    # 4) Embed Queries with tqdm
+    with EmbeddingStoreWriter(doc_embeddings_file, model=model,
+                              extra={"sample_size": sample_size}) as writer:
+        buf_ids, buf_texts = [], []
+        for doc in tqdm(docs_store.get_many_iter(doc_ids), desc="Embedding sampled docs",
+                        total=len(doc_ids), unit="doc"):
+            buf_ids.append(doc.doc_id)
+            buf_texts.append(f"{doc.title or ''}\n{doc.text or ''}")
+            found += 1
+            if len(buf_ids) >= chunk_docs:
+                embed_and_write(writer, buf_ids, buf_texts, client, cache,
+                                embed_batch_size, workers, doc_stats)
+                buf_ids, buf_texts = [], []
+        embed_and_write(writer, buf_ids, buf_texts, client, cache, embed_batch_size, workers, doc_stats)
+        writer.extra["embedding"] = doc_stats
+    print(f"[3] Saved {found} doc embeddings → {doc_embeddings_file} "
+          f"(cache hits {doc_stats.get('cache_hits', 0):,}, embedded {doc_stats.get('embedded', 0):,})")
+
+    # 4) Embed queries (same batched path, cached as well)
     queries = list(ds.queries_iter())
-    query_records = []
-
-    def embed_query(q):
-        t0 = time.perf_counter()
-        emb = ollama.embeddings(model=model, prompt=q.text)["embedding"]
-        return {
-            "query_id": q.query_id,
-            "text": q.text,
-            "embedding": emb,
-            "embed_time": time.perf_counter() - t0
-        }
-
     print(f"[4] Embedding {len(queries)} queries…")
-    with ThreadPoolExecutor(max_workers=workers) as ex:
-        futures = {ex.submit(embed_query, q): q.query_id for q in queries}
-        for fut in tqdm(as_completed(futures),
-                        total=len(futures),
-                        desc="Queries → embed",
-                        unit="qry"):
-            rec = fut.result()
-            query_records.append(rec)
-
-    # 6) Save query embeddings
+    query_stats = {}
     os.makedirs(os.path.dirname(query_embeddings_file), exist_ok=True)
-    with open(query_embeddings_file, "w", encoding="utf-8") as f:
-        json.dump(query_records, f, ensure_ascii=False, indent=2)
-    print(f"[5] Saved {len(query_records)} query embeddings → {query_embeddings_file}")
+    with EmbeddingStoreWriter(query_embeddings_file, model=model) as writer:
+        with tqdm(total=len(queries), desc="Queries → embed", unit="qry") as pbar:
+            embed_and_write(writer, [q.query_id for q in queries], [q.text for q in queries],
+                            client, cache, embed_batch_size, workers, query_stats, pbar=pbar)
+        writer.extra["embedding"] = query_stats
+    print(f"[5] Saved {len(queries)} query embeddings → {query_embeddings_file}")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sample MIRACL docs (with qrels) and precompute embeddings")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SAMPLE_SIZES, help="sample sizes (default: config)")
+    args = parser.parse_args()
+
     # 반복할 샘플 사이즈
-    for size in SAMPLE_SIZES:
-        print(f"\n=== run_precompute_all(sample_size={size}) ===")
-        run_precompute_all(
-            sample_size=size,
-            dataset_name=DATASET_NAME
-        )
+    # 모든 샘플 크기가 같은 캐시를 공유 → 큰 샘플은 새 문서만 임베딩
+    client = make_client(EMBED_BACKEND, MODEL)
+    cache = EmbeddingCache(str(EMBED_CACHE_PATH))
+    try:
+        for size in args.sizes:
+            print(f"\n=== run_precompute_all(sample_size={size}) ===")
+            run_precompute_all(
+                sample_size=size,
+                dataset_name=DATASET_NAME,
+                client=client,
+                cache=cache
+            )
+    finally:
+        cache.close()
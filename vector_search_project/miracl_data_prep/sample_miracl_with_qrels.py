@@ -1,33 +1,46 @@
+import heapq
+import random
+
 import ir_datasets
 from tqdm import tqdm
-import random
 
 
-def sample_with_qrels(ds, sample_size, random_seed=42):
-    random.seed(random_seed)
+def sample_with_qrels(ds, sample_size, random_seed=42, total=None):
+    """
+    qrels 문서를 모두 포함하는 sample_size 개 문서 ID를 docs_iter() 한 번만 돌면서 뽑는다.
+
+    나머지 문서에는 난수 키를 붙여 가장 작은 키 (sample_size - 지금까지 찾은 qrels 문서 수) 개만
+    힙에 유지한다 (bottom-k reservoir). 코퍼스에 없는 qrels ID는 자리를 차지하지 않으므로
+    전체 ID 목록이나 set(all_ids) - relevant 를 메모리에 만들 필요가 없다.
+    """
+    rng = random.Random(random_seed)
 
     # 1. qrels 문서 ID 확보
-    qrels_list = list(ds.qrels_iter())
-    qrels_ids = {q.doc_id for q in qrels_list}
-    QRELS_TOTAL = len(qrels_ids)
-    assert QRELS_TOTAL <= sample_size, f"QRELS 수({QRELS_TOTAL}) > sample_size({sample_size})"
-
-    # 2. 나머지 문서 reservoir 샘플링
-    reservoir = []
-    total_seen = 0
-    for doc in tqdm(ds.docs_iter(), desc="Reservoir sampling"):
+    qrels_ids = {q.doc_id for q in ds.qrels_iter()}
+
+    # 2. 한 번의 스트리밍 패스: qrels 문서는 모두 채택, 나머지는 reservoir
+    relevant = []
+    heap = []  # (-key, doc_id) → 가장 큰 key 가 heap[0]
+    for doc in tqdm(ds.docs_iter(), desc="Reservoir sampling", total=total, unit="doc"):
         if doc.doc_id in qrels_ids:
+            relevant.append(doc.doc_id)
+            if len(relevant) > sample_size:
+                raise ValueError(f"sample_size({sample_size}) smaller than number of relevant docs")
+            # 남은 자리가 줄었으면 가장 큰 key 부터 버린다
+            while len(heap) > sample_size - len(relevant):
+                heapq.heappop(heap)
+            continue
+        capacity = sample_size - len(relevant)
+        if capacity <= 0:
             continue
-        if len(reservoir) < sample_size - QRELS_TOTAL:
-            reservoir.append(doc.doc_id)
-        else:
-            j = random.randint(0, total_seen)
-            if j < (sample_size - QRELS_TOTAL):
-                reservoir[j] = doc.doc_id
-        total_seen += 1
-
-    final_ids = sorted(list(qrels_ids) + reservoir)
-    return final_ids
+        key = rng.random()
+        if len(heap) < capacity:
+            heapq.heappush(heap, (-key, doc.doc_id))
+        elif key < -heap[0][0]:
+            heapq.heapreplace(heap, (-key, doc.doc_id))
+
+    negatives = [doc_id for _, doc_id in heap]
+    return sorted(relevant + negatives)
 
 
 def main():
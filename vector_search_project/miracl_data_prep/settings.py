@@ -28,6 +28,8 @@ with open(PROJECT_ROOT / "config" / "config.yaml", "r", encoding="utf-8") as f:
 RANDOM_SEED = cfg.get("random_seed")
 MODEL = cfg.get("experiment", {}).get("model")
 MAX_WORKERS = cfg.get("experiment", {}).get("max_workers")
+EMBED_BACKEND = cfg.get("experiment", {}).get("embed_backend", "ollama")
+EMBED_BATCH_SIZE = cfg.get("experiment", {}).get("embed_batch_size", 32)
 
 # 4) Input embedding settings
 input_cfg = cfg.get("input", {})
@@ -38,8 +40,10 @@ EMBEDDING_SUBDIR = input_cfg.get("embedding_dir", "embeddings")
 EMB_DIR = BASE_DATA_DIR / DATASET_NAME / EMBEDDING_SUBDIR # e.g., data/dataset_name/embeddings
 
 
-EMB_FILE_PATTERN = input_cfg.get("embedding_file_pattern", "doc_embeddings_{size}.json")
+EMB_FILE_PATTERN = input_cfg.get("embedding_file_pattern", "doc_embeddings_{size}")
 DOCID_PATTERN = input_cfg.get("docid_pattern", "docid_list_{size}.json")
+# (model, content hash) → embedding 캐시, 모든 샘플 크기가 공유
+EMBED_CACHE_PATH = EMB_DIR / input_cfg.get("embedding_cache", "embedding_cache.sqlite")
 
 # 5) Vector DB settings
 vdb_cfg = cfg.get("vector_db", {})
@@ -0,0 +1,280 @@
+# dag.py — content-addressed DAG runner (stage skip by input hash + config slice, CPU-budgeted parallelism)
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import subprocess
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class Stage:
+    """
+    name    : unique stage name (e.g. "he_build_10000")
+    cmd     : argv run with cwd = project root
+    inputs  : files/directories read by the stage
+    outputs : files/directories written by the stage
+    config  : dotted config keys whose values are part of the fingerprint ("ckks_params", "experiment.model")
+    deps    : extra ordering-only dependencies (producers of `inputs` are added automatically)
+    cpus    : cores the stage occupies while running (counted against the CPU budget)
+    locks   : names of shared resources; two stages holding the same lock never run together
+    clean   : remove `outputs` before re-running (for scripts that skip when their output exists)
+    """
+    name: str
+    cmd: List[str]
+    inputs: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+    config: List[str] = field(default_factory=list)
+    deps: List[str] = field(default_factory=list)
+    cpus: int = 1
+    locks: List[str] = field(default_factory=list)
+    clean: bool = False
+
+
+def config_slice(cfg: dict, keys: List[str]) -> Dict[str, Any]:
+    """{dotted key: value} for the requested keys (missing keys → None)."""
+    out = {}
+    for key in keys:
+        node: Any = cfg
+        for part in key.split("."):
+            node = node.get(part) if isinstance(node, dict) else None
+        out[key] = node
+    return out
+
+
+class ContentHasher:
+    """
+    sha256 of files / directory trees. Digests are cached by (size, mtime_ns) so
+    unchanged files are not re-read on every run; the cache is persisted in the
+    pipeline state file.
+    """
+
+    def __init__(self, cache: Optional[Dict[str, list]] = None):
+        self.cache = cache or {}
+
+    def _file(self, path: str) -> str:
+        st = os.stat(path)
+        hit = self.cache.get(path)
+        if hit and hit[0] == st.st_size and hit[1] == st.st_mtime_ns:
+            return hit[2]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        self.cache[path] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+    def digest(self, path: str) -> str:
+        if os.path.isfile(path):
+            return self._file(path)
+        if os.path.isdir(path):
+            h = hashlib.sha256()
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    full = os.path.join(root, name)
+                    h.update(os.path.relpath(full, path).encode("utf-8") + b"\0")
+                    h.update(self._file(full).encode("ascii"))
+            return h.hexdigest()
+        return "missing"
+
+
+class Pipeline:
+    """
+    Stages form a DAG through their declared inputs/outputs (plus `deps`).
+
+    A stage is skipped when its fingerprint — sha256 over the command, the
+    config slice and, per input, either the content hash (external inputs:
+    scripts, datasets, keys) or the producing stage's fingerprint (inputs that
+    another stage writes) — equals the one recorded after its last successful
+    run and all of its outputs exist. Using the producer fingerprint for
+    intermediate artifacts avoids re-hashing multi-GB encrypted DBs and is exact
+    as long as stages are deterministic in their inputs.
+
+    Ready stages run as subprocesses in parallel while their summed `cpus` fit
+    in `cpu_budget`; each stage's stdout/stderr goes to <log_dir>/<stage>.log.
+    """
+
+    def __init__(self, root: str, cfg: dict, state_file: str, log_dir: str):
+        self.root = root
+        self.cfg = cfg
+        self.state_file = state_file
+        self.log_dir = log_dir
+        self.stages: Dict[str, Stage] = {}
+        self.producers: Dict[str, str] = {}
+
+    def _abs(self, path: str) -> str:
+        return os.path.normpath(os.path.join(self.root, path))
+
+    def add(self, stage: Stage) -> Stage:
+        if stage.name in self.stages:
+            raise ValueError(f"duplicate stage {stage.name!r}")
+        for out in stage.outputs:
+            key = self._abs(out)
+            if key in self.producers:
+                raise ValueError(f"{out} is produced by both {self.producers[key]!r} and {stage.name!r}")
+            self.producers[key] = stage.name
+        self.stages[stage.name] = stage
+        return stage
+
+    def dependencies(self, name: str) -> List[str]:
+        stage = self.stages[name]
+        deps = set(stage.deps)
+        for path in stage.inputs:
+            producer = self.producers.get(self._abs(path))
+            if producer is not None and producer != name:
+                deps.add(producer)
+        missing = deps - set(self.stages)
+        if missing:
+            raise ValueError(f"{name!r} depends on unknown stage(s) {sorted(missing)}")
+        return sorted(deps)
+
+    def order(self, targets: Optional[List[str]] = None) -> List[str]:
+        """Topological order of `targets` (default: all stages) and everything they depend on."""
+        order, state = [], {}
+
+        def visit(name: str, path: List[str]):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError("cycle: " + " → ".join(path + [name]))
+            state[name] = "visiting"
+            for dep in self.dependencies(name):
+                visit(dep, path + [name])
+            state[name] = "done"
+            order.append(name)
+
+        for name in (targets or list(self.stages)):
+            if name not in self.stages:
+                raise ValueError(f"unknown stage {name!r}")
+            visit(name, [])
+        return order
+
+    def fingerprint(self, name: str, hasher: ContentHasher, fingerprints: Dict[str, str]) -> str:
+        stage = self.stages[name]
+        h = hashlib.sha256()
+        h.update(json.dumps({"cmd": stage.cmd, "config": config_slice(self.cfg, stage.config)},
+                            sort_keys=True, default=str).encode("utf-8"))
+        for path in sorted(stage.inputs):
+            producer = self.producers.get(self._abs(path))
+            if producer is not None and producer != name:
+                token = "stage:" + fingerprints[producer]
+            else:
+                token = "content:" + hasher.digest(self._abs(path))
+            h.update(f"\0{path}\0{token}".encode("utf-8"))
+        return h.hexdigest()
+
+    # ── state ──
+    def _load_state(self) -> dict:
+        if os.path.exists(self.state_file):
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return {"stages": {}, "hash_cache": {}}
+
+    def _save_state(self, state: dict):
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        tmp = self.state_file + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp, self.state_file)
+
+    def run(self,
+            targets: Optional[List[str]] = None,
+            cpu_budget: Optional[int] = None,
+            force: bool = False,
+            dry_run: bool = False,
+            poll_interval: float = 0.2) -> dict:
+        """Run (or skip) the stages needed for `targets`. Returns a per-stage timing report."""
+        budget = max(1, cpu_budget or os.cpu_count() or 1)
+        order = self.order(targets)
+        state = self._load_state()
+        hasher = ContentHasher(state.get("hash_cache"))
+        os.makedirs(self.log_dir, exist_ok=True)
+
+        fingerprints: Dict[str, str] = {}
+        report: Dict[str, dict] = {}
+        pending = list(order)
+        running: Dict[str, tuple] = {}  # name → (Popen, start, log file, fingerprint)
+        t_start = time.perf_counter()
+        started_at = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime())
+
+        def finish(name: str, status: str, **extra):
+            report[name] = dict(status=status, **extra)
+            print(f"[{status:^7}] {name}" + (f"  {extra['seconds']:.1f}s" if "seconds" in extra else ""))
+
+        while pending or running:
+            # 1) launch / skip every ready stage that fits the budget
+            used = sum(self.stages[n].cpus for n in running)
+            held = {lock for n in running for lock in self.stages[n].locks}
+            for name in list(pending):
+                deps = self.dependencies(name)
+                if any(report.get(d, {}).get("status") in ("failed", "blocked") for d in deps):
+                    pending.remove(name)
+                    finish(name, "blocked")
+                    continue
+                if not all(d in report for d in deps):
+                    continue
+                stage = self.stages[name]
+                fp = fingerprints[name] = self.fingerprint(name, hasher, fingerprints)
+                outputs_ok = all(os.path.exists(self._abs(o)) for o in stage.outputs)
+                if not force and outputs_ok and state["stages"].get(name, {}).get("fingerprint") == fp:
+                    pending.remove(name)
+                    finish(name, "skipped")
+                    continue
+                if dry_run:
+                    pending.remove(name)
+                    finish(name, "stale")
+                    continue
+                cpus = min(stage.cpus, budget)
+                if (running and used + cpus > budget) or held & set(stage.locks):
+                    continue
+                if stage.clean:
+                    for out in stage.outputs:
+                        path = self._abs(out)
+                        if os.path.isdir(path):
+                            shutil.rmtree(path)
+                        elif os.path.exists(path):
+                            os.remove(path)
+                log_path = os.path.join(self.log_dir, f"{name}.log")
+                log = open(log_path, "w", encoding="utf-8")
+                print(f"[  run  ] {name}: {' '.join(stage.cmd)}")
+                proc = subprocess.Popen(stage.cmd, cwd=self.root, stdout=log, stderr=subprocess.STDOUT)
+                running[name] = (proc, time.perf_counter(), log, fp)
+                pending.remove(name)
+                used += cpus
+                held |= set(stage.locks)
+
+            # 2) reap finished stages
+            if not running:
+                continue
+            time.sleep(poll_interval)
+            for name, (proc, started, log, fp) in list(running.items()):
+                if proc.poll() is None:
+                    continue
+                del running[name]
+                log.close()
+                seconds = time.perf_counter() - started
+                timing = {"seconds": seconds, "start": started - t_start, "end": started - t_start + seconds,
+                          "log": log.name}
+                if proc.returncode == 0:
+                    state["stages"][name] = {"fingerprint": fp, "seconds": seconds,
+                                             "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime())}
+                    state["hash_cache"] = hasher.cache
+                    self._save_state(state)
+                    finish(name, "done", **timing)
+                else:
+                    finish(name, "failed", returncode=proc.returncode, **timing)
+
+        state["hash_cache"] = hasher.cache
+        if not dry_run:
+            self._save_state(state)
+        return {
+            "started_at": started_at,
+            "cpu_budget": budget,
+            "wall_time": time.perf_counter() - t_start,
+            "stages": {name: report[name] for name in order},
+        }
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# run_pipeline.py — precompute → (Chroma build → eval) ∥ (HE build → eval), per sample size, as a DAG
+#
+#   python pipeline/run_pipeline.py                    # everything stale, under pipeline.cpu_budget
+#   python pipeline/run_pipeline.py --dry-run          # show what would run / be skipped
+#   python pipeline/run_pipeline.py he_eval_10000      # one target and its upstream stages
+#   python pipeline/run_pipeline.py --sizes 10000 --only he
+
+import os
+import sys
+import json
+import argparse
+
+from dag import Pipeline, Stage
+from settings import (
+    PROJECT_ROOT,
+    cfg,
+    SAMPLE_SIZES,
+    CPU_BUDGET,
+    STATE_FILE,
+    LOG_DIR,
+    TIMINGS_FILE,
+    STAGE_CPUS,
+    FERNET_KEY_PATH,
+    CONTEXT_SECRET,
+    rel,
+    get_doc_embeddings_path,
+    get_query_embeddings_path,
+    get_he_db_path,
+    get_subset_marker_path,
+    SHARED_STORE,
+    get_plain_db_dir,
+    get_eval_path,
+    get_plain_eval_path,
+)
+
+PY = sys.executable
+LIB = "../src/he_vector_db"
+
+
+def build_pipeline(sizes, tracks=("chroma", "he")) -> Pipeline:
+    pipe = Pipeline(str(PROJECT_ROOT), cfg, str(STATE_FILE), str(LOG_DIR))
+    cpus = lambda kind, default=1: STAGE_CPUS.get(kind, default)
+    keys = [rel(CONTEXT_SECRET), rel(FERNET_KEY_PATH)]
+
+    if "he" in tracks:
+        pipe.add(Stage(
+            name="he_keys",
+            cmd=[PY, "he_db_experiments/makedb.py", "--keys-only"],
+            inputs=["he_db_experiments/makedb.py"],
+            outputs=keys,
+            config=["ckks_params", "keys"],
+        ))
+
+    previous = previous_build = None
+    for size in sizes:
+        docs, queries = get_doc_embeddings_path(size), get_query_embeddings_path(size)
+        # 임베딩 캐시를 공유하므로 크기 순서대로 (큰 샘플은 새 문서만 임베딩)
+        pipe.add(Stage(
+            name=f"precompute_{size}",
+            cmd=[PY, "miracl_data_prep/precompute_embeddings.py", "--sizes", str(size)],
+            inputs=["miracl_data_prep/precompute_embeddings.py", "miracl_data_prep/sample_miracl_with_qrels.py",
+                    f"{LIB}/embeddings.py", f"{LIB}/embedding_client.py"],
+            outputs=[docs, queries],
+            config=["random_seed", "input.dataset_name", "input.embedding_file_pattern",
+                    "experiment.model", "experiment.embed_backend"],
+            deps=[previous] if previous else [],
+            cpus=cpus("precompute"),
+        ))
+        previous = f"precompute_{size}"
+
+        if "chroma" in tracks:
+            pipe.add(Stage(
+                name=f"chroma_build_{size}",
+                cmd=[PY, "plain_db_experiments/chroma.py", "--sizes", str(size)],
+                inputs=["plain_db_experiments/chroma.py", docs],
+                outputs=[get_plain_db_dir(size)],
+                config=["vector_db.plain", "vector_db.collection_name"],
+                cpus=cpus("chroma_build"),
+                clean=True,
+            ))
+            pipe.add(Stage(
+                name=f"chroma_eval_{size}",
+                cmd=[PY, "plain_db_experiments/chroma_eval.py", "--sizes", str(size)],
+                inputs=["plain_db_experiments/chroma_eval.py", queries, get_plain_db_dir(size)],
+                outputs=[get_plain_eval_path(size)],
+                config=["experiment.n_results", "experiment.query_num", "harness.query_batch_size"],
+                cpus=cpus("chroma_eval"),
+                locks=[f"docid_list_{size}"],
+            ))
+
+        if "he" in tracks:
+            if SHARED_STORE:
+                # 공유 DB 에 subset 을 추가 → 크기 순서대로 한 번에 하나씩, 결과물은 subset 마커
+                db_out = get_subset_marker_path(size)
+                build = dict(outputs=[db_out], deps=[previous_build] if previous_build else [],
+                             locks=["he_shared_db"], clean=False)
+            else:
+                db_out = get_he_db_path(size)
+                build = dict(outputs=[db_out], clean=True)
+            pipe.add(Stage(
+                name=f"he_build_{size}",
+                cmd=[PY, "he_db_experiments/makedb.py", "--sizes", str(size)],
+                inputs=["he_db_experiments/makedb.py", f"{LIB}/store.py", docs] + keys,
+                config=["vector_db.encrypted.db_dir_pattern", "vector_db.encrypted.shared_store",
+                        "vector_db.encrypted.shared_db_dir", "vector_db.batch_size"],
+                cpus=cpus("he_build"),
+                **build,
+            ))
+            previous_build = f"he_build_{size}"
+            pipe.add(Stage(
+                name=f"he_eval_{size}",
+                cmd=[PY, "he_db_experiments/eval.py", "--sizes", str(size)],
+                inputs=["he_db_experiments/eval.py", f"{LIB}/store.py", queries, db_out] + keys,
+                outputs=[get_eval_path(size)],
+                config=["experiment.n_results", "experiment.query_num", "experiment.max_workers",
+                        "experiment.chunk_size", "experiment.autotune", "vector_db.encrypted.memory_budget_mb",
+                        "vector_db.encrypted.result_cache_entries", "vector_db.encrypted.result_cache_bytes"],
+                cpus=cpus("he_eval", cfg.get("experiment", {}).get("max_workers") or 1),
+                locks=[f"docid_list_{size}"],
+            ))
+    return pipe
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Content-addressed DAG runner for the experiment pipeline")
+    parser.add_argument("targets", nargs="*", help="stage names (default: all)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SAMPLE_SIZES)
+    parser.add_argument("--only", choices=["chroma", "he"], help="run a single track")
+    parser.add_argument("--cpu-budget", type=int, default=CPU_BUDGET, help="default: pipeline.cpu_budget or all cores")
+    parser.add_argument("--force", action="store_true", help="re-run even if fingerprints match")
+    parser.add_argument("--dry-run", action="store_true", help="only report which stages are stale")
+    parser.add_argument("--list", action="store_true", help="print stages and their dependencies")
+    args = parser.parse_args()
+
+    pipe = build_pipeline(args.sizes, tracks=(args.only,) if args.only else ("chroma", "he"))
+    if args.list:
+        for name in pipe.order(args.targets or None):
+            deps = pipe.dependencies(name)
+            print(f"{name:<22} ← {', '.join(deps) if deps else '-'}")
+        return
+
+    report = pipe.run(args.targets or None, cpu_budget=args.cpu_budget, force=args.force, dry_run=args.dry_run)
+    ran = sum(r["status"] == "done" for r in report["stages"].values())
+    skipped = sum(r["status"] == "skipped" for r in report["stages"].values())
+    failed = [n for n, r in report["stages"].items() if r["status"] in ("failed", "blocked")]
+    print(f"\n⏱ wall {report['wall_time']:.1f}s — ran {ran}, skipped {skipped}, failed/blocked {len(failed)}"
+          f" (cpu budget {report['cpu_budget']})")
+
+    if not args.dry_run:
+        os.makedirs(os.path.dirname(TIMINGS_FILE), exist_ok=True)
+        with open(TIMINGS_FILE, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Stage timings saved to {TIMINGS_FILE}")
+    if failed:
+        print("❌ " + ", ".join(failed) + f" (logs in {LOG_DIR})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# settings.py for pipeline
+
+import yaml
+from pathlib import Path
+
+# 1) Locate project root by finding config/config.yaml
+HERE = Path(__file__).resolve()
+root = HERE.parent
+config_path = root / "config" / "config.yaml"
+while not config_path.exists():
+    if root.parent == root:
+        raise FileNotFoundError(
+            f"config/config.yaml not found. Last checked: {root}"
+        )
+    root = root.parent
+    config_path = root / "config" / "config.yaml"
+
+# PROJECT_ROOT is the directory containing config/
+PROJECT_ROOT = root
+
+# 2) Load YAML configuration
+with open(PROJECT_ROOT / "config" / "config.yaml", "r", encoding="utf-8") as f:
+    cfg = yaml.safe_load(f)
+
+# 3) Inputs (same layout as miracl_data_prep / he_db_experiments / plain_db_experiments settings)
+input_cfg = cfg.get("input", {})
+DATASET_NAME = input_cfg.get("dataset_name", "")
+SAMPLE_SIZES = input_cfg.get("sample_sizes", [])
+EMB_DIR = PROJECT_ROOT / input_cfg.get("base_dir", "data") / DATASET_NAME / input_cfg.get("embedding_dir", "embeddings")
+EMB_FILE_PATTERN = input_cfg.get("embedding_file_pattern", "doc_embeddings_{size}")
+DOCID_PATTERN = input_cfg.get("docid_pattern", "docid_list_{size}.json")
+
+# 4) Vector DBs
+vdb_cfg = cfg.get("vector_db", {})
+he_cfg = vdb_cfg.get("encrypted", {})
+HE_DB_BASE = PROJECT_ROOT / DATASET_NAME / he_cfg.get("base_dir", "data/he_dbs")
+HE_DB_PATTERN = he_cfg.get("db_dir_pattern", "he_db_{size}")
+SHARED_STORE = he_cfg.get("shared_store", False)
+SHARED_DB_DIR = he_cfg.get("shared_db_dir", "he_db_shared")
+plain_cfg = vdb_cfg.get("plain", {})
+PLAIN_DB_BASE = PROJECT_ROOT / DATASET_NAME / plain_cfg.get("base_dir", "data/plain_dbs")
+PLAIN_DB_PATTERN = plain_cfg.get("db_dir_pattern", "chroma_db_{size}")
+
+# 5) Keys
+key_cfg = cfg.get("keys", {})
+KEY_BASE = PROJECT_ROOT / key_cfg.get("base_dir", "data/keys")
+FERNET_KEY_PATH = KEY_BASE / key_cfg.get("fernet_key", "fernet_symmetric.key")
+CONTEXT_SECRET = KEY_BASE / key_cfg.get("ckks", {}).get("secret", "ckks_context.sk")
+
+# 6) Outputs
+out_cfg = cfg.get("output", {})
+RESULTS_DIR = PROJECT_ROOT / out_cfg.get("results_dir", "results")
+EVAL_FILE_PATTERN = out_cfg.get("eval_results_pattern", "eval_results_{size}.json")
+PLAIN_EVAL_PATTERN = out_cfg.get("plain_eval_results_pattern", "chroma_eval_results_{size}.json")
+
+# 7) Pipeline runner
+pipe_cfg = cfg.get("pipeline", {})
+CPU_BUDGET = pipe_cfg.get("cpu_budget")
+STATE_FILE = PROJECT_ROOT / pipe_cfg.get("state_file", ".pipeline/state.json")
+LOG_DIR = PROJECT_ROOT / pipe_cfg.get("log_dir", "results/pipeline_logs")
+TIMINGS_FILE = RESULTS_DIR / pipe_cfg.get("timings_file", "pipeline_timings.json")
+STAGE_CPUS = pipe_cfg.get("stage_cpus", {})
+
+
+def rel(path) -> str:
+    """Path relative to PROJECT_ROOT (stage inputs/outputs are declared relative to it)."""
+    return str(Path(path).resolve().relative_to(PROJECT_ROOT.resolve()))
+
+
+def get_doc_embeddings_path(size: int) -> str:
+    return rel(EMB_DIR / EMB_FILE_PATTERN.format(size=size))
+
+
+def get_query_embeddings_path(size: int) -> str:
+    return rel(EMB_DIR / EMB_FILE_PATTERN.replace("doc_", "query_").format(size=size))
+
+
+def get_he_db_path(size: int) -> str:
+    return rel(HE_DB_BASE / HE_DB_PATTERN.format(size=size))
+
+
+def get_subset_marker_path(size: int) -> str:
+    return rel(HE_DB_BASE / SHARED_DB_DIR / f"subset_{size}.json")
+
+
+def get_plain_db_dir(size: int) -> str:
+    return rel(PLAIN_DB_BASE / PLAIN_DB_PATTERN.format(size=size))
+
+
+def get_eval_path(size: int) -> str:
+    return rel(RESULTS_DIR / EVAL_FILE_PATTERN.format(size=size))
+
+
+def get_plain_eval_path(size: int) -> str:
+    return rel(RESULTS_DIR / PLAIN_EVAL_PATTERN.format(size=size))
@@ -1,10 +1,12 @@
 # chroma.py — Create Chroma DB using settings.py
 
 import os
-import json
 import time
+import argparse
+import numpy as np
 import chromadb
 from chromadb.config import DEFAULT_TENANT, DEFAULT_DATABASE, Settings
+from he_vector_db.embeddings import open_embeddings
 from settings import (
     SAMPLE_SIZES,
     get_doc_embeddings_path,
@@ -16,12 +18,17 @@ COLL_NAME  = "docs"
 BATCH_SIZE = 1000
 TIME_LOG   = "embedding_load_times.txt"
 
-# ── 시간 로그 초기화 ─────────────────
-with open(TIME_LOG, "w", encoding="utf-8") as f:
-    f.write("=== Embedding Load Times ===\n")
+parser = argparse.ArgumentParser(description="Build Chroma DBs from precomputed embeddings")
+parser.add_argument("--sizes", type=int, nargs="+", default=SAMPLE_SIZES, help="sample sizes (default: config)")
+args = parser.parse_args()
+
+# ── 시간 로그 초기화 (크기별로 병렬 실행될 수 있으므로 덮어쓰지 않고 이어 씀) ──
+if not os.path.exists(TIME_LOG):
+    with open(TIME_LOG, "w", encoding="utf-8") as f:
+        f.write("=== Embedding Load Times ===\n")
 
 # ── 각 크기별로 DB 생성 ──────────────
-for size in SAMPLE_SIZES:
+for size in args.sizes:
     db_path = get_plain_db_dir(size)
     os.makedirs(db_path, exist_ok=True)
 
@@ -44,25 +51,20 @@ for size in SAMPLE_SIZES:
     embedding_file = get_doc_embeddings_path(size)
 
     start = time.time()
-    with open(embedding_file, "r", encoding="utf-8") as f:
-        items = json.load(f)
+    emb_store = open_embeddings(embedding_file)
 
-    total = len(items)
+    total = len(emb_store)
     print(f"🚀 {size}개 문서 로딩 시작 (총 {total}개)")
 
-    for i in range(0, total, BATCH_SIZE):
-        batch = items[i:i+BATCH_SIZE]
-        ids        = [item["doc_id"]   for item in batch]
-        contents   = [item["content"]  for item in batch]
-        embeddings = [item["embedding"] for item in batch]
-
+    done = 0
+    for ids, contents, matrix in emb_store.iter_batches(BATCH_SIZE):
         collection.add(
             ids=ids,
             documents=contents,
-            embeddings=embeddings
+            embeddings=np.asarray(matrix)
         )
-
-        print(f"  ▶ {i+BATCH_SIZE if i+BATCH_SIZE < total else total}/{total} 완료")
+        done += len(ids)
+        print(f"  ▶ {done}/{total} 완료")
 
     elapsed = time.time() - start
     with open(TIME_LOG, "a", encoding="utf-8") as f:
@@ -2,13 +2,17 @@
 
 import os
 import json
+import argparse
 import time
+import numpy as np
 import chromadb
 from chromadb.config import Settings
+from he_vector_db.embeddings import open_embeddings
 from settings import (
     SAMPLE_SIZES,
     N_RESULTS,
     QUERY_NUM,
+    QUERY_BATCH_SIZE,
     get_query_embeddings_path,
     get_eval_path,
     get_metrics_path,
@@ -18,28 +22,26 @@ from settings import (
 
 COLL_NAME = "docs"
 
-def evaluate_queries(collection, query_embeddings_file, n_results, limit=None):
-    with open(query_embeddings_file, "r", encoding="utf-8") as f:
-        queries = json.load(f)
-    if limit:
-        queries = queries[:limit]
+def evaluate_queries(collection, query_embeddings_file, n_results, limit=None, batch_size=QUERY_BATCH_SIZE):
+    queries = open_embeddings(query_embeddings_file)
+    stop = min(limit, len(queries)) if limit else len(queries)
 
-    embeddings = [q["embedding"] for q in queries]
-    query_ids  = [q["query_id"]  for q in queries]
+    query_ids  = queries.ids[:stop]
 
     results = []
     start = time.perf_counter()
-    for qid, vec in zip(query_ids, embeddings):
-        hits = collection.query(query_embeddings=[vec], n_results=n_results)
-        dids = hits['ids'][0]
-        scores = hits['distances'][0]
-        results.append({
-            "query_id": qid,
-            "results": [
-                {"rank": i + 1, "doc_id": did, "score": score}
-                for i, (did, score) in enumerate(zip(dids, scores))
-            ]
-        })
+    # 쿼리를 batch_size 개씩 묶어 collection.query 한 번으로 검색
+    for i in range(0, stop, batch_size):
+        batch = queries.matrix[i:min(i + batch_size, stop)]
+        hits = collection.query(query_embeddings=np.asarray(batch).tolist(), n_results=n_results)
+        for qid, dids, scores in zip(query_ids[i:i + len(batch)], hits['ids'], hits['distances']):
+            results.append({
+                "query_id": qid,
+                "results": [
+                    {"rank": r + 1, "doc_id": did, "score": score}
+                    for r, (did, score) in enumerate(zip(dids, scores))
+                ]
+            })
     wall_time = time.perf_counter() - start
     return results, wall_time
 
@@ -49,7 +51,11 @@ def dump_docids(collection, out_path):
         json.dump(docs, f, ensure_ascii=False, indent=2)
 
 def main():
-    for size in SAMPLE_SIZES:
+    parser = argparse.ArgumentParser(description="Evaluate Chroma DBs")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SAMPLE_SIZES, help="sample sizes (default: config)")
+    args = parser.parse_args()
+
+    for size in args.sizes:
         db_path = get_plain_db_dir(size)
         print(f"\n▶ 크기 {size} 평가 시작 (DB: {db_path})")
 
@@ -28,6 +28,7 @@ MODEL = exp_cfg.get("model")
 MAX_WORKERS = exp_cfg.get("max_workers")
 N_RESULTS = exp_cfg.get("n_results")
 QUERY_NUM = exp_cfg.get("query_num")
+QUERY_BATCH_SIZE = cfg.get("harness", {}).get("query_batch_size", 8)
 
 input_cfg = cfg.get("input", {})
 SAMPLE_SIZES = input_cfg.get("sample_sizes", [])
@@ -35,7 +36,7 @@ SAMPLE_SIZES = input_cfg.get("sample_sizes", [])
 # 6) Input embedding file patterns (if reused)
 input_cfg = cfg.get("input", {})
 BASE_EMB_DIR = PROJECT_ROOT / input_cfg.get("base_dir", "data") / input_cfg.get("dataset_name", "") / input_cfg.get("embedding_dir", "embeddings") 
-EMB_FILE_PATTERN = input_cfg.get("embedding_file_pattern", "doc_embeddings_{size}.json")
+EMB_FILE_PATTERN = input_cfg.get("embedding_file_pattern", "doc_embeddings_{size}")
 DOCID_PATTERN = input_cfg.get("docid_pattern", "docid_list_{size}.json")
 
 # 7) Plain Vector DB settings
@@ -46,8 +47,9 @@ PLAIN_DB_PATTERN = plain_cfg.get("db_dir_pattern", "chroma_db_{size}")
 # 8) Output files
 out_cfg = cfg.get("output", {})
 RESULTS_DIR = PROJECT_ROOT / out_cfg.get("results_dir", "results")
-EVAL_FILE_PATTERN = out_cfg.get("eval_results_pattern", "eval_results_{size}.json")
-METRICS_FILE_PATTERN = out_cfg.get("metrics_pattern", "metrics_{size}.json")
+# Chroma 결과는 HE 결과(eval_results_/metrics_)와 파일명을 분리해서 나란히 평가
+EVAL_FILE_PATTERN = out_cfg.get("plain_eval_results_pattern", "chroma_eval_results_{size}.json")
+METRICS_FILE_PATTERN = out_cfg.get("plain_metrics_pattern", "chroma_metrics_{size}.json")
 
 # 9) Random seed
 RANDOM_SEED = cfg.get("random_seed")
@@ -70,12 +72,12 @@ def get_metrics_path(size: int) -> str:
 
 
 def get_doc_embeddings_path(size: int) -> str:
-    """Return document embeddings JSON path for given sample size."""
+    """Return document embedding store directory for given sample size."""
     return str(BASE_EMB_DIR / EMB_FILE_PATTERN.format(size=size))
 
 
 def get_query_embeddings_path(size: int) -> str:
-    """Return query embeddings JSON path for given sample size."""
+    """Return query embedding store directory for given sample size."""
     return str(BASE_EMB_DIR / EMB_FILE_PATTERN.replace("doc_", "query_").format(size=size))
 
 